@@ -0,0 +1,55 @@
+import time
+import timeit
+import random
+import tracemalloc
+
+from lib.classes import Element, EventType, Individual
+from lib.evolutionary_algorithm import EvolutionaryAlgorithm
+from lib.log_cache import load_cached_log
+
+
+## Memory and speed of the core types (Element, Object, Category, ...): run it on two commits to compare them
+
+log_file_name = 'arkanoid_log_20_10_2024_16_48_34.pkl'
+n_genomes = 300
+max_mutations = 40
+seed = 1
+
+if __name__ == '__main__':
+
+    element_pool, event_pool, events_per_frame, elements_per_frame, event_index = load_cached_log(f'logs/arkanoid_logs/{log_file_name}')
+
+    ## random genomes, cloned and mutated a random number of times
+
+    random.seed(seed)
+    tracemalloc.start()
+    population = []
+    for _ in range(n_genomes):
+        individual = Individual(element_pool, event_pool).initialize()
+        for _ in range(random.randint(0, max_mutations)):
+            individual = Individual(element_pool, event_pool, individual).mutate() if random.random() < 0.3 else individual.mutate()
+        population.append(individual)
+    print(f'traced memory of {n_genomes} genomes: {tracemalloc.get_traced_memory()[0] // 1024} KB')
+    tracemalloc.stop()
+
+    ## membership tests on the largest object and category lists
+
+    category = max((cat for individual in population for cat in individual.categories), key= lambda cat: len(cat.objects))
+    obj = category.objects[-1]
+    print(f"'in' on the objects of a category ({len(category.objects)}): {timeit.timeit(lambda: obj in category.objects, number= 200000):.3f}s for 200000")
+
+    individual = max(population, key= lambda individual: len(individual.categories))
+    cat = individual.categories[-1]
+    print(f"'in' on the categories of an individual ({len(individual.categories)}): {timeit.timeit(lambda: cat in individual.categories, number= 200000):.3f}s for 200000")
+
+    ## evolution
+
+    random.seed(seed)
+    evo = EvolutionaryAlgorithm(element_pool, event_pool, events_per_frame, event_index).initialize_population(num_individuals= 100)
+    starting_time = time.time()
+    evo.run(30, verbose= False)
+    print(f'30 generations: {time.time() - starting_time:.2f}s, best fitness {evo.get_winner().fitness}')
+
+    ## interned instances: the registries hold them weakly, only the ones of the loaded log are alive
+
+    print(f'interned: {len(Element._registry)} elements, {len(EventType._registry)} event types ({len(element_pool)} and {len(event_pool)} in the log)')
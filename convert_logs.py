@@ -0,0 +1,36 @@
+import os
+
+from lib.columnar_log import convert_pickle_log
+from lib.compact_recording import convert_compact_recording
+from lib.streaming_log import convert_streaming_log
+from lib.mapped_recording import MappedRecording
+
+
+## Convert the pickled, streaming and compact logs to the columnar format (see lib/columnar_log.py), the .npz is saved next to the .pkl (.stream, .replay)
+
+log_dir = 'logs/arkanoid_logs'
+make_recordings = False # also write the memory-mapped recording of each log (see lib/mapped_recording.py), in a directory named as the log
+
+for log_file_name in sorted(os.listdir(log_dir)):
+
+    log_name, extension = os.path.splitext(log_file_name)
+    if extension not in ('.pkl', '.stream', '.replay'): continue
+
+    log_path = f'{log_dir}/{log_file_name}'
+    npz_path = f'{log_dir}/{log_name}.npz'
+
+    if os.path.exists(npz_path): print(f'{npz_path} already present')
+    else:
+        if extension == '.pkl': convert_pickle_log(log_path, npz_path)
+        elif extension == '.stream': convert_streaming_log(log_path, npz_path)
+        else: convert_compact_recording(log_path, npz_path)
+        print(f'{log_path} -> {npz_path}')
+
+    recording_path = npz_path[:-len('.npz')]
+
+    if make_recordings and not os.path.exists(recording_path):
+        try:
+            MappedRecording.create(recording_path, npz_path)
+            print(f'{npz_path} -> {recording_path}')
+        except Exception as e:
+            print(f'{npz_path} skipped: {e}')
@@ -0,0 +1,22 @@
+import os
+
+from lib.distributed_evaluator import run_worker
+from lib.log_cache import latest_log, load_cached_log
+
+
+## Evaluation worker for an EvolutionaryAlgorithm created with broker_address (see lib/distributed_evaluator.py)
+## the log must be the same one of the evolution (its hash is checked by the broker)
+
+log_file_name = 'arkanoid_log_20_10_2024_16_48_34.pkl'
+broker_address = ('localhost', 6000) # (host, port) or the path of a Unix socket
+broker_authkey = os.environ.get('ARKANOID_BROKER_AUTHKEY') # the secret shared with the broker, required
+
+if __name__ == '__main__':
+
+    if not broker_authkey: raise Exception('evaluation_worker error: set ARKANOID_BROKER_AUTHKEY to the authkey of the broker')
+
+    if log_file_name is None: log_file_name = latest_log('logs/arkanoid_logs')
+    element_pool, event_pool, events_per_frame, elements_per_frame, event_index = load_cached_log(f'logs/arkanoid_logs/{log_file_name}')
+
+    evaluated = run_worker(broker_address, broker_authkey.encode(), element_pool, event_pool, events_per_frame)
+    print(f'{evaluated} individuals evaluated')
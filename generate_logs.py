@@ -0,0 +1,15 @@
+from lib.log_farm import run_farm
+
+
+## Generate logs with simulated games (see lib/log_farm.py), the shards and their manifest are saved in logs/arkanoid_logs
+
+n_games = 64
+policies = ('tracking', 'noisy_tracking', 'random', 'guarded_random')
+base_seed = 0
+max_frames = 100000
+processes = None # all the cores
+
+if __name__ == '__main__':
+
+    manifest_path = run_farm(n_games, policies= policies, base_seed= base_seed, max_frames= max_frames, processes= processes)
+    print(f'{n_games} games -> {manifest_path}')
@@ -1,2 +1,22 @@
 from .classes import Category, Element, Event, EventType, Individual, Object, Rule
+from .async_evaluator import AsyncEvaluator
+from .category_memo import CategoryMemo
+from .checkpoint import CheckpointWriter, load_checkpoint, save_checkpoint
+from .columnar_log import ColumnarLogWriter, convert_pickle_log, load_columnar_log
+from .compact_recording import CompactRecording, convert_compact_recording
+from .controllers import Controller, NoisyTrackingController, RandomController, ReplayController, TrackingController
+from .distributed_evaluator import DistributedEvaluator, dataset_hash, run_worker
+from .element_states import ElementStates, load_element_states
+from .event_index import EventIndex
+from .fitness_cache import FitnessCache
+from .game import COMMANDS, Game
+from .island_model import IslandModel
+from .log_cache import latest_log, load_cached_log
+from .log_farm import run_farm, select_shards
+from .lru_cache import LRUCache
+from .mapped_recording import MappedRecording
+from .parallel_evaluator import ParallelEvaluator
+from .population_evaluator import PopulationEvaluator
+from .streaming_log import StreamingLogWriter, convert_streaming_log, load_streaming_log
+from .transition_statistics import TransitionStatistics
 from .utils import ID_creator, format_time
\ No newline at end of file
@@ -0,0 +1,75 @@
+import os
+import concurrent.futures
+
+from .classes import Element, Event, EventType, Individual
+from .parallel_evaluator import _evaluate_genomes, _init_worker
+from .transition_statistics import TransitionStatistics
+
+"""
+async_evaluator.py
+
+Evaluation of single individuals in the background, for pipelines where the offspring are produced while the previous
+ones are still being scored (see EvolutionaryAlgorithm.run_async).
+
+Executors:
+- process  a pool of worker processes, initialized once as the ones of ParallelEvaluator: the genome encoding is sent, the fitness comes back
+- thread   a pool of threads sharing the TransitionStatistics, every individual is scored in place (compute_fitness_5,
+           only what its mutation touched is recomputed). Useful with kernels that release the GIL.
+
+Functions:
+- __init__(self, element_pool: list[Element], event_pool: list[EventType], events_per_frame: list[list[Event]], statistics: TransitionStatistics, workers= None, executor= 'process')
+  Start the pool of workers (as many as the cores if None).
+
+- submit(self, individual: Individual) -> concurrent.futures.Future
+  Start the evaluation of the individual, the future gives its fitness (it is not set on the individual by process workers).
+
+- close(self) -> None
+  Stop the workers, the pending evaluations are cancelled.
+
+Dependencies:
+-
+"""
+
+EXECUTORS = ('process', 'thread')
+
+def _evaluate_genome(genome: tuple) -> int:
+    return _evaluate_genomes([genome])[0]
+
+
+class AsyncEvaluator:
+
+    def __init__(self, element_pool: list[Element], event_pool: list[EventType], events_per_frame: list[list[Event]], statistics: TransitionStatistics, workers= None, executor= 'process'):
+
+        if executor not in EXECUTORS: raise Exception(f'AsyncEvaluator.__init__ error: unknown executor {executor}, expected one of {EXECUTORS}')
+        if workers is None: workers = os.cpu_count() or 1
+
+        self._events_per_frame = events_per_frame
+        self._statistics = statistics
+        self._workers = workers
+        self._executor_type = executor
+
+        if executor == 'process': self._executor = concurrent.futures.ProcessPoolExecutor(workers, initializer= _init_worker, initargs= (element_pool, event_pool, events_per_frame))
+        else: self._executor = concurrent.futures.ThreadPoolExecutor(workers, thread_name_prefix= 'AsyncEvaluator')
+
+    @property
+    def workers(self) -> int:
+        return self._workers
+
+    @property
+    def executor(self) -> str:
+        return self._executor_type
+
+    def __repr__(self):
+        return f'AsyncEvaluator({self._workers} {self._executor_type} workers)'
+
+    def _evaluate(self, individual: Individual) -> int:
+        individual.compute_fitness(self._events_per_frame, statistics= self._statistics)
+        return individual.fitness
+
+    def submit(self, individual: Individual) -> concurrent.futures.Future:
+
+        if self._executor_type == 'thread': return self._executor.submit(self._evaluate, individual)
+        return self._executor.submit(_evaluate_genome, individual.to_genome())
+
+    def close(self) -> None:
+        self._executor.shutdown(wait= True, cancel_futures= True)
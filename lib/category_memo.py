@@ -0,0 +1,45 @@
+from .classes import Category
+from .lru_cache import LRUCache
+
+"""
+category_memo.py
+
+Functions:
+- __init__(self, max_size= 10000)
+  Create an empty memo of category scans, that keeps at most max_size entries evicting the least recently used.
+  A memo is bound to one log: it must be shared only by individuals evaluated on the same events.
+
+- key(cat: Category) -> tuple[frozenset[int], frozenset[tuple[int, int]]]
+  What the scan of a category depends on: the ids of the elements across its objects and its (trigger, effect) rules.
+  Categories of different individuals (or with different ids) with the same content have the same key.
+
+- get(self, key) -> tuple | None
+  Return the scan stored for the key (and mark it as recently used), None if not present. Updates hits and misses.
+
+- put(self, key, scan) -> None
+  Store the scan of the key, evicting the least recently used entry if the memo is full.
+  The scan is the result of Individual._scan_log: per (element, trigger, effect) hits and misses, rules whose trigger fired, transitions of the log.
+
+- should_be_rule -> set[tuple[int, int, int]] | None
+  Transitions of the log, the same for every category, kept out of the entries so they are never evicted.
+
+- hit_rate -> float
+  Fraction of the get that found the key.
+
+The eviction and the counters are the ones of LRUCache.
+
+Dependencies:
+-
+"""
+
+class CategoryMemo(LRUCache):
+
+    def __init__(self, max_size= 10000):
+
+        super().__init__(max_size)
+
+        self.should_be_rule: set[tuple[int, int, int]] = None
+
+    @staticmethod
+    def key(cat: Category) -> tuple[frozenset[int], frozenset[tuple[int, int]]]:
+        return frozenset(cat.get_elements_id()), frozenset((rule.trigger.id, rule.effect.id) for rule in cat.rules)
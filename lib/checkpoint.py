@@ -0,0 +1,118 @@
+import os
+import json
+import zlib
+import queue
+import threading
+
+"""
+checkpoint.py
+
+Checkpoints of the evolution (see EvolutionaryAlgorithm.run and EvolutionaryAlgorithm.resume_from): a zlib compressed json
+with CHECKPOINT_VERSION, the generation, the run configuration, old_best, the population (genome encoding, fitness,
+lifespan, max lifespan of each individual) and the state of random.
+A checkpoint is written to a temporary file and renamed over the previous one, so a crash never leaves a broken checkpoint.
+
+Functions:
+- save_checkpoint(path, state: dict) -> str
+  Write the checkpoint (atomically) and return the path.
+
+- load_checkpoint(path) -> dict
+  Read a checkpoint, genomes and random state are tuples again.
+
+- CheckpointWriter.__init__(self, path)
+  Writer of the checkpoints of a run on a background thread, so that the generations never wait for the disk.
+
+- CheckpointWriter.write(self, state: dict) -> None
+  Queue the state to be written (the older ones not yet written are skipped, only the last one matters).
+
+- CheckpointWriter.close(self) -> None
+  Write the last queued state and stop the thread.
+
+Dependencies:
+-
+"""
+
+CHECKPOINT_VERSION = 1
+
+def _to_tuple(value):
+    if isinstance(value, list): return tuple(_to_tuple(v) for v in value)
+    return value
+
+def save_checkpoint(path, state: dict) -> str:
+
+    data = zlib.compress(json.dumps({'version': CHECKPOINT_VERSION, **state}, separators= (',', ':')).encode())
+
+    tmp_path = f'{path}.tmp'
+    with open(tmp_path, 'wb') as checkpoint_file:
+        checkpoint_file.write(data)
+        checkpoint_file.flush()
+        os.fsync(checkpoint_file.fileno())
+    os.replace(tmp_path, path)
+
+    return path
+
+def load_checkpoint(path) -> dict:
+
+    with open(path, 'rb') as checkpoint_file:
+        state = json.loads(zlib.decompress(checkpoint_file.read()))
+
+    if state['version'] != CHECKPOINT_VERSION: raise Exception(f'load_checkpoint error: unsupported checkpoint version {state["version"]}')
+
+    for individual in state['population']: individual['genome'] = _to_tuple(individual['genome'])
+    state['random_state'] = _to_tuple(state['random_state'])
+
+    return state
+
+
+class CheckpointWriter:
+
+    def __init__(self, path):
+
+        self._path = path
+        self._error = None
+        self._written = 0
+
+        self._queue = queue.Queue()
+        self._thread = threading.Thread(target= self._write_loop, name= 'CheckpointWriter', daemon= True)
+        self._thread.start()
+
+    @property
+    def path(self) -> str:
+        return self._path
+
+    @property
+    def written(self) -> int:
+        return self._written
+
+    def write(self, state: dict) -> None:
+
+        if self._error is not None: raise Exception(f'CheckpointWriter.write error: {self._error}')
+        self._queue.put(state)
+
+    def close(self) -> None:
+
+        self._queue.put(None)
+        self._thread.join()
+
+        if self._error is not None: raise Exception(f'CheckpointWriter.close error: {self._error}')
+
+    def _write_loop(self):
+
+        while True:
+            state = self._queue.get()
+
+            # only the most recent state is written
+            stop = state is None
+            while not self._queue.empty():
+                newer = self._queue.get()
+                if newer is None: stop = True
+                else: state = newer
+
+            if state is not None and self._error is None:
+                try:
+                    save_checkpoint(self._path, state)
+                    self._written += 1
+                except Exception as e:
+                    self._error = e
+
+            if stop: break
@@ -28,7 +28,11 @@ Functions:
 - remove_rule(self, rule) -> None
   remove a rule from the category, if it's present.
 
+- get_elements_mask(self) -> int
+  Bitmask of the ids of the elements covered by the category (union of the masks of its objects).
+
 - get_elements_id(self) -> list[int]
+  Ids of the elements covered by the category, sorted, read from get_elements_mask.
 
 - mutate(self, object_pool: list[Element], rule_pool: list[Event]) -> None
   Mutate the category:
@@ -44,10 +48,12 @@ Functions:
   Create a new Category, moving one object to it.
 
 - __eq__(self, other)
-  Compare with:
-    - self.__class__
-    - int (id == other)
-    - tuple (objects == other[0] and rules == other[1])
+  Equal to a Category with the same id, any other type is not equal.
+  Comparing with an int or an (objects, rules) tuple (allowed before) raises a TypeError: compare cat.id with the int,
+  (cat.objects, cat.rules) with the tuple.
+
+- __hash__(self)
+  Same hash of the id (objects and rules can change, the id can't).
 
 Dependencies:
 -
@@ -56,6 +62,8 @@ Dependencies:
 
 class Category:
 
+    __slots__ = ('_id', '_objects', '_rules')
+
     def __init__(self, id, objects: list[Object] = None, rules: list[Rule] = None):
 
         self._id = id
@@ -94,19 +102,21 @@ class Category:
 
     def __eq__(self, other):
 
-        if isinstance(other, self.__class__): return self._id == other.id
-        if isinstance(other, int): return self._id == other
-        if isinstance(other, tuple): return (self._objects == other[0]) and (self._rules == other[1])
+        if type(other) is Category: return self._id == other._id
+        if isinstance(other, (int, tuple)): raise TypeError(f'Category.__eq__ error: comparing category {self._id} with {other!r}, compare cat.id or (cat.objects, cat.rules)')
 
-        print(f'{type(other)}')
-        raise Exception('Category.__eq__ error')
+        return NotImplemented
+
+    def __hash__(self):
+        return hash(self._id)
 
     def initialize(self, object_pool: list[Object], rule_pool: list[Event], category_pool: list['Category'] = []) -> 'Category':
 
+        used = {(tuple(cat.objects), tuple(cat.rules)) for cat in category_pool}
         if rule_pool:
-            self._objects, self._rules = random.choice([([o], [r]) for o, r in itertools.product(object_pool, rule_pool) if ([o], [r]) not in category_pool])
+            self._objects, self._rules = random.choice([([o], [r]) for o, r in itertools.product(object_pool, rule_pool) if ((o,), (r,)) not in used])
         else:
-            self._objects, self._rules = random.choice([([o], []) for o in object_pool if ([o], []) not in category_pool])
+            self._objects, self._rules = random.choice([([o], []) for o in object_pool if ((o,), ()) not in used])
         return self
     
     def add_object(self, obj) -> None:
@@ -123,12 +133,19 @@ class Category:
     def remove_rule(self, rule) -> None:
         if rule in self._rules: self._rules.remove(rule)
 
-    def get_elements_id(self):
+    def get_elements_mask(self) -> int:
+        mask = 0
+        for obj in self._objects: mask |= obj.mask
+        return mask
+
+    def get_elements_id(self) -> list[int]:
         elements_id = []
-        for obj in self._objects:
-            for elem in obj.elements:
-                elements_id.append(elem.id)
-        return list(set(elements_id))
+        mask = self.get_elements_mask()
+        while mask:
+            low_bit = mask & -mask
+            elements_id.append(low_bit.bit_length() - 1)
+            mask ^= low_bit
+        return elements_id
 
     def mutate(self, object_pool: list[Element], rule_pool: list[Event]) -> None:
 
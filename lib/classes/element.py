@@ -1,28 +1,59 @@
+import weakref
+
 """
 element.py
 
 Functions:
-- __init__(self, id, description, properties)
+- __new__(cls, id, description, properties)
   Create an Element, with attributes that are not gonna change.
+  Elements are interned: creating again an element with the same id and description returns the existing instance
+  (also when unpickled), so equal elements are usually the same object and membership tests hit on identity.
+  Creating it again with different properties is an error.
+  The registry holds the elements weakly: an element no longer referenced anywhere is dropped from it.
+
+- has_description(self, description) -> bool
+  Compare the description (e.g. elem.has_description('ball')).
 
 - __eq__(self, other)
-  Compare with:
-    - self.__class__
-    - int (id == other)
-    - str (description == other)
+  Equal to an Element with the same id, any other type is not equal.
+  Comparing with an int or a str (allowed before the elements were interned) raises a TypeError: compare elem.id with the int,
+  use has_description for the str.
+
+- __hash__(self)
+  Hash of the id.
+
+- __index__(self)
+  The id, to use the element directly as an array index.
 
 Dependencies:
 -
 """
 
 class Element:
-    
-    def __init__(self, id, description, properties):
-        
+
+    __slots__ = ('_id', '_description', '_properties', '__weakref__')
+
+    _registry: 'weakref.WeakValueDictionary[tuple[int, str], Element]' = weakref.WeakValueDictionary()
+
+    def __new__(cls, id, description, properties):
+
+        key = (id, description)
+        existing = cls._registry.get(key)
+        if existing is not None:
+            if existing._properties != properties: raise Exception(f'Element.__new__ error: element {id} ({description}) already exists with properties {existing._properties}')
+            return existing
+
+        self = super().__new__(cls)
         self._id = id
         self._description = description
         self._properties = properties
 
+        cls._registry[key] = self
+        return self
+
+    def __reduce__(self):
+        return (Element, (self._id, self._description, self._properties))
+
     @property
     def id(self) -> int: return self._id
 
@@ -34,13 +65,20 @@ class Element:
 
     def __repr__(self):
         return self._description
-    
+
+    def has_description(self, description) -> bool:
+        return self._description == description
+
     def __eq__(self, other):
 
-        if isinstance(other, self.__class__): return self._id == other.id
-        if isinstance(other, int): return self._id == other
-        if isinstance(other, str): return self._description == other
+        if self is other: return True
+        if type(other) is Element: return self._id == other._id
+        if isinstance(other, (int, str)): raise TypeError(f'Element.__eq__ error: comparing {self._description} with {other!r}, compare elem.id or use elem.has_description')
+
+        return NotImplemented
 
-        print(f'{type(other)}')
-        raise Exception('Element.__eq__ error')
+    def __hash__(self):
+        return hash(self._id)
 
+    def __index__(self):
+        return self._id
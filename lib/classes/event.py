@@ -8,12 +8,16 @@ Functions:
 - __init__(self, event_type: EventType, subject: Element)
   Create an Event, with attributes that are not gonna change.
 
+- key -> tuple[int, int]
+  (event_type id, subject id), to look up events by their ids (e.g. in a set of keys).
+
 - __eq__(self, other)
-  Compare with:
-    - self.__class__
-    - EventType (trigger == other)
-    - tuple (trigger == other[0] and subject == other[1])
-    - Element (subject == other)
+  Equal to an Event with the same event type and subject, any other type is not equal.
+  Comparing with an EventType, an Element or a tuple (allowed before) raises a TypeError: compare event.event_type, event.subject
+  or event.key.
+
+- __hash__(self)
+  Hash of the (event_type, subject) pair.
 
 Dependencies:
 -
@@ -21,6 +25,8 @@ Dependencies:
 
 class Event:
 
+    __slots__ = ('_event_type', '_subject')
+
     def __init__(self, event_type: EventType, subject: Element):
         
         self._event_type = event_type
@@ -32,17 +38,20 @@ class Event:
     @property
     def subject(self): return self._subject
 
+    @property
+    def key(self) -> tuple[int, int]: return self._event_type.id, self._subject.id
+
     def __repr__(self):
         return str(self._event_type) + ' on ' + str(self._subject)
     
     def __eq__(self, other):
 
-        if isinstance(other, self.__class__): return (self._event_type == other.event_type) and (self._subject == other.subject)
-        if isinstance(other, EventType): return self._event_type == other.event_type
-        if isinstance(other, tuple): return self._event_type == other[0] and self._subject == other[1]
-        if isinstance(other, Element): return self._subject == other
-        
-        print(f'{type(other)}')
-        raise Exception('Event.__eq__ error')
+        if type(other) is Event: return (self._event_type == other._event_type) and (self._subject == other._subject)
+        if isinstance(other, (EventType, Element, tuple)): raise TypeError(f'Event.__eq__ error: comparing {self} with {other!r}, compare event.event_type, event.subject or event.key')
+
+        return NotImplemented
+
+    def __hash__(self):
+        return hash((self._event_type, self._subject))
     
     
@@ -1,28 +1,54 @@
+import weakref
+
 """
 event_type.py
 
 Functions:
-- __init__(self, id, description)
+- __new__(cls, id, description)
   Create an EventType, with attributes that are not gonna change.
+  Event types are interned like elements: the same id and description always give the same instance.
+  The registry holds them weakly, like the one of the elements.
+
+- has_description(self, description) -> bool
+  Compare the description (e.g. event_type.has_description('collision')).
 
 - __eq__(self, other)
-  Compare with:
-    - self.__class__
-    - int (id == other)
-    - str (description == other)
-    - Event (self == other.event_type)
+  Equal to an EventType with the same id, any other type is not equal.
+  Comparing with an int, a str or an Event (allowed before the event types were interned) raises a TypeError: compare event_type.id
+  with the int, use has_description for the str, event.event_type for the Event.
+
+- __hash__(self)
+  Hash of the id.
+
+- __index__(self)
+  The id, to use the event type directly as an array index.
 
 Dependencies:
 -
 """
 
 class EventType:
-    
-    def __init__(self, id, description):
 
+    __slots__ = ('_id', '_description', '__weakref__')
+
+    _registry: 'weakref.WeakValueDictionary[tuple[int, str], EventType]' = weakref.WeakValueDictionary()
+
+    def __new__(cls, id, description):
+
+        key = (id, description)
+        existing = cls._registry.get(key)
+        if existing is not None: return existing
+
+        self = super().__new__(cls)
         self._id = id
         self._description = description
 
+        cls._registry[key] = self
+        return self
+
+    def __reduce__(self):
+        return (EventType, (self._id, self._description))
+
     @property
     def id(self) -> int: return self._id
 
@@ -31,16 +57,22 @@ class EventType:
 
     def __repr__(self):
         return self._description
-    
+
+    def has_description(self, description) -> bool:
+        return self._description == description
+
     def __eq__(self, other):
-        
+
+        if self is other: return True
+        if type(other) is EventType: return self._id == other._id
+
         from .event import Event # here to prevent circular imports
-        
-        if isinstance(other, self.__class__): return self._id == other.id
-        if isinstance(other, int): return self._id == other
-        if isinstance(other, str): return self._description == other
-        if isinstance(other, Event): return self == other.event_type
+        if isinstance(other, (int, str, Event)): raise TypeError(f'EventType.__eq__ error: comparing {self._description} with {other!r}, compare event_type.id, use event_type.has_description or event.event_type')
+
+        return NotImplemented
 
-        print(f'{type(other)}')
-        raise Exception('EventType.__eq__ error')
+    def __hash__(self):
+        return hash(self._id)
 
+    def __index__(self):
+        return self._id
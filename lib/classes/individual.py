@@ -3,6 +3,7 @@ import random
 from .category import Category
 from .element import Element
 from .event import Event
+from .event_type import EventType
 from .object import Object
 from .rule import Rule
 from ..utils import ID_creator
@@ -11,8 +12,27 @@ from ..utils import ID_creator
 individual.py
 
 Functions:
-- __init__(self, element_pool: list[Element], event_pool: list[Event], original: 'Individual' = None)
+- __init__(self, element_pool: list[Element], event_pool: list[Event], original: 'Individual' = None, lifespan= 1, copy_on_write= False)
   Create an empty Individual (ready to be initialized) or create a deep copy of the original, recreating objects, rules and categories from scratch.
+  With copy_on_write the copy shares objects, rules and categories with the original instead: both mark them as shared and
+  copy an object or a category only before changing it (see _own_object, _own_category). Rules are never changed, they stay shared.
+
+- to_genome(self) -> tuple
+  Compact encoding of the genome with ids only (picklable, to send the individual to other processes):
+  ((obj_id, rule_id, cat_id) current ids, ((obj_id, elem ids), ...), ((rule_id, trigger id, effect id), ...), ((cat_id, obj ids, rule ids), ...))
+
+- from_genome(element_pool: list[Element], event_pool: list[EventType], genome: tuple, lifespan= 1) -> 'Individual'
+  Recreate an individual from its genome encoding.
+
+- set_lifespan(self, lifespan) -> None
+  Set the remaining lifespan (e.g. restoring a checkpoint), lifespan and max_lifespan are also readable as properties.
+
+- fingerprint(self) -> tuple
+  Canonical description of the genome, independent from the ids of objects, rules and categories.
+  Two individuals with the same fingerprint have the same fitness (it is used as key of the FitnessCache).
+
+- gen_obj_id(self) -> int, gen_rule_id(self) -> int, gen_cat_id(self) -> int
+  Next id of a new object, rule or category, from the ID_creator counters of the individual (read by to_genome).
 
 - get_current_ids(self) -> tuple[int, int, int]
   Support function for the deepcopy in __init__, it ensure that the ids in the new category will be unique and scorrelated from the original.
@@ -43,8 +63,22 @@ Functions:
 - predict_all(self, events_per_frame: list[list[Event]]) -> list[list[Event]]
   Predict the effects for all frames.
 
-- compute_fitness(self, events_per_frame: list[list[Event]], log= False) -> None
+- set_fitness(self, fitness) -> None
+  Set the fitness computed outside of the individual (e.g. by the PopulationEvaluator).
+
+- compute_fitness(self, events_per_frame: list[list[Event]], log= False, statistics= None, event_index= None, memo= None) -> None
   compute and updates fitness (see below for comments on penalties and bonuses), if evaluation wasn't already done.
+  If the statistics of the log are passed (and no log is requested) the fitness is computed from them (see compute_fitness_5).
+
+- compute_fitness_4(self, events_per_frame: list[list[Event]], log= False, event_index= None, memo= None) -> None
+  Compute the fitness scanning the log. If the event_index of the log is passed, the next frame membership tests are set lookups in it.
+  The log is scanned once per category (see _scan_log); if a CategoryMemo is passed, the scan of a category with the same elements
+  and (trigger, effect) rules of one already seen (in any individual) is taken from the memo instead.
+
+- compute_fitness_5(self, statistics) -> None
+  Same score as compute_fitness_4, but computed with lookups in the precomputed transition statistics instead of scanning the log.
+  The score is kept split in per-element, per-object, per-category and per-rule contributions (elements_correctness, objects_correctness,
+  categories_correctness, rule_usage), each mutation marks the parts of the genome it touched and only their contributions are recomputed.
 
 Dependencies:
 -
@@ -52,36 +86,63 @@ Dependencies:
 
 class Individual:
 
-    def __init__(self, element_pool: list[Element], event_pool: list[Event], original: 'Individual' = None, lifespan= 1):
+    def __init__(self, element_pool: list[Element], event_pool: list[Event], original: 'Individual' = None, lifespan= 1, copy_on_write= False):
         
         self._element_pool = element_pool
         self._event_pool = event_pool
 
         if original is None:
 
-            self.gen_obj_id: Callable[[], int] = ID_creator().get_id
-            self.gen_rule_id: Callable[[], int] = ID_creator().get_id
-            self.gen_cat_id: Callable[[], int] = ID_creator().get_id
+            self._obj_ids = ID_creator()
+            self._rule_ids = ID_creator()
+            self._cat_ids = ID_creator()
 
             self._objects: list[Object] = []
             self._rules: list[Rule] = []
             self._categories: list[Category] = []
 
+            self._shared_objects: set[int] = set()
+            self._shared_categories: set[int] = set()
+
         else:
 
             current_obj_id, current_rule_id, current_cat_id = original.get_current_ids()
-            self.gen_obj_id = ID_creator(current_obj_id).get_id
-            self.gen_rule_id = ID_creator(current_rule_id).get_id
-            self.gen_cat_id = ID_creator(current_cat_id).get_id
+            self._obj_ids = ID_creator(current_obj_id)
+            self._rule_ids = ID_creator(current_rule_id)
+            self._cat_ids = ID_creator(current_cat_id)
 
-            self._objects = [Object(obj.id, obj.elements) for obj in original.objects]
-            self._rules = [Rule(rule.id, rule.trigger, rule.effect) for rule in original.rules]
-            self._categories = [Category(cat.id, [obj for obj in self._objects if obj.id in cat.objects], [rule for rule in self._rules if rule.id in cat.rules]) for cat in original.categories]
+            if copy_on_write:
+
+                self._objects = list(original.objects)
+                self._rules = list(original.rules)
+                self._categories = list(original.categories)
+
+                self._shared_objects = {obj.id for obj in self._objects}
+                self._shared_categories = {cat.id for cat in self._categories}
+                original._shared_objects.update(self._shared_objects)
+                original._shared_categories.update(self._shared_categories)
+
+            else:
+
+                self._objects = [Object(obj.id, obj.elements) for obj in original.objects]
+                self._rules = [Rule(rule.id, rule.trigger, rule.effect) for rule in original.rules]
+                self._categories = []
+                for cat in original.categories:
+                    obj_ids, rule_ids = {obj.id for obj in cat.objects}, {rule.id for rule in cat.rules}
+                    self._categories.append(Category(cat.id, [obj for obj in self._objects if obj.id in obj_ids], [rule for rule in self._rules if rule.id in rule_ids]))
+
+                self._shared_objects = set()
+                self._shared_categories = set()
 
         self._fitness = 0
+        self._evaluated = False
         self._max_lifespan = lifespan
         self._lifespan = lifespan
 
+        # fitness breakdown, kept to update the fitness after a mutation recomputing only what it touched (see compute_fitness_5)
+        if original is None or original._elements_correctness is None: self._reset_correctness()
+        else: self._copy_correctness(original)
+
     @property
     def element_pool(self) -> list[Element]:
         return self._element_pool
@@ -106,6 +167,21 @@ class Individual:
     def fitness(self):
         return self._fitness
 
+    @property
+    def evaluated(self) -> bool:
+        return self._evaluated
+
+    @property
+    def lifespan(self) -> int:
+        return self._lifespan
+
+    @property
+    def max_lifespan(self) -> int:
+        return self._max_lifespan
+
+    def set_lifespan(self, lifespan) -> None:
+        self._lifespan = lifespan
+
     def reset_lifespan(self) -> int:
         self._lifespan = self._max_lifespan
         return self._lifespan
@@ -129,6 +205,74 @@ class Individual:
             out += f'{cat}\n'
         return out
     
+    def to_genome(self) -> tuple:
+
+        current_ids = (self._obj_ids.id, self._rule_ids.id, self._cat_ids.id)
+        objects = tuple((obj.id, tuple(elem.id for elem in obj.elements)) for obj in self._objects)
+        rules = tuple((rule.id, rule.trigger.id, rule.effect.id) for rule in self._rules)
+        categories = tuple((cat.id, tuple(obj.id for obj in cat.objects), tuple(rule.id for rule in cat.rules)) for cat in self._categories)
+
+        return current_ids, objects, rules, categories
+
+    @staticmethod
+    def from_genome(element_pool: list[Element], event_pool: list[EventType], genome: tuple, lifespan= 1) -> 'Individual':
+
+        current_ids, objects, rules, categories = genome
+
+        elements = {elem.id: elem for elem in element_pool}
+        event_types = {event_type.id: event_type for event_type in event_pool}
+
+        individual = Individual(element_pool, event_pool, lifespan= lifespan)
+        individual._obj_ids = ID_creator(current_ids[0])
+        individual._rule_ids = ID_creator(current_ids[1])
+        individual._cat_ids = ID_creator(current_ids[2])
+
+        objs = {obj_id: Object(obj_id, [elements[elem_id] for elem_id in elem_ids]) for obj_id, elem_ids in objects}
+        rls = {rule_id: Rule(rule_id, event_types[trigger_id], event_types[effect_id]) for rule_id, trigger_id, effect_id in rules}
+        cats = [Category(cat_id, [objs[obj_id] for obj_id in obj_ids], [rls[rule_id] for rule_id in rule_ids]) for cat_id, obj_ids, rule_ids in categories]
+
+        return individual.set_all(list(objs.values()), list(rls.values()), cats)
+
+    def fingerprint(self) -> tuple:
+
+        # sorted tuples of ints, hashable and not tracked by the garbage collector once cached
+
+        rules = tuple(sorted([(rule.trigger.id, rule.effect.id) for rule in self._rules]))
+
+        obj_elements = {obj.id: tuple(sorted([elem.id for elem in obj.elements])) for obj in self._objects}
+
+        # a category is described by its rules and by the elements of its objects
+        cat_signatures = {}
+        for cat in self._categories:
+            cat_objects = {}
+            for obj in cat.objects: cat_objects[obj_elements[obj.id]] = cat_objects.get(obj_elements[obj.id], 0) + 1
+            cat_signatures[cat.id] = (tuple(sorted([(rule.trigger.id, rule.effect.id) for rule in cat.rules])), tuple(sorted(cat_objects.items())))
+
+        categories = {}
+        for signature in cat_signatures.values(): categories[signature] = categories.get(signature, 0) + 1
+
+        # an object is described by its elements and by the categories it belongs to
+        obj_cats = {obj.id: {} for obj in self._objects}
+        for cat in self._categories:
+            for obj in cat.objects:
+                obj_cats[obj.id][cat_signatures[cat.id]] = obj_cats[obj.id].get(cat_signatures[cat.id], 0) + 1
+
+        objects = {}
+        for obj in self._objects:
+            signature = (obj_elements[obj.id], tuple(sorted(obj_cats[obj.id].items())))
+            objects[signature] = objects.get(signature, 0) + 1
+
+        return rules, tuple(sorted(categories.items())), tuple(sorted(objects.items()))
+
+    def gen_obj_id(self) -> int:
+        return self._obj_ids.get_id()
+
+    def gen_rule_id(self) -> int:
+        return self._rule_ids.get_id()
+
+    def gen_cat_id(self) -> int:
+        return self._cat_ids.get_id()
+
     def get_current_ids(self) -> tuple[int, int, int]:
         return self.gen_obj_id(), self.gen_rule_id(), self.gen_cat_id()
 
@@ -149,7 +293,82 @@ class Individual:
         self._objects = objects
         self._rules = rules
         self._categories = categories
+        self._shared_objects = set()
+        self._shared_categories = set()
+        self._reset_correctness()
         return self
+
+    def _own_object(self, obj: Object) -> Object:
+        # to be called before changing the elements of the object: a shared object is replaced by a private copy, also in the categories
+        if obj.id not in self._shared_objects: return obj
+        own_obj = Object(obj.id, obj.elements)
+        self._objects[self._objects.index(obj)] = own_obj
+        self._shared_objects.discard(obj.id)
+        for cat in self._categories:
+            if obj in cat.objects:
+                cat = self._own_category(cat)
+                cat.objects[cat.objects.index(obj)] = own_obj
+        return own_obj
+
+    def _own_category(self, cat: Category) -> Category:
+        # to be called before changing the objects or the rules of the category: a shared category is replaced by a private copy
+        if cat.id not in self._shared_categories: return cat
+        own_cat = Category(cat.id, cat.objects, cat.rules)
+        self._categories[self._categories.index(cat)] = own_cat
+        self._shared_categories.discard(cat.id)
+        return own_cat
+
+    def _reset_correctness(self) -> None:
+
+        self._correctness_statistics = None
+        self._elements_correctness = None
+        self._objects_correctness = None
+        self._categories_correctness = None
+        self._rules_correctness = None
+        self._categories_usage = None
+        self._rule_usage = None
+        self._rule_usage_found = 0
+
+        self._touched_elements = set()
+        self._touched_objects = set()
+        self._touched_categories = set()
+        self._touched_rules = set()
+        self._changed_objects = set()
+        self._changed_categories = set()
+
+    def _copy_correctness(self, original: 'Individual') -> None:
+
+        self._correctness_statistics = original._correctness_statistics
+        self._elements_correctness = dict(original._elements_correctness)
+        self._objects_correctness = dict(original._objects_correctness)
+        self._categories_correctness = dict(original._categories_correctness)
+        self._rules_correctness = dict(original._rules_correctness)
+        self._categories_usage = dict(original._categories_usage)
+        self._rule_usage = dict(original._rule_usage)
+        self._rule_usage_found = original._rule_usage_found
+
+        self._touched_elements = set(original._touched_elements)
+        self._touched_objects = set(original._touched_objects)
+        self._touched_categories = set(original._touched_categories)
+        self._touched_rules = set(original._touched_rules)
+        self._changed_objects = set(original._changed_objects)
+        self._changed_categories = set(original._changed_categories)
+
+    @property
+    def elements_correctness(self) -> dict[int, int]:
+        return self._elements_correctness
+
+    @property
+    def objects_correctness(self) -> dict[int, int]:
+        return self._objects_correctness
+
+    @property
+    def categories_correctness(self) -> dict[int, int]:
+        return self._categories_correctness
+
+    @property
+    def rule_usage(self) -> dict[tuple[int, int, int], int]:
+        return self._rule_usage
     
     def mutate(self) -> 'Individual':
 
@@ -197,13 +416,18 @@ class Individual:
                 new_obj = Object(self.gen_obj_id()).initialize(self._element_pool, self._objects)
                 self._objects.append(new_obj)
                 for cat in random.sample(self._categories, 1):
+                    cat = self._own_category(cat)
+                    self._touch_category(cat)
                     cat.add_object(new_obj)
+                self._touch_object(new_obj)
 
             case 'create_rule':
                 #print('create_rule')
                 new_rule = Rule(self.gen_rule_id()).initialize(self._event_pool, self._rules)
                 self._rules.append(new_rule)
                 for cat in random.sample(self._categories, 1): # more than one ?
+                    cat = self._own_category(cat)
+                    self._touch_category(cat)
                     cat.add_rule(new_rule)
 
             case 'create_cat':
@@ -216,50 +440,75 @@ class Individual:
                     else:
                         new_obj = Object(self.gen_obj_id()).initialize(self._element_pool, self._objects)
                         self._objects.append(new_obj)
+                        self._touch_object(new_obj)
                     if (random.random() > 0.5 and self._rules) or (len(self._rules) >= lene2):
                         new_rule = random.choice(self._rules)
                     else:
                         new_rule = Rule(self.gen_rule_id()).initialize(self._event_pool, self._rules)
                         self._rules.append(new_rule)
                     self._categories.append(Category(self.gen_cat_id(), [new_obj], [new_rule]))
+                self._touch_category(self._categories[-1])
 
             case 'delete_obj':
                 #print('delete_obj')
                 obj_to_delete = random.choice(self._objects)
+                self._touch_object(obj_to_delete)
                 self._objects.remove(obj_to_delete)
                 cat_to_remove = []
-                for cat in self._categories:
+                for cat in list(self._categories):
+                    if obj_to_delete in cat.objects:
+                        cat = self._own_category(cat)
+                        self._touch_category(cat)
                     cat.remove_object(obj_to_delete)
                     if not cat.objects: cat_to_remove.append(cat)
                 for cat in cat_to_remove: self._categories.remove(cat)
-                if not self._categories: self._categories.append(Category(self.gen_cat_id()).initialize(self._objects, self._rules, self._categories))
+                if not self._categories:
+                    self._categories.append(Category(self.gen_cat_id()).initialize(self._objects, self._rules, self._categories))
+                    self._touch_category(self._categories[-1])
 
             case 'delete_rule':
                 #print('delete_rule')
                 rule_to_delete = random.choice(self._rules)
+                self._touched_rules.add(rule_to_delete.id)
                 self._rules.remove(rule_to_delete)
-                for cat in self._categories:
+                for cat in list(self._categories):
+                    if rule_to_delete in cat.rules:
+                        cat = self._own_category(cat)
+                        self._touch_category(cat)
                     cat.remove_rule(rule_to_delete)
 
             case 'delete_cat':
                 #print('delete_cat')
-                self._categories.remove(random.choice(self._categories))
+                cat_to_delete = random.choice(self._categories)
+                self._touch_category(cat_to_delete)
+                self._categories.remove(cat_to_delete)
 
             case 'fuse_obj':
                 #print('fuse_obj')
                 objs_to_fuse = random.sample(self._objects, 2)
+                objs_to_fuse[0] = self._own_object(objs_to_fuse[0])
+                self._touch_object(objs_to_fuse[0])
+                self._touch_object(objs_to_fuse[1])
                 self._objects.remove(objs_to_fuse[1])
                 cat_to_remove = []
-                for cat in self._categories:
+                for cat in list(self._categories):
+                    if objs_to_fuse[1] in cat.objects:
+                        cat = self._own_category(cat)
+                        self._touch_category(cat)
                     cat.remove_object(objs_to_fuse[1])
                     if not cat.objects: cat_to_remove.append(cat)
                 for cat in cat_to_remove: self._categories.remove(cat)
                 objs_to_fuse[0].fuse(objs_to_fuse[1])
-                if not self._categories: self._categories.append(Category(self.gen_cat_id()).initialize(self._objects, self._rules, self._categories))
+                if not self._categories:
+                    self._categories.append(Category(self.gen_cat_id()).initialize(self._objects, self._rules, self._categories))
+                    self._touch_category(self._categories[-1])
 
             case 'fuse_cat':
                 #print('fuse_cat')
                 cats_to_fuse = random.sample(self._categories, 2)
+                cats_to_fuse[0] = self._own_category(cats_to_fuse[0])
+                self._touch_category(cats_to_fuse[0])
+                self._touch_category(cats_to_fuse[1])
                 self._categories.remove(cats_to_fuse[1])
                 cats_to_fuse[0].fuse(cats_to_fuse[1])
 
@@ -267,6 +516,9 @@ class Individual:
                 from_obj = random.choice(ok_objs)
                 elem_to_move = random.choice(from_obj.elements)
                 to_obj = random.choice([obj for obj in self._objects if obj != from_obj])
+                from_obj, to_obj = self._own_object(from_obj), self._own_object(to_obj)
+                self._touch_object(from_obj)
+                self._touch_object(to_obj)
                 from_obj.remove_element(elem_to_move)
                 to_obj.add_element(elem_to_move)
 
@@ -274,22 +526,32 @@ class Individual:
                 from_cat = random.choice(ok_cats)
                 obj_to_move = random.choice(from_cat.objects)
                 to_cat = random.choice([cat for cat in self._categories if cat != from_cat])
+                from_cat, to_cat = self._own_category(from_cat), self._own_category(to_cat)
+                self._touch_category(from_cat)
+                self._touch_category(to_cat)
                 from_cat.remove_object(obj_to_move)
                 to_cat.add_object(obj_to_move)
 
             case 'divide_obj':
                 obj_to_mutate = random.choice(ok_objs)
                 elem_to_move = random.choice(obj_to_mutate.elements) # only one
+                obj_to_mutate = self._own_object(obj_to_mutate)
+                self._touch_object(obj_to_mutate)
                 obj_to_mutate.remove_element(elem_to_move)
                 new_obj = Object(self.gen_obj_id(), [elem_to_move])
                 self._objects.append(new_obj)
-                for cat in self._categories:
+                for cat in list(self._categories):
                     if obj_to_mutate in cat.objects:
+                        cat = self._own_category(cat)
+                        self._touch_category(cat)
                         cat.add_object(new_obj)
+                self._touch_object(new_obj)
 
             case 'divide_cat':
                 cat_to_mutate = random.choice(ok_cats)
                 obj_to_move = random.choice(cat_to_mutate.objects) # only one
+                cat_to_mutate = self._own_category(cat_to_mutate)
+                self._touch_category(cat_to_mutate)
                 cat_to_mutate.remove_object(obj_to_move)
                 if (random.random() > 0.5 and self._rules) or (len(self._rules) >= lene2):
                     new_rule = random.choice(self._rules)
@@ -297,16 +559,22 @@ class Individual:
                     new_rule = Rule(self.gen_rule_id()).initialize(self._event_pool, self._rules)
                     self._rules.append(new_rule)
                 self._categories.append(Category(self.gen_cat_id(), [obj_to_move], [new_rule]))
+                self._touch_category(self._categories[-1])
 
             case 'mutate_obj':
                 #print('mutate_obj')
-                random.choice(self._objects).mutate(self._element_pool)
+                obj_to_mutate = self._own_object(random.choice(self._objects))
+                self._touch_object(obj_to_mutate)
+                obj_to_mutate.mutate(self._element_pool)
 
             case 'mutate_cat':
                 #print('mutate_cat')
-                random.choice(self._categories).mutate(self._objects, self._rules)
+                cat_to_mutate = self._own_category(random.choice(self._categories))
+                self._touch_category(cat_to_mutate)
+                cat_to_mutate.mutate(self._objects, self._rules)
 
         self._fitness = 0
+        self._evaluated = False
         return self
     
     def predict_single_frame(self, current_events: list[Event]) -> list[Event]:
@@ -320,7 +588,7 @@ class Individual:
                 for current_event in current_events:
 
                     for cat_rule in cat.rules:
-                        if cat_rule.trigger == current_event:
+                        if cat_rule.trigger == current_event.event_type:
 
                             for cat_obj in cat.objects:
 
@@ -340,10 +608,64 @@ class Individual:
         
         return predicted_events_per_frame
     
-    def compute_fitness(self, events_per_frame: list[list[Event]], log= False) -> None:
-        if self._fitness == 0: self.compute_fitness_4(events_per_frame, log)
+    def set_fitness(self, fitness) -> None:
+        self._fitness = fitness
+        self._evaluated = True
+
+    def compute_fitness(self, events_per_frame: list[list[Event]], log= False, statistics= None, event_index= None, memo= None) -> None:
+        if not self._evaluated:
+            if statistics is not None and not log: self.compute_fitness_5(statistics)
+            else: self.compute_fitness_4(events_per_frame, log, event_index, memo)
     
-    def compute_fitness_4(self, events_per_frame: list[list[Event]], log= False) -> None:
+    def _scan_log(self, events_per_frame: list[list[Event]], elements_id: set[int], rules: set[tuple[int, int]], event_index= None) -> tuple[dict, set, set]:
+
+        # hits and misses of the (trigger, effect) rules on the elements, the rules whose trigger fired and the transitions of the log
+        counts: dict[tuple[int, int, int], tuple[int, int]] = {}
+        fired: set[tuple[int, int]] = set()
+        should_be_rule: set[tuple[int, int, int]] = set()
+
+        current_event, nfe = None, None
+
+        for frame_id in range(len(events_per_frame) - 1):
+
+            next_frame_events = events_per_frame[frame_id + 1]
+
+            if event_index is None:
+                next_frame_pairs = {nfe.key for nfe in next_frame_events}
+                next_frame_subjects = {nfe.subject for nfe in next_frame_events}
+
+            for current_event in events_per_frame[frame_id]:
+
+                if event_index is None: subject_in_next_frame = current_event.subject in next_frame_subjects
+                else: subject_in_next_frame = current_event.subject.id in event_index.subjects(frame_id + 1)
+
+                if subject_in_next_frame:
+                    for nfe in next_frame_events:
+                        if nfe.subject == current_event.subject:
+                            should_be_rule.add((current_event.event_type.id, nfe.event_type.id, current_event.subject.id))
+
+                for trigger_id, effect_id in rules:
+
+                    if current_event.event_type.id == trigger_id:
+
+                        fired.add((trigger_id, effect_id))
+
+                        if current_event.subject.id in elements_id:
+
+                            if event_index is None: effect_in_next_frame = (effect_id, current_event.subject.id) in next_frame_pairs
+                            else: effect_in_next_frame = event_index.occurs(frame_id + 1, effect_id, current_event.subject.id)
+
+                            hits, misses = counts.get((current_event.subject.id, trigger_id, effect_id), (0, 0))
+                            if effect_in_next_frame: counts[current_event.subject.id, trigger_id, effect_id] = (hits + 1, misses)
+                            else: counts[current_event.subject.id, trigger_id, effect_id] = (hits, misses + 1)
+
+        # last transition inspected, always marked by the original scan
+        if current_event is not None and nfe is not None:
+            should_be_rule.add((current_event.event_type.id, nfe.event_type.id, current_event.subject.id))
+
+        return counts, fired, should_be_rule
+
+    def compute_fitness_4(self, events_per_frame: list[list[Event]], log= False, event_index= None, memo= None) -> None:
 
         score = 0
 
@@ -354,74 +676,71 @@ class Individual:
 
         rule_usage = {(et1.id, et2.id, elem.id): [False, False] for et1 in self._event_pool for et2 in self._event_pool for elem in self._element_pool}
 
+        should_be_rule = None if memo is None else memo.should_be_rule
+
         for cat in self._categories:
 
             cat_is_correct = True
+            cat_elements_id = set(cat.get_elements_id())
 
-            for frame_id in range(len(events_per_frame) - 1):
+            if memo is None: scan = None
+            else: scan = memo.get(memo.key(cat))
 
-                next_frame_events = events_per_frame[frame_id + 1]
+            if scan is None:
+                scan = self._scan_log(events_per_frame, cat_elements_id, {(rule.trigger.id, rule.effect.id) for rule in cat.rules}, event_index)
+                if memo is not None: memo.put(memo.key(cat), scan)
 
-                for current_event in events_per_frame[frame_id]:
+            counts, fired, scan_should_be_rule = scan
+            if should_be_rule is None: should_be_rule = scan_should_be_rule
 
-                    if current_event.subject in next_frame_events:
-                        for nfe in next_frame_events:
-                            if nfe.subject == current_event.subject:
-                                rule_usage[current_event.event_type.id, nfe.event_type.id, current_event.subject.id][0] = True
+            for cat_rule in cat.rules:
 
-                    for cat_rule in cat.rules:
-                        
-                        cat_used = False
-                        cat_rule_is_correct = True
+                rule_key = (cat_rule.trigger.id, cat_rule.effect.id)
+                if rule_key not in fired: continue
 
-                        if cat_rule.trigger == current_event:
+                for cat_obj in cat.objects:
 
-                            for cat_obj in cat.objects:
+                    objects_correctness[cat_obj.id][cat_rule.id][2] = True
 
-                                cat_obj_used = False
-                                obj_is_correct = True
+                    for cat_obj_elem in cat_obj.elements:
 
-                                objects_correctness[cat_obj.id][cat_rule.id][2] = True
+                        elements_correctness[cat_obj_elem.id][cat_rule.id][2] = True
 
-                                for cat_obj_elem in cat_obj.elements:
-                                    
-                                    elements_correctness[cat_obj_elem.id][cat_rule.id][2] = True
+                        hits, misses = counts.get((cat_obj_elem.id, *rule_key), (0, 0))
+                        elements_correctness[cat_obj_elem.id][cat_rule.id][0] += hits
+                        elements_correctness[cat_obj_elem.id][cat_rule.id][1] += misses
+                        objects_correctness[cat_obj.id][cat_rule.id][0] += hits
+                        objects_correctness[cat_obj.id][cat_rule.id][1] += misses
 
-                                    if current_event.subject == cat_obj_elem:
+                for elem_id in cat_elements_id:
 
-                                        cat_obj_used, cat_used = True, True
-                                        rule_usage[cat_rule.trigger.id, cat_rule.effect.id, current_event.subject.id][1] = True
+                    hits, misses = counts.get((elem_id, *rule_key), (0, 0))
+                    categories_correctness[cat.id][cat_rule.id][0] += hits
+                    categories_correctness[cat.id][cat_rule.id][1] += misses
 
-                                        if (cat_rule.effect, current_event.subject) in next_frame_events:
-                                            elements_correctness[cat_obj_elem.id][cat_rule.id][0] += 1
-                                        else:
-                                            cat_is_correct, obj_is_correct, cat_rule_is_correct = False, False, False
-                                            elements_correctness[cat_obj_elem.id][cat_rule.id][1] += 1
+                    if hits or misses: rule_usage[rule_key[0], rule_key[1], elem_id][1] = True
+                    if misses: cat_is_correct = False
 
-                                if cat_obj_used:
-                                    pass
-                                    
-                                    if obj_is_correct:
-                                        objects_correctness[cat_obj.id][cat_rule.id][0] += 1
-                                        pass
+            if cat.rules and cat_is_correct:
+                all_correct_cats += 1
 
-                                    else:
-                                        objects_correctness[cat_obj.id][cat_rule.id][1] += 1
-                                        pass
+        if should_be_rule is None: should_be_rule = self._scan_log(events_per_frame, set(), set(), event_index)[2]
+        if memo is not None: memo.should_be_rule = should_be_rule
 
+        for key in should_be_rule:
+            rule_usage[key][0] = True
 
-                        if cat_used:
-                            if cat_rule_is_correct:
-                                categories_correctness[cat.id][cat_rule.id][0] += 1
-                                pass
-                            
-                            else:
-                                categories_correctness[cat.id][cat_rule.id][1] += 1
-                                pass
 
-            if cat.rules and cat_is_correct:
-                all_correct_cats += 1
+        cats_elements_mask = {cat.id: cat.get_elements_mask() for cat in self._categories}
 
+        # number of categories applying each rule to the object, the same for all its elements
+        obj_rules_rep = {}
+        for obj in self._objects:
+            obj_rules_rep[obj.id] = {}
+            for cat in self._categories:
+                if obj in cat.objects:
+                    for rule in cat.rules:
+                        obj_rules_rep[obj.id][rule.id] = obj_rules_rep[obj.id].get(rule.id, 0) + 1
 
         for elem in self._element_pool:
             if log: print(f'elem: {elem}')
@@ -429,18 +748,14 @@ class Individual:
             objs = []
             objs_rules = {}
             for obj in self._objects:
-                if elem in obj.elements:
+                if obj.has_element(elem):
                     objs.append(obj.id)
-                    for cat in self._categories:
-                        if obj in cat.objects:
-                            for rule in cat.rules:
-                                if (rule.id, obj.id) in objs_rules.keys(): objs_rules[rule.id, obj.id] += 1
-                                else: objs_rules[rule.id, obj.id] = 1
+                    for rule_id, rep in obj_rules_rep[obj.id].items(): objs_rules[rule_id, obj.id] = rep
 
             cats = []
             cats_rules = {}
             for cat in self._categories:
-                if elem.id in cat.get_elements_id():
+                if (cats_elements_mask[cat.id] >> elem.id) & 1:
                     cats.append(cat.id)
                     for rule in cat.rules:
                         if (rule.id, cat.id) in cats_rules.keys(): cats_rules[rule.id, cat.id] += 1
@@ -492,13 +807,14 @@ class Individual:
         for obj in self._objects:
             if log: print(f'obj_{obj.id}')
 
-            if len(obj.elements) > 1:
-                score -= len(obj.elements) - 1 # penalty for number of elements per object
-                if log: print(f'n_elems: {len(obj.elements)} -> penalty: -{len(obj.elements) - 1}')
+            n_elems = obj.mask.bit_count()
+            if n_elems > 1:
+                score -= n_elems - 1 # penalty for number of elements per object
+                if log: print(f'n_elems: {n_elems} -> penalty: -{n_elems - 1}')
 
             if len([cat.id for cat in self._categories if obj in cat.objects]) == 0:
                 score -= 1 # penalty for object not present in any category
-                if log: print(f'object not present in any categories -> penalty: -{len(obj.elements)}')
+                if log: print(f'object not present in any categories -> penalty: -{n_elems}')
             
             for rule in self._rules:
                 oc = objects_correctness[obj.id][rule.id]
@@ -552,8 +868,6 @@ class Individual:
             else:
                 if log: print(f'({rule}) in {n_cat} categories -> no penalty')
 
-        rule_usage[current_event.event_type.id, nfe.event_type.id, current_event.subject.id][0] = True
-
         for should_be_rule, is_rule in rule_usage.values():
 
             if should_be_rule and is_rule:
@@ -563,6 +877,193 @@ class Individual:
                 score -= 1
 
         self._fitness = score
+        self._evaluated = True
+
+    def compute_fitness_5(self, statistics) -> None:
+
+        if self._elements_correctness is None or self._correctness_statistics is not statistics:
+
+            self._correctness_statistics = statistics
+            self._elements_correctness: dict[int, int] = {}
+            self._objects_correctness: dict[int, int] = {}
+            self._categories_correctness: dict[int, int] = {}
+            self._rules_correctness: dict[int, int] = {}
+            self._categories_usage: dict[int, frozenset[tuple[int, int, int]]] = {}
+            self._rule_usage: dict[tuple[int, int, int], int] = {}
+            self._rule_usage_found = 0
+
+            self._touched_elements = {elem.id for elem in self._element_pool}
+            self._touched_objects = {obj.id for obj in self._objects}
+            self._touched_categories = {cat.id for cat in self._categories}
+            self._touched_rules = {rule.id for rule in self._rules}
+            self._changed_objects = set()
+            self._changed_categories = set()
+
+        self._update_correctness(statistics)
+
+        score = sum(self._elements_correctness.values())
+        score += sum(self._objects_correctness.values())
+        score += sum(self._categories_correctness.values())
+        score += sum(self._rules_correctness.values())
+
+        score -= len(self._categories) # penalty for number of categories
+        score -= len(self._rules) # penalty for number of rules
+
+        should_be_rule = len(statistics.should_be_rule)
+        is_rule = len(self._rule_usage)
+        both = self._rule_usage_found
+        score += both - (should_be_rule - both) - (is_rule - both) # bonus for rules found in the log, penalty for missing or unsupported ones
+
+        self._fitness = score
+        self._evaluated = True
+
+    def _touch_object(self, obj: Object) -> None:
+        # to be called before changing the elements of the object (or deleting it), the new elements are read at evaluation time
+        if self._elements_correctness is None: return
+        self._touched_objects.add(obj.id)
+        self._changed_objects.add(obj.id)
+        self._touched_elements.update(elem.id for elem in obj.elements)
+        self._touched_categories.update(cat.id for cat in self._categories if obj in cat.objects)
+
+    def _touch_category(self, cat: Category) -> None:
+        # to be called before changing the objects or the rules of the category (or deleting it), the new ones are read at evaluation time
+        if self._elements_correctness is None: return
+        self._touched_categories.add(cat.id)
+        self._changed_categories.add(cat.id)
+        self._touched_objects.update(obj.id for obj in cat.objects)
+        self._touched_elements.update(cat.get_elements_id())
+        self._touched_rules.update(rule.id for rule in cat.rules)
+
+    def _update_correctness(self, statistics) -> None:
+
+        obj_cats: dict[int, list[Category]] = {obj.id: [] for obj in self._objects}
+        for cat in self._categories:
+            for obj in cat.objects: obj_cats[obj.id].append(cat)
+
+        elem_objs: dict[int, list[Object]] = {}
+        for obj in self._objects:
+            for elem in obj.elements: elem_objs.setdefault(elem.id, []).append(obj)
+
+        cat_elements = {cat.id: set(cat.get_elements_id()) for cat in self._categories}
+
+        # the new state of what changed
+
+        for cat in self._categories:
+            if cat.id in self._changed_categories:
+                self._touched_objects.update(obj.id for obj in cat.objects)
+                self._touched_elements.update(cat_elements[cat.id])
+                self._touched_rules.update(rule.id for rule in cat.rules)
+
+        for obj in self._objects:
+            if obj.id in self._changed_objects:
+                self._touched_elements.update(elem.id for elem in obj.elements)
+                self._touched_categories.update(cat.id for cat in obj_cats[obj.id])
+
+        # recompute only the contributions of what was touched
+
+        for elem in self._element_pool:
+            if elem.id in self._touched_elements:
+                elem_cats = [cat for cat in self._categories if elem.id in cat_elements[cat.id]]
+                self._elements_correctness[elem.id] = self._element_correctness(elem, elem_objs.get(elem.id, []), elem_cats, obj_cats, statistics)
+
+        for obj_id in self._touched_objects: self._objects_correctness.pop(obj_id, None)
+        for obj in self._objects:
+            if obj.id in self._touched_objects:
+                self._objects_correctness[obj.id] = self._object_correctness(obj, obj_cats[obj.id], statistics)
+
+        for cat_id in self._touched_categories:
+            self._categories_correctness.pop(cat_id, None)
+            for key in self._categories_usage.pop(cat_id, frozenset()): self._remove_rule_usage(key, statistics)
+        for cat in self._categories:
+            if cat.id in self._touched_categories:
+                self._categories_correctness[cat.id] = self._category_correctness(cat, cat_elements[cat.id], statistics)
+                self._categories_usage[cat.id] = frozenset((rule.trigger.id, rule.effect.id, elem_id) for rule in cat.rules for elem_id in cat_elements[cat.id] if statistics.triggered(rule.trigger.id, elem_id) > 0)
+                for key in self._categories_usage[cat.id]: self._add_rule_usage(key, statistics)
+
+        for rule_id in self._touched_rules: self._rules_correctness.pop(rule_id, None)
+        for rule in self._rules:
+            if rule.id in self._touched_rules:
+                n_cat = len([cat.id for cat in self._categories if rule in cat.rules])
+                self._rules_correctness[rule.id] = - pow(2, n_cat) if n_cat > 1 else 0 # penalty for rules in many categories
+
+        self._touched_elements = set()
+        self._touched_objects = set()
+        self._touched_categories = set()
+        self._touched_rules = set()
+        self._changed_objects = set()
+        self._changed_categories = set()
+
+    def _add_rule_usage(self, key, statistics) -> None:
+        if key not in self._rule_usage:
+            self._rule_usage[key] = 0
+            if key in statistics.should_be_rule: self._rule_usage_found += 1
+        self._rule_usage[key] += 1
+
+    def _remove_rule_usage(self, key, statistics) -> None:
+        self._rule_usage[key] -= 1
+        if self._rule_usage[key] == 0:
+            del self._rule_usage[key]
+            if key in statistics.should_be_rule: self._rule_usage_found -= 1
+
+    def _element_correctness(self, elem: Element, objs: list[Object], cats: list[Category], obj_cats: dict[int, list[Category]], statistics) -> int:
+
+        score = 0
+
+        if objs:
+            if len(objs) > 1: score -= pow(2, len(objs) - 1) # penalty for same element in different objects
+        else: score -= 10 # penalty for elem not present in any object
+
+        for obj in objs:
+            rule_rep = {}
+            for cat in obj_cats[obj.id]:
+                for rule in cat.rules: rule_rep[rule.id] = rule_rep.get(rule.id, 0) + 1
+            for rep in rule_rep.values():
+                if rep > 1: score -= pow(5, rep - 1) # penalty for same element in different objects with same rule applied
+
+        if cats:
+            if len(cats) > 1: score -= pow(2, len(cats) - 1) # penalty for same element in different categories
+        else: score -= 10 # penalty for elem not present in any category
+
+        applied_rules = {rule.id: rule for cat in cats for rule in cat.rules}
+        for rule in applied_rules.values():
+            if statistics.fired(rule.trigger.id):
+                if statistics.misses(rule.trigger.id, rule.effect.id, elem.id) > 0: score -= 1 # penalty for (elem, rule) that resulted wrong at least one time
+                elif statistics.hits(rule.trigger.id, rule.effect.id, elem.id) > 0: score += 1 # bonus for (elem, rule) always correct
+                else: score -= 1 # penalty for (elem, rule) in same cat but never used
+
+        return score
+
+    def _object_correctness(self, obj: Object, cats: list[Category], statistics) -> int:
+
+        score = 0
+
+        if len(obj.elements) > 1: score -= len(obj.elements) - 1 # penalty for number of elements per object
+        if not cats: score -= 1 # penalty for object not present in any category
+
+        applied_rules = {rule.id: rule for cat in cats for rule in cat.rules}
+        for rule in applied_rules.values():
+            if statistics.fired(rule.trigger.id):
+                if sum(statistics.misses(rule.trigger.id, rule.effect.id, elem.id) for elem in obj.elements) > 0: score -= 1 # penalty for (obj, rule) that resulted wrong at least one time
+                elif sum(statistics.hits(rule.trigger.id, rule.effect.id, elem.id) for elem in obj.elements) > 0: score += 2 # bonus for (obj, rule) always correct
+                else: score -= 1 # penalty for (obj, rule) in same cat but never used
+
+        return score
+
+    def _category_correctness(self, cat: Category, elements_id: set[int], statistics) -> int:
+
+        score = - len(cat.objects) # penalty for number of objects in a category
+
+        cat_is_correct = True
+        for rule in cat.rules:
+            if sum(statistics.misses(rule.trigger.id, rule.effect.id, elem_id) for elem_id in elements_id) > 0:
+                score -= 1 # penalty for (cat, rule) that resulted wrong at least one time
+                cat_is_correct = False
+            elif sum(statistics.hits(rule.trigger.id, rule.effect.id, elem_id) for elem_id in elements_id) > 0: score += 1 # bonus for (cat, rule) always correct
+            else: score -= 1 # penalty for (cat, rule) in same cat but never used
+
+        if cat.rules and cat_is_correct: score += 2 # bonus for categories always correct
+
+        return score
 
 
 #    def rules_in_obj(self, obj):
@@ -776,7 +1277,7 @@ class Individual:
 #                            
 #                            #cat_used = False
 #
-#                            if cat_rule.trigger == current_event:
+#                            if cat_rule.trigger == current_event.event_type:
 #
 #                                for cat_obj in cat.objects:
 #
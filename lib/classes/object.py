@@ -8,6 +8,13 @@ object.py
 Functions:
 - __init__(self, id, elements: list[Element] = None)
   Create an empty Object (ready to be initialized) or a full one if elements are passed.
+  Besides the list of elements, the object keeps the bitmask of their ids (bit elem.id set), updated by every method that changes the elements.
+
+- mask -> int
+  Bitmask of the ids of the elements in the object.
+
+- has_element(self, elem) -> bool
+  Membership test on the mask.
 
 - initialize(self, element_pool: list[Element], object_pool: list['Object'] = []) -> 'Object'
   Initialize the object with elements from the element_pool, avoiding repetitions.
@@ -30,10 +37,11 @@ Functions:
   Divide the object in two by taking one element and creating a new Object with it inside.
 
 - __eq__(self, other)
-  Compare with:
-    - self.__class__
-    - int (id == other)
-    - list[Element] (elements == other)
+  Equal to an Object with the same id, any other type is not equal.
+  Comparing with an int or a list of elements (allowed before) raises a TypeError: compare obj.id with the int, obj.elements with the list.
+
+- __hash__(self)
+  Same hash of the id (the elements can change, the id can't).
 
 Dependencies:
 -
@@ -41,11 +49,14 @@ Dependencies:
 
 class Object:
 
+    __slots__ = ('_id', '_elements', '_mask')
+
     def __init__(self, id, elements: list[Element] = None):
         
         self._id = id
         if elements is None: self._elements: list[Element] = []
         else: self._elements = [elem for elem in elements]
+        self._mask = Object.elements_mask(self._elements)
 
     @property
     def id(self) -> int: return self._id
@@ -54,29 +65,49 @@ class Object:
     def elements(self) -> list[Element]:
         return self._elements
 
+    @property
+    def mask(self) -> int:
+        return self._mask
+
+    @staticmethod
+    def elements_mask(elements: list[Element]) -> int:
+        mask = 0
+        for elem in elements: mask |= 1 << elem.id
+        return mask
+
+    def has_element(self, elem) -> bool:
+        return (self._mask >> elem.id) & 1 == 1
+
     def __repr__(self):
         return f'Object_{self._id}({self._elements})'
     
     def __eq__(self, other):
 
-        if isinstance(other, self.__class__): return self._id == other.id
-        if isinstance(other, int): return self._id == other
-        if isinstance(other, list) and all(isinstance(item, Element) for item in other): return self._elements == other
+        if type(other) is Object: return self._id == other._id
+        if isinstance(other, (int, list)): raise TypeError(f'Object.__eq__ error: comparing object {self._id} with {other!r}, compare obj.id or obj.elements')
+
+        return NotImplemented
 
-        print(f'{type(other)}')
-        raise Exception('Object.__eq__ error')
+    def __hash__(self):
+        return hash(self._id)
     
     def initialize(self, element_pool: list[Element], object_pool: list['Object'] = []) -> 'Object':
 
-        self._elements: list[Element] = random.choice([[elem] for elem in element_pool if [elem] not in object_pool])
+        used = {obj.mask for obj in object_pool} # an object made of only elem has mask 1 << elem.id
+        self._elements: list[Element] = random.choice([[elem] for elem in element_pool if (1 << elem.id) not in used])
+        self._mask = Object.elements_mask(self._elements)
 
         return self
     
     def add_element(self, elem) -> None:
-        if elem not in self._elements: self._elements.append(elem)
+        if not self.has_element(elem):
+            self._elements.append(elem)
+            self._mask |= 1 << elem.id
     
     def remove_element(self, elem, elems_to_add: list[Element] = None) -> None:
-        if elem in self._elements: self._elements.remove(elem)
+        if self.has_element(elem):
+            self._elements.remove(elem)
+            self._mask &= ~(1 << elem.id)
         if elems_to_add:
             for elem in elems_to_add: self.add_element(elem)
 
@@ -94,17 +125,22 @@ class Object:
         match mutate_what:
 
             case 'add_elem':
-                self._elements.append(random.choice([elem for elem in element_pool if elem not in self._elements]))  # Add an element
+                elem = random.choice([elem for elem in element_pool if not self.has_element(elem)])  # Add an element
+                self._elements.append(elem)
+                self._mask |= 1 << elem.id
 
             case 'remove_elem':
-                self._elements.pop(random.randint(0, lene - 1))  # Remove an element
+                elem = self._elements.pop(random.randint(0, lene - 1))  # Remove an element
+                self._mask &= ~(1 << elem.id)
     
     def fuse(self, other: 'Object') -> None:
 
         for elem in other.elements:
-            if elem not in self._elements:
+            if not self.has_element(elem):
                 self._elements.append(elem)
 
+        self._mask |= other.mask
+
     def divide(self, new_id, no= 1) -> 'Object':
 
         elems_to_keep = []
@@ -118,6 +154,7 @@ class Object:
             else: elems_to_keep.append(elem)
 
         self._elements: list[Element] = elems_to_keep
+        self._mask = Object.elements_mask(self._elements)
 
         return Object(new_id, elems_to_move)
 
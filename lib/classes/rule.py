@@ -13,12 +13,16 @@ Functions:
 - initialize(self, event_pool: list[EventType], rule_pool: list['Rule'] = []) -> 'Rule'
   Initialize the rule with events from the event_pool, avoiding repetitions.
 
+- pair -> tuple[EventType, EventType]
+  (trigger, effect).
+
 - __eq__(self, other)
-  Compare with:
-    - self.__class__
-    - int (id == other)
-    - tuple (trigger == other[0] and effect == other[1])
-    - EventType (trigger == other)
+  Equal to a Rule with the same (trigger, effect) pair (rules of an individual are unique by pair), any other type is not equal.
+  Two rules with the same id and different pairs are no longer equal, and comparing with an int, a tuple or an EventType
+  (allowed before) raises a TypeError: compare rule.id with the int, rule.pair with the tuple, rule.trigger with the EventType.
+
+- __hash__(self)
+  Hash of the (trigger, effect) pair.
 
 Dependencies:
 -
@@ -26,6 +30,8 @@ Dependencies:
 
 class Rule:
 
+    __slots__ = ('_id', '_trigger', '_effect')
+
     def __init__(self, id, trigger: EventType = None, effect: EventType = None):
 
         self._id = id
@@ -44,21 +50,26 @@ class Rule:
     def effect(self) -> EventType:
         return self._effect
 
+    @property
+    def pair(self) -> tuple[EventType, EventType]:
+        return self._trigger, self._effect
+
     def __repr__(self):
         return f'Rule_{self._id}({self._trigger} -> {self._effect})'
 
     def __eq__(self, other):
 
-        if isinstance(other, self.__class__): return (self._id == other.id) or ((self._trigger == other.trigger) and (self._effect == other.effect))
-        if isinstance(other, int): return self._id == other
-        if isinstance(other, tuple): return (self._trigger == other[0]) and (self._effect == other[1])
-        if isinstance(other, EventType): return self._trigger == other
+        if type(other) is Rule: return (self._trigger == other._trigger) and (self._effect == other._effect)
+        if isinstance(other, (int, tuple, EventType)): raise TypeError(f'Rule.__eq__ error: comparing {self} with {other!r}, compare rule.id, rule.pair or rule.trigger')
+
+        return NotImplemented
 
-        print(f'{type(other)}')
-        raise Exception('Rule.__eq__ error')
+    def __hash__(self):
+        return hash((self._trigger, self._effect))
 
     def initialize(self, event_pool: list[EventType], rule_pool: list['Rule'] = []) -> 'Rule':
 
-        self._trigger, self._effect = random.choice([(t, e) for t, e in itertools.product(event_pool, event_pool) if (t, e) not in rule_pool])
+        used = {rule.pair for rule in rule_pool}
+        self._trigger, self._effect = random.choice([(t, e) for t, e in itertools.product(event_pool, event_pool) if (t, e) not in used])
         
         return self
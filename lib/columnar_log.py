@@ -0,0 +1,245 @@
+import os
+import pickle
+
+import numpy as np
+
+from .classes import Element, Event, EventType
+from .element_states import ElementStateEncoder
+from .event_index import EventIndex
+
+"""
+columnar_log.py
+
+Columnar on-disk format of the game logs (.npz, no pickled objects inside):
+  - header: format version, number of frames and the vocabularies
+      element_ids, element_descriptions  elements in order of first appearance
+      event_types                        event type descriptions, the event type id is the position (in order of first appearance)
+      commands                           command descriptions, the command id is the position
+  - events as parallel int arrays, in log order: event_frame, event_type, event_subject, event_object (-1 if the event has no object)
+  - commands as parallel int arrays: command_frame, command
+  - element presence as a bool matrix (frame, element in the order of element_ids): element_presence
+  - optionally the delta encoded states of the elements: element_states, element_state_offsets, state_keyframes (see element_states.py)
+
+Functions:
+- ColumnarLogWriter.__init__(self, keyframe_interval= 50)
+  Create an empty writer, to be filled one frame at a time (e.g. from the Game loop) and then saved.
+  The element states are recorded with a keyframe every keyframe_interval frames, not recorded if it is None.
+
+- ColumnarLogWriter.add_frame(self, elements: dict, events: list[dict], commands: list[str]) -> int
+  Append a frame, with the same content of the frames of the pickled logs ('elements', 'events' and 'commands'). Return its frame id.
+
+- ColumnarLogWriter.add_empty_frames(self, elements: dict, commands: list[str]) -> int
+  Append len(commands) frames without events, with the same elements and one command each (the frames skipped by
+  Game.play_commands with fast_forward). They are kept as runs (first frame, length, command) and expanded
+  only by save. The element states of the skipped frames are not known: the writer must not record them (keyframe_interval= None).
+  Return the frame id of the first one.
+
+- ColumnarLogWriter.event_counts -> dict[str, int]
+  Number of events of each event type added so far.
+
+- ColumnarLogWriter.save(self, path) -> str
+  Write the log to path (.npz) and return the path.
+
+- load_columnar_log(path) -> tuple[list[Element], list[EventType], list[list[Event]], list[list[Element]], EventIndex]
+  Load a columnar log and return element_pool, event_pool, events_per_frame, elements_per_frame and the event_index,
+  the same that main.py builds from a pickled log.
+
+- log_from_arrays(log) -> tuple[list[Element], list[EventType], list[list[Event]], list[list[Element]], EventIndex]
+  Same as load_columnar_log, from a mapping with the arrays of the format (e.g. the arrays read from a streaming log).
+
+- convert_pickle_log(pkl_path, npz_path= None) -> str
+  Convert a pickled log (list of frame dicts) to the columnar format, by default next to it with the .npz extension.
+
+Dependencies:
+- numpy
+"""
+
+LOG_FORMAT_VERSION = 1
+
+class ColumnarLogWriter:
+
+    def __init__(self, keyframe_interval= 50):
+
+        self._element_ids: dict[str, int] = {}
+        self._event_types: dict[str, int] = {}
+        self._commands: dict[str, int] = {}
+
+        self._event_frame: list[int] = []
+        self._event_type: list[int] = []
+        self._event_subject: list[int] = []
+        self._event_object: list[int] = []
+
+        self._command_runs: list[tuple[int, int, int]] = [] # (first frame, number of frames, command id)
+
+        self._element_presence: list[tuple[int, int, list[int]]] = [] # (first frame, number of frames, element ids)
+
+        self._state_encoder = None if keyframe_interval is None else ElementStateEncoder(keyframe_interval)
+        self._state_records: list[bytes] = []
+        self._state_keyframes: list[int] = []
+
+        self._n_frames = 0
+
+    @property
+    def n_frames(self) -> int:
+        return self._n_frames
+
+    @property
+    def event_counts(self) -> dict[str, int]:
+        counts = np.bincount(np.array(self._event_type, dtype= np.int64), minlength= len(self._event_types))
+        return {description: int(counts[event_type_id]) for description, event_type_id in self._event_types.items()}
+
+    def __repr__(self):
+        return f'ColumnarLogWriter({self._n_frames} frames, {len(self._event_frame)} events)'
+
+    def add_frame(self, elements: dict, events: list[dict], commands: list[str]) -> int:
+
+        frame_id = self._n_frames
+
+        presence = []
+        for description, elem in elements.items():
+            if description not in self._element_ids: self._element_ids[description] = elem['id']
+            presence.append(elem['id'])
+        self._element_presence.append((frame_id, 1, presence))
+
+        if self._state_encoder is not None:
+            record, keyframe = self._state_encoder.encode(elements)
+            self._state_records.append(record)
+            if keyframe: self._state_keyframes.append(frame_id)
+
+        for event in events:
+            if event['description'] not in self._event_types: self._event_types[event['description']] = len(self._event_types)
+            self._event_frame.append(frame_id)
+            self._event_type.append(self._event_types[event['description']])
+            self._event_subject.append(event['subject'])
+            self._event_object.append(event.get('object', -1))
+
+        for command in commands:
+            if command not in self._commands: self._commands[command] = len(self._commands)
+            self._command_runs.append((frame_id, 1, self._commands[command]))
+
+        self._n_frames += 1
+
+        return frame_id
+
+    def add_empty_frames(self, elements: dict, commands: list[str]) -> int:
+
+        if self._state_encoder is not None: raise Exception('ColumnarLogWriter.add_empty_frames error: the element states of skipped frames are not known, use keyframe_interval= None')
+
+        frame_id = self._n_frames
+        n = len(commands)
+
+        presence = []
+        for description, elem in elements.items():
+            if description not in self._element_ids: self._element_ids[description] = elem['id']
+            presence.append(elem['id'])
+        self._element_presence.append((frame_id, n, presence))
+
+        for command in commands:
+            if command not in self._commands: self._commands[command] = len(self._commands)
+        self._command_runs.extend(_command_runs(frame_id, [self._commands[command] for command in commands]))
+
+        self._n_frames += n
+
+        return frame_id
+
+    def save(self, path) -> str:
+
+        if not path.endswith('.npz'): path += '.npz'
+
+        element_idx = {elem_id: i for i, elem_id in enumerate(self._element_ids.values())}
+        element_presence = np.zeros((self._n_frames, len(element_idx)), dtype= bool)
+        for frame_id, n, presence in self._element_presence:
+            element_presence[frame_id:frame_id + n, [element_idx[elem_id] for elem_id in presence]] = True
+
+        command_frame, command = _expand_runs(self._command_runs)
+
+        element_states = {} if self._state_encoder is None else ElementStateEncoder.arrays(self._state_records, self._state_keyframes)
+
+        np.savez_compressed(
+            path,
+            version= np.array(LOG_FORMAT_VERSION, dtype= np.int64),
+            n_frames= np.array(self._n_frames, dtype= np.int64),
+            element_ids= np.array(list(self._element_ids.values()), dtype= np.int64),
+            element_descriptions= np.array(list(self._element_ids.keys()), dtype= str),
+            event_types= np.array(list(self._event_types.keys()), dtype= str),
+            commands= np.array(list(self._commands.keys()), dtype= str),
+            event_frame= np.array(self._event_frame, dtype= np.int32),
+            event_type= np.array(self._event_type, dtype= np.int32),
+            event_subject= np.array(self._event_subject, dtype= np.int32),
+            event_object= np.array(self._event_object, dtype= np.int32),
+            command_frame= command_frame,
+            command= command,
+            element_presence= element_presence,
+            **element_states
+        )
+
+        return path
+
+def _command_runs(first_frame, command_ids: list[int]) -> list[tuple[int, int, int]]:
+
+    # runs of the same command in frames first_frame, first_frame + 1, ...
+    runs = []
+    start = 0
+    for i in range(1, len(command_ids) + 1):
+        if i == len(command_ids) or command_ids[i] != command_ids[start]:
+            runs.append((first_frame + start, i - start, command_ids[start]))
+            start = i
+
+    return runs
+
+def _expand_runs(runs: list[tuple[int, int, int]]) -> tuple[np.ndarray, np.ndarray]:
+
+    # (first frame, number of frames, value) runs -> one (frame, value) pair per frame, as int32 arrays
+    if not runs: return np.zeros(0, dtype= np.int32), np.zeros(0, dtype= np.int32)
+
+    first_frame, length, value = (np.array(column, dtype= np.int64) for column in zip(*runs))
+    ends = np.cumsum(length)
+    frames = np.arange(ends[-1]) - np.repeat(ends - length - first_frame, length)
+
+    return frames.astype(np.int32), np.repeat(value, length).astype(np.int32)
+
+def load_columnar_log(path) -> tuple[list[Element], list[EventType], list[list[Event]], list[list[Element]], EventIndex]:
+
+    with np.load(path, allow_pickle= False) as log:
+        return log_from_arrays(log)
+
+def log_from_arrays(log) -> tuple[list[Element], list[EventType], list[list[Event]], list[list[Element]], EventIndex]:
+
+    if int(log['version']) != LOG_FORMAT_VERSION: raise Exception(f'load_columnar_log error: unsupported log format version {int(log["version"])}')
+
+    n_frames = int(log['n_frames'])
+    element_ids = log['element_ids'].tolist()
+    element_descriptions = log['element_descriptions'].tolist()
+    event_type_descriptions = log['event_types'].tolist()
+    event_frame = log['event_frame'].tolist()
+    event_type = log['event_type'].tolist()
+    event_subject = log['event_subject'].tolist()
+    element_presence = log['element_presence']
+
+    elements = {elem_id: Element(elem_id, description, None) for elem_id, description in zip(element_ids, element_descriptions)}
+    event_pool = [EventType(event_type_id, description) for event_type_id, description in enumerate(event_type_descriptions)]
+
+    element_list = list(elements.values())
+    elements_per_frame = [[element_list[i] for i in np.flatnonzero(presence)] for presence in element_presence]
+
+    events_per_frame = [[] for _ in range(n_frames)]
+    event_index = EventIndex()
+    for frame_id, event_type_id, subject in zip(event_frame, event_type, event_subject):
+        if subject not in elements: raise Exception(f'load_columnar_log error: subject {subject} of an event is not an element of the log')
+        events_per_frame[frame_id].append(Event(event_pool[event_type_id], elements[subject]))
+        event_index.add(frame_id, event_type_id, subject)
+
+    return list(elements.values()), event_pool, events_per_frame, elements_per_frame, event_index.build(n_frames)
+
+def convert_pickle_log(pkl_path, npz_path= None) -> str:
+
+    if npz_path is None: npz_path = os.path.splitext(pkl_path)[0] + '.npz'
+
+    with open(pkl_path, 'rb') as log_file:
+        frames = pickle.load(log_file)
+
+    writer = ColumnarLogWriter(keyframe_interval= None) # the frames of a pickled log share the same elements dict, their states are all the final one
+    for frame in frames:
+        writer.add_frame(frame['elements'], frame['events'], frame['commands'])
+
+    return writer.save(npz_path)
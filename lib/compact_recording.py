@@ -0,0 +1,143 @@
+import os
+import json
+import zlib
+import struct
+
+from .columnar_log import ColumnarLogWriter
+from .controllers import Controller
+from .game import COMMANDS, Game
+
+"""
+compact_recording.py
+
+Recording of a game as the seed of the Game and the command of each frame (.replay): the game is deterministic given the
+seed and the commands, so the whole log (events, elements, element states) is regenerated by replaying it.
+File: REPLAY_MAGIC, the length (4 bytes) of a json header (version, seed, command vocabulary, number of frames) and the
+header, then the zlib compressed command ids (one byte per frame).
+
+Functions:
+- CompactRecording.__init__(self, seed: int, commands: list[str]= None)
+  Recording of the game with the seed, commands are added one per frame with add.
+
+- CompactRecording.add(self, command)
+  Append the command of the next frame (one of COMMANDS).
+
+- CompactRecording.record(seed, controller, log_writer= None, max_frames= None) -> 'CompactRecording'
+  Play a headless game with the seed and the controller (see Game.play), recording its commands.
+
+- CompactRecording.replay(self, log_writer= None, render= False, fast_forward= False) -> Game
+  Replay the game, the frames are added to log_writer exactly as when it was played. Return the game at the end.
+  With fast_forward the frames without events are skipped (see Game.play_commands).
+
+- CompactRecording.save(self, path) -> str, CompactRecording.load(path) -> 'CompactRecording'
+  Write or read a .replay file.
+
+- convert_compact_recording(replay_path, npz_path= None, keyframe_interval= 50, fast_forward= False) -> str
+  Replay a .replay file into a columnar log, by default next to it with the .npz extension, element states included.
+  With fast_forward the frames without events are skipped: their states are not known, it requires keyframe_interval= None.
+
+Dependencies:
+-
+"""
+
+REPLAY_MAGIC = b'ARKRPLY1'
+REPLAY_VERSION = 1
+
+class _RecordingController(Controller):
+
+    def __init__(self, controller: Controller, recording: 'CompactRecording'):
+        self._controller = controller
+        self._recording = recording
+
+    def __call__(self, game: Game) -> str:
+        command = self._controller(game)
+        self._recording.add(command)
+        return command
+
+
+class CompactRecording:
+
+    def __init__(self, seed: int, commands: list[str]= None):
+
+        if not isinstance(seed, int): raise Exception('CompactRecording.__init__ error: the seed must be an int')
+
+        self._seed = seed
+        self._commands: list[str] = [] if commands is None else list(commands)
+
+    @property
+    def seed(self) -> int:
+        return self._seed
+
+    @property
+    def commands(self) -> list[str]:
+        return self._commands
+
+    @property
+    def n_frames(self) -> int:
+        return len(self._commands)
+
+    def __repr__(self):
+        return f'CompactRecording(seed= {self._seed}, {len(self._commands)} frames)'
+
+    def add(self, command):
+
+        if command not in COMMANDS: raise Exception(f'CompactRecording.add error: unknown command {command}')
+        self._commands.append(command)
+
+    @staticmethod
+    def record(seed, controller, log_writer= None, max_frames= None) -> 'CompactRecording':
+
+        recording = CompactRecording(seed)
+        Game(render= False, seed= seed).play(_RecordingController(controller, recording), log_writer, max_frames)
+
+        return recording
+
+    def replay(self, log_writer= None, render= False, fast_forward= False) -> Game:
+
+        game = Game(render= render, seed= self._seed)
+        game.play_commands(self._commands, log_writer, fast_forward)
+
+        return game
+
+    def save(self, path) -> str:
+
+        vocabulary = list(COMMANDS)
+        command_id = {command: i for i, command in enumerate(vocabulary)}
+
+        header = json.dumps({'version': REPLAY_VERSION, 'seed': self._seed, 'commands': vocabulary, 'n_frames': len(self._commands)}).encode()
+        data = zlib.compress(bytes(command_id[command] for command in self._commands), 9)
+
+        with open(path, 'wb') as replay_file:
+            replay_file.write(REPLAY_MAGIC + struct.pack('<I', len(header)) + header + data)
+
+        return path
+
+    @staticmethod
+    def load(path) -> 'CompactRecording':
+
+        with open(path, 'rb') as replay_file:
+            data = replay_file.read()
+
+        if data[:len(REPLAY_MAGIC)] != REPLAY_MAGIC: raise Exception(f'CompactRecording.load error: {path} is not a replay')
+
+        header_length = struct.unpack_from('<I', data, len(REPLAY_MAGIC))[0]
+        header_end = len(REPLAY_MAGIC) + 4 + header_length
+        header = json.loads(data[len(REPLAY_MAGIC) + 4:header_end])
+
+        if header['version'] != REPLAY_VERSION: raise Exception(f'CompactRecording.load error: unsupported replay version {header["version"]}')
+
+        command_ids = zlib.decompress(data[header_end:])
+        if len(command_ids) != header['n_frames']: raise Exception(f'CompactRecording.load error: {path} is truncated')
+
+        return CompactRecording(header['seed'], [header['commands'][i] for i in command_ids])
+
+
+def convert_compact_recording(replay_path, npz_path= None, keyframe_interval= 50, fast_forward= False) -> str:
+
+    if fast_forward and keyframe_interval is not None: raise Exception('convert_compact_recording error: the element states of skipped frames are not known, use keyframe_interval= None with fast_forward')
+    if npz_path is None: npz_path = os.path.splitext(replay_path)[0] + '.npz'
+
+    log_writer = ColumnarLogWriter(keyframe_interval)
+    CompactRecording.load(replay_path).replay(log_writer, fast_forward= fast_forward)
+
+    return log_writer.save(npz_path)
@@ -0,0 +1,154 @@
+import pickle
+import random
+
+import numpy as np
+
+from .game import COMMANDS, Game
+
+"""
+controllers.py
+
+Paddle controllers, to play the Game without a player (Game.play(controller, ...)). A controller is called once per frame
+with the game and returns one of COMMANDS.
+
+Functions:
+- Controller.__call__(self, game: Game) -> str
+  Command of the next frame.
+
+- TrackingController(deadzone= 1, lookahead= 1)
+  Follow the ball: move the paddle toward the position of the ball lookahead frames ahead, stop within deadzone.
+
+- RandomController(seed= None, hold= (1, 10), guard= None, leash= None)
+  Random commands, each one held for a random number of frames in hold (inclusive). By default the commands are always
+  random and the ball reaches the bottom wall within a few bounces. With guard the paddle follows the ball (as TrackingController)
+  while the ball is heading down within guard rows of the paddle, with leash while the paddle is more than leash cells away
+  from the ball (the paddle is only twice as fast as the ball, it could not catch up): with both the ball is kept in play
+  (the 'guarded_random' policy of log_farm.py).
+
+- ReplayController(commands: list[str], default= 'paddle_stop')
+  Replay a list of commands, then default. ReplayController.from_log(path) replays the commands of a log (.pkl, .npz or .stream).
+
+- NoisyTrackingController(epsilon= 0.1, seed= None, deadzone= 1, lookahead= 1)
+  TrackingController that with probability epsilon plays a random command instead.
+
+Dependencies:
+- numpy
+"""
+
+class Controller:
+
+    def __call__(self, game: Game) -> str:
+        raise NotImplementedError
+
+
+class TrackingController(Controller):
+
+    def __init__(self, deadzone= 1, lookahead= 1):
+
+        self.deadzone = deadzone
+        self.lookahead = lookahead
+
+    def __repr__(self):
+        return f'TrackingController(deadzone= {self.deadzone}, lookahead= {self.lookahead})'
+
+    def __call__(self, game: Game) -> str:
+
+        target = game.ball_x + self.lookahead * game.ball_speed_x
+
+        if game.paddle_x < target - self.deadzone: return 'paddle_right'
+        if game.paddle_x > target + self.deadzone: return 'paddle_left'
+
+        return 'paddle_stop'
+
+
+class RandomController(Controller):
+
+    def __init__(self, seed= None, hold= (1, 10), guard= None, leash= None):
+
+        self.seed = seed
+        self.hold = hold
+        self.guard = guard
+        self.leash = leash
+
+        self._tracking = TrackingController()
+        self._random = random.Random(seed)
+        self._command = 'paddle_stop'
+        self._remaining = 0
+
+    def __repr__(self):
+        return f'RandomController(seed= {self.seed}, hold= {self.hold}, guard= {self.guard}, leash= {self.leash})'
+
+    def __call__(self, game: Game) -> str:
+
+        if self.guard is not None and game.ball_speed_y > 0 and game.paddle_y - game.ball_y <= self.guard: return self._tracking(game)
+        if self.leash is not None and abs(game.paddle_x - game.ball_x) > self.leash: return self._tracking(game)
+
+        if self._remaining == 0:
+            self._command = self._random.choice(list(COMMANDS))
+            self._remaining = self._random.randint(*self.hold)
+
+        self._remaining -= 1
+
+        return self._command
+
+
+class ReplayController(Controller):
+
+    def __init__(self, commands: list[str], default= 'paddle_stop'):
+
+        self.commands = commands
+        self.default = default
+
+        self._frame = 0
+
+    def __repr__(self):
+        return f'ReplayController({len(self.commands)} commands)'
+
+    @staticmethod
+    def from_log(path, default= 'paddle_stop') -> 'ReplayController':
+
+        if path.endswith('.pkl'):
+            with open(path, 'rb') as log_file:
+                frames = pickle.load(log_file)
+            return ReplayController([command for frame in frames for command in frame['commands']], default)
+
+        if path.endswith('.stream'):
+            from .streaming_log import read_streaming_log
+            log = read_streaming_log(path)
+
+        else:
+            with np.load(path, allow_pickle= False) as npz:
+                log = {name: npz[name] for name in ('commands', 'command_frame', 'command')}
+
+        order = np.argsort(log['command_frame'], kind= 'stable')
+        commands = log['commands'].tolist()
+
+        return ReplayController([commands[command_id] for command_id in log['command'][order].tolist()], default)
+
+    def __call__(self, game: Game) -> str:
+
+        command = self.commands[self._frame] if self._frame < len(self.commands) else self.default
+        self._frame += 1
+
+        return command
+
+
+class NoisyTrackingController(TrackingController):
+
+    def __init__(self, epsilon= 0.1, seed= None, deadzone= 1, lookahead= 1):
+
+        super().__init__(deadzone, lookahead)
+
+        self.epsilon = epsilon
+        self.seed = seed
+
+        self._random = random.Random(seed)
+
+    def __repr__(self):
+        return f'NoisyTrackingController(epsilon= {self.epsilon}, seed= {self.seed}, deadzone= {self.deadzone}, lookahead= {self.lookahead})'
+
+    def __call__(self, game: Game) -> str:
+
+        if self._random.random() < self.epsilon: return self._random.choice(list(COMMANDS))
+
+        return super().__call__(game)
@@ -0,0 +1,295 @@
+import os
+import queue
+import socket
+import time
+import hashlib
+import threading
+from multiprocessing import AuthenticationError
+from multiprocessing.connection import Client, Listener, answer_challenge, deliver_challenge
+
+from .classes import Element, Event, EventType, Individual
+from .population_evaluator import PopulationEvaluator
+from .transition_statistics import TransitionStatistics
+
+"""
+distributed_evaluator.py
+
+Evaluation of the population on worker processes connected to a broker (the DistributedEvaluator of the
+EvolutionaryAlgorithm) over TCP (address (host, port)) or a Unix socket (address is a path), possibly from other hosts.
+The connections are authenticated with the authkey (mandatory: the messages are pickled, an unauthenticated peer could
+run code in the broker, so use a secret key on a multi host setup). Every worker loads the same preprocessed log on its own: when it
+connects it sends the hash of its dataset (see dataset_hash) and it is rejected if it differs from the one of the broker.
+The genome encodings (see Individual.to_genome) are sent in chunks, the fitness values come back. If a worker is lost
+(connection closed, or no answer within task_timeout seconds, e.g. hung or behind a network partition) its chunk is
+queued again for the other workers and its connection is closed. If every worker is lost and none connects within
+task_timeout seconds, the evaluation raises instead of waiting forever.
+
+Messages (tuples):
+- worker -> broker: ('hello', dataset hash, worker name), ('result', task id, fitness values)
+- broker -> worker: ('accept',), ('reject', reason), ('evaluate', task id, genomes), ('stop',)
+
+Functions:
+- dataset_hash(element_pool: list[Element], event_pool: list[EventType], events_per_frame: list[list[Event]]) -> str
+  sha256 of the pools and of the events of every frame (ids and descriptions), the same for the same log however it is loaded.
+
+- DistributedEvaluator.__init__(self, element_pool, event_pool, events_per_frame, address= ('localhost', 6000), authkey= None, chunk_size= 20, task_timeout= 60, evaluate_timeout= None)
+  Start listening for workers on address, the workers can connect (and disconnect) at any time. authkey (bytes) is required.
+  task_timeout must be larger than the time a worker takes to evaluate chunk_size individuals.
+  evaluate_timeout (seconds, None for no limit) bounds a whole evaluate.
+
+- DistributedEvaluator.evaluate(self, population: list[Individual]) -> list[int]
+  Send the genome encodings to the workers and set the fitness values they send back. It waits for the workers if none is connected.
+  Raises (and drops the chunks not evaluated yet) if all the workers are lost and none connects within task_timeout seconds,
+  or if the evaluation takes more than evaluate_timeout seconds.
+
+- DistributedEvaluator.workers -> int, DistributedEvaluator.lost_workers -> int
+  Number of workers connected now, number of workers lost.
+
+- DistributedEvaluator.close(self) -> None
+  Stop the workers and the broker.
+
+- run_worker(address, authkey, element_pool, event_pool, events_per_frame, name= None) -> int
+  Connect to the broker (authkey is required) and evaluate the chunks it sends until it stops. Return the number of individuals evaluated.
+
+Dependencies:
+-
+"""
+
+def dataset_hash(element_pool: list[Element], event_pool: list[EventType], events_per_frame: list[list[Event]]) -> str:
+
+    sha256 = hashlib.sha256()
+
+    for elem in element_pool: sha256.update(f'{elem.id}:{elem.description};'.encode())
+    sha256.update(b'|')
+    for event_type in event_pool: sha256.update(f'{event_type.id}:{event_type.description};'.encode())
+    sha256.update(b'|')
+    for events in events_per_frame: sha256.update((','.join(f'{event.event_type.id}:{event.subject.id}' for event in events) + ';').encode())
+
+    return sha256.hexdigest()
+
+
+class DistributedEvaluator:
+
+    def __init__(self, element_pool: list[Element], event_pool: list[EventType], events_per_frame: list[list[Event]], address= ('localhost', 6000), authkey= None,
+                 chunk_size= 20, task_timeout= 60, evaluate_timeout= None):
+
+        if not authkey: raise Exception('DistributedEvaluator.__init__ error: an authkey is required')
+        if task_timeout is None or task_timeout <= 0: raise Exception('DistributedEvaluator.__init__ error: task_timeout must be a positive number of seconds')
+        if evaluate_timeout is not None and evaluate_timeout <= 0: raise Exception('DistributedEvaluator.__init__ error: evaluate_timeout must be a positive number of seconds')
+
+        self._dataset_hash = dataset_hash(element_pool, event_pool, events_per_frame)
+        self._authkey = authkey
+        self._chunk_size = chunk_size
+        self._task_timeout = task_timeout
+        self._evaluate_timeout = evaluate_timeout
+
+        self._tasks = queue.Queue() # (task id, genomes), None stops a worker thread
+        self._results: dict[int, list[int]] = {}
+        self._pending: set[int] = set() # task ids of the running evaluate, late results of dropped tasks are ignored
+        self._results_ready = threading.Condition()
+        self._next_task_id = 0
+
+        self._lock = threading.Lock()
+        self._worker_threads: dict[str, threading.Thread] = {}
+        self._lost_workers = 0
+        self._closed = False
+
+        # the authentication is done by the thread of each worker, so that accept never waits for a slow client
+        self._listener = Listener(address)
+        self._accept_thread = threading.Thread(target= self._accept_loop, name= 'DistributedEvaluator', daemon= True)
+        self._accept_thread.start()
+
+    @property
+    def address(self):
+        return self._listener.address
+
+    @property
+    def dataset_hash(self) -> str:
+        return self._dataset_hash
+
+    @property
+    def workers(self) -> int:
+        with self._lock: return len(self._worker_threads)
+
+    @property
+    def lost_workers(self) -> int:
+        return self._lost_workers
+
+    def __repr__(self):
+        return f'DistributedEvaluator({self.address}, {self.workers} workers, {self._lost_workers} lost)'
+
+    def _accept_loop(self) -> None:
+
+        while True:
+            try: conn = self._listener.accept()
+            except OSError: # listener closed
+                break
+
+            if self._closed:
+                conn.close()
+                break
+
+            threading.Thread(target= self._serve_worker, args= (conn,), daemon= True).start()
+
+    def _serve_worker(self, conn) -> None:
+
+        # authentication and dataset check
+        try:
+            deliver_challenge(conn, self._authkey)
+            answer_challenge(conn, self._authkey)
+            if not conn.poll(self._task_timeout): raise TimeoutError()
+            kind, worker_hash, name = conn.recv()
+            if kind != 'hello': raise ValueError(kind)
+            if worker_hash != self._dataset_hash:
+                conn.send(('reject', f'dataset hash {worker_hash} differs from the one of the broker {self._dataset_hash}'))
+                conn.close()
+                return
+            conn.send(('accept',))
+        except (EOFError, OSError, ValueError, TimeoutError, AuthenticationError):
+            conn.close()
+            return
+
+        with self._lock:
+            closed = self._closed
+            if name in self._worker_threads: name = f'{name}#{id(conn)}'
+            if not closed: self._worker_threads[name] = threading.current_thread()
+
+        if closed: # connected while the broker was closing
+            try: conn.send(('stop',))
+            except OSError: pass
+            conn.close()
+            return
+
+        lost = False
+        while True:
+            task = self._tasks.get()
+
+            if task is None:
+                try: conn.send(('stop',))
+                except OSError: pass
+                break
+
+            task_id, genomes = task
+            try:
+                conn.send(('evaluate', task_id, genomes))
+                if not conn.poll(self._task_timeout): raise TimeoutError()
+                _, result_id, scores = conn.recv()
+            except (EOFError, OSError, TimeoutError): # worker lost, its task goes to the others
+                self._tasks.put(task)
+                lost = True
+                break
+
+            with self._results_ready:
+                if result_id in self._pending: self._results[result_id] = scores
+                self._results_ready.notify_all()
+
+        with self._lock:
+            del self._worker_threads[name]
+            if lost: self._lost_workers += 1
+        conn.close()
+
+        # evaluate checks if some worker is left
+        if lost:
+            with self._results_ready: self._results_ready.notify_all()
+
+    def evaluate(self, population: list[Individual]) -> list[int]:
+
+        if not population: return []
+        if self._closed: raise Exception('DistributedEvaluator.evaluate error: the evaluator is closed')
+
+        genomes = [ind.to_genome() for ind in population]
+
+        task_ids = list(range(self._next_task_id, self._next_task_id + (len(genomes) + self._chunk_size - 1) // self._chunk_size))
+        self._next_task_id += len(task_ids)
+        with self._results_ready: self._pending.update(task_ids)
+        for task_id, i in zip(task_ids, range(0, len(genomes), self._chunk_size)): self._tasks.put((task_id, genomes[i:i + self._chunk_size]))
+
+        lost_before = self._lost_workers
+        deadline = None if self._evaluate_timeout is None else time.monotonic() + self._evaluate_timeout
+        orphaned_since = None # since when all the workers are lost and none is connected
+
+        with self._results_ready:
+            while not all(task_id in self._results for task_id in task_ids):
+
+                now = time.monotonic()
+                if self._lost_workers > lost_before and self.workers == 0:
+                    if orphaned_since is None: orphaned_since = now
+                else: orphaned_since = None
+
+                error = None
+                if deadline is not None and now >= deadline: error = f'no result within evaluate_timeout ({self._evaluate_timeout} seconds)'
+                elif orphaned_since is not None and now - orphaned_since >= self._task_timeout: error = f'all the workers were lost and none connected within task_timeout ({self._task_timeout} seconds)'
+
+                if error is not None:
+                    missing = sum(task_id not in self._results for task_id in task_ids)
+                    self._drop(task_ids)
+                    raise Exception(f'DistributedEvaluator.evaluate error: {error}, {missing} chunks not evaluated')
+
+                wake_ups = [wake_up for wake_up in (deadline, None if orphaned_since is None else orphaned_since + self._task_timeout) if wake_up is not None]
+                self._results_ready.wait(timeout= min(wake_ups) - now if wake_ups else None)
+
+            scores = [fitness for task_id in task_ids for fitness in self._results.pop(task_id)]
+            self._pending.difference_update(task_ids)
+
+        for ind, fitness in zip(population, scores): ind.set_fitness(fitness)
+
+        return scores
+
+    def _drop(self, task_ids: list[int]) -> None:
+        # called holding _results_ready: forget the tasks of a failed evaluate, so that the workers connecting later skip them
+
+        dropped = set(task_ids)
+        self._pending.difference_update(dropped)
+        for task_id in dropped: self._results.pop(task_id, None)
+
+        kept = []
+        while True:
+            try: task = self._tasks.get_nowait()
+            except queue.Empty: break
+            if task is None or task[0] not in dropped: kept.append(task)
+        for task in kept: self._tasks.put(task)
+
+    def close(self) -> None:
+
+        with self._lock:
+            if self._closed: return
+            self._closed = True
+            worker_threads = list(self._worker_threads.values())
+
+        # wake up the accept loop with a last connection
+        try: Client(self._listener.address).close()
+        except OSError: pass
+        self._accept_thread.join()
+        self._listener.close()
+
+        for _ in worker_threads: self._tasks.put(None)
+        for thread in worker_threads: thread.join()
+
+
+def run_worker(address, authkey, element_pool: list[Element], event_pool: list[EventType], events_per_frame: list[list[Event]], name= None) -> int:
+
+    if not authkey: raise Exception('run_worker error: an authkey is required')
+
+    evaluator = PopulationEvaluator(TransitionStatistics(element_pool, event_pool, events_per_frame))
+    if name is None: name = f'{socket.gethostname()}:{os.getpid()}'
+
+    evaluated = 0
+    with Client(address, authkey= authkey) as conn:
+
+        conn.send(('hello', dataset_hash(element_pool, event_pool, events_per_frame), name))
+        reply = conn.recv()
+        if reply[0] == 'reject': raise Exception(f'run_worker error: rejected by the broker, {reply[1]}')
+
+        while True:
+            try: message = conn.recv()
+            except EOFError: break
+
+            if message[0] == 'stop': break
+
+            _, task_id, genomes = message
+            population = [Individual.from_genome(element_pool, event_pool, genome) for genome in genomes]
+            try: conn.send(('result', task_id, [int(fitness) for fitness in evaluator.evaluate(population)]))
+            except OSError: break # dropped by the broker (too slow, see task_timeout)
+            evaluated += len(genomes)
+
+    return evaluated
@@ -0,0 +1,152 @@
+import json
+import bisect
+
+import numpy as np
+
+"""
+element_states.py
+
+State of the elements in each frame of a log (the fields of STATE_FIELDS of the element dicts of the Game), delta encoded:
+every keyframe_interval frames a keyframe holds the whole table, the other frames only the fields changed from the previous
+frame (the ball and paddle positions, the bricks hit). An element no longer present is recorded as None.
+Each frame is a json record {description: {field: value}}, the records are stored as one byte array (element_states) with
+the offsets of the frames (element_state_offsets, n_frames + 1) and the frame ids of the keyframes (state_keyframes).
+
+Functions:
+- ElementStateEncoder.__init__(self, keyframe_interval= 50)
+  Create an encoder, one record per frame.
+
+- ElementStateEncoder.encode(self, elements: dict) -> tuple[bytes, bool]
+  Record of the next frame from the element dicts of the Game (copied, the dicts can change afterwards) and whether it is a keyframe.
+
+- ElementStateEncoder.arrays(records: list[bytes], keyframes: list[int]) -> dict[str, np.ndarray]
+  The element_states, element_state_offsets and state_keyframes arrays of the records.
+
+- ElementStates.__init__(self, element_states: np.ndarray, element_state_offsets: np.ndarray, state_keyframes: np.ndarray)
+  Reader of the encoded states, ElementStates(**arrays).
+
+- ElementStates.state_at(self, frame_id) -> dict[str, dict]
+  State of the elements in the frame, rebuilt from the previous keyframe in O(distance to the keyframe). Also states[frame_id].
+
+- load_element_states(path) -> ElementStates
+  Element states of a columnar (.npz) or streaming (.stream) log.
+
+Dependencies:
+- numpy
+"""
+
+STATE_FIELDS = ('pos', 'hitbox', 'color', 'state', 'alive')
+
+def _freeze(value):
+
+    if isinstance(value, dict): return {k: _freeze(v) for k, v in value.items()}
+    if isinstance(value, (list, tuple)): return tuple(_freeze(v) for v in value)
+
+    return value
+
+class ElementStateEncoder:
+
+    def __init__(self, keyframe_interval= 50):
+
+        if keyframe_interval < 1: raise Exception('ElementStateEncoder.__init__ error: keyframe_interval must be at least 1')
+
+        self._keyframe_interval = keyframe_interval
+        self._previous: dict[str, dict] = {}
+        self._n_frames = 0
+
+    @property
+    def keyframe_interval(self) -> int:
+        return self._keyframe_interval
+
+    def encode(self, elements: dict) -> tuple[bytes, bool]:
+
+        current = {description: {field: _freeze(elem[field]) for field in STATE_FIELDS if field in elem} for description, elem in elements.items()}
+        keyframe = self._n_frames % self._keyframe_interval == 0
+
+        if keyframe: record = current
+
+        else:
+            record = {}
+            for description, fields in current.items():
+                previous = self._previous.get(description)
+                if previous is None: record[description] = fields
+                else:
+                    changed = {field: value for field, value in fields.items() if previous.get(field) != value}
+                    if changed: record[description] = changed
+
+            for description in self._previous:
+                if description not in current: record[description] = None
+
+        self._previous = current
+        self._n_frames += 1
+
+        return json.dumps(record, separators= (',', ':')).encode(), keyframe
+
+    @staticmethod
+    def arrays(records: list[bytes], keyframes: list[int]) -> dict[str, np.ndarray]:
+
+        offsets = np.zeros(len(records) + 1, dtype= np.int64)
+        offsets[1:] = np.cumsum([len(record) for record in records])
+
+        return {
+            'element_states': np.frombuffer(b''.join(records), dtype= np.uint8),
+            'element_state_offsets': offsets,
+            'state_keyframes': np.array(keyframes, dtype= np.int64),
+        }
+
+
+class ElementStates:
+
+    def __init__(self, element_states: np.ndarray, element_state_offsets: np.ndarray, state_keyframes: np.ndarray):
+
+        self._data = element_states
+        self._offsets = element_state_offsets
+        self._keyframes = state_keyframes.tolist()
+
+    def __len__(self):
+        return len(self._offsets) - 1
+
+    def __repr__(self):
+        return f'ElementStates({len(self)} frames, {len(self._keyframes)} keyframes)'
+
+    def __getitem__(self, frame_id) -> dict[str, dict]:
+        return self.state_at(frame_id)
+
+    @property
+    def keyframes(self) -> list[int]:
+        return self._keyframes
+
+    def record(self, frame_id) -> dict:
+        return json.loads(self._data[self._offsets[frame_id]:self._offsets[frame_id + 1]].tobytes())
+
+    def state_at(self, frame_id) -> dict[str, dict]:
+
+        if frame_id < 0: frame_id += len(self)
+        if not 0 <= frame_id < len(self): raise IndexError('ElementStates index out of range')
+
+        k = bisect.bisect_right(self._keyframes, frame_id) - 1
+        if k < 0: raise Exception(f'ElementStates.state_at error: no keyframe before frame {frame_id}')
+
+        states = {description: _freeze(fields) for description, fields in self.record(self._keyframes[k]).items()}
+        for i in range(self._keyframes[k] + 1, frame_id + 1):
+            for description, fields in self.record(i).items():
+                if fields is None: states.pop(description, None)
+                elif description in states: states[description].update(_freeze(fields))
+                else: states[description] = _freeze(fields)
+
+        return states
+
+
+def load_element_states(path) -> ElementStates:
+
+    if path.endswith('.stream'):
+        from .streaming_log import read_streaming_log
+        log = read_streaming_log(path)
+
+    else:
+        with np.load(path, allow_pickle= False) as npz:
+            log = {name: npz[name] for name in npz.files}
+
+    if 'element_states' not in log: raise Exception(f'load_element_states error: {path} has no element states')
+
+    return ElementStates(log['element_states'], log['element_state_offsets'], log['state_keyframes'])
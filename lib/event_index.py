@@ -0,0 +1,107 @@
+import numpy as np
+
+"""
+event_index.py
+
+Functions:
+- __init__(self)
+  Create an empty EventIndex, to be filled frame by frame with add and then closed with build.
+
+- add(self, frame_id: int, event_type_id: int, element_id: int) -> None
+  Record that an event of type event_type_id happened on element_id in frame frame_id.
+
+- build(self, n_frames: int = None) -> 'EventIndex'
+  Convert the collected frame lists in sorted numpy arrays and fix the number of frames.
+
+- from_events(events_per_frame: list[list[Event]]) -> 'EventIndex'
+  Build the index of an already loaded log.
+
+- frames(self, event_type_id, element_id) -> np.ndarray
+  Sorted frame numbers in which the (event_type, element) pair happened, one entry per occurrence.
+
+- pairs(self, frame_id) -> frozenset[tuple[int, int]]
+  The (event_type, element) pairs that happened in the frame.
+
+- subjects(self, frame_id) -> frozenset[int]
+  The elements that are subject of at least one event in the frame.
+
+- occurs(self, frame_id, event_type_id, element_id) -> bool
+
+- follows(self, trigger_id, effect_id, element_id) -> int
+  Number of occurrences of the trigger on the element (in frames that have a next frame) followed by the effect on the same element in the next frame, computed as a shifted array lookup.
+
+Dependencies:
+- numpy
+"""
+
+class EventIndex:
+
+    def __init__(self):
+
+        self._frames: dict[tuple[int, int], list[int] | np.ndarray] = {}
+        self._pairs: list[set[tuple[int, int]]] = []
+        self._n_frames = 0
+        self._built = False
+
+    @property
+    def n_frames(self) -> int:
+        return self._n_frames
+
+    @property
+    def keys(self) -> list[tuple[int, int]]:
+        return list(self._frames.keys())
+
+    def __repr__(self):
+        return f'EventIndex({self._n_frames} frames, {len(self._frames)} (event_type, element) pairs)'
+
+    def add(self, frame_id: int, event_type_id: int, element_id: int) -> None:
+
+        if self._built: raise Exception('EventIndex.add error: index already built')
+
+        while len(self._pairs) <= frame_id: self._pairs.append(set())
+
+        self._pairs[frame_id].add((event_type_id, element_id))
+        self._frames.setdefault((event_type_id, element_id), []).append(frame_id)
+
+    def build(self, n_frames: int = None) -> 'EventIndex':
+
+        if n_frames is None: n_frames = len(self._pairs)
+        while len(self._pairs) < n_frames: self._pairs.append(set())
+
+        self._n_frames = n_frames
+        self._frames = {key: np.sort(np.array(frames, dtype= np.int64)) for key, frames in self._frames.items()}
+        self._pairs = [frozenset(pairs) for pairs in self._pairs]
+        self._subjects = [frozenset(element_id for _, element_id in pairs) for pairs in self._pairs]
+        self._built = True
+
+        return self
+
+    @staticmethod
+    def from_events(events_per_frame) -> 'EventIndex':
+
+        event_index = EventIndex()
+        for frame_id, events in enumerate(events_per_frame):
+            for event in events:
+                event_index.add(frame_id, event.event_type.id, event.subject.id)
+
+        return event_index.build(len(events_per_frame))
+
+    def frames(self, event_type_id, element_id) -> np.ndarray:
+        if (event_type_id, element_id) in self._frames: return self._frames[event_type_id, element_id]
+        return np.empty(0, dtype= np.int64)
+
+    def pairs(self, frame_id) -> frozenset[tuple[int, int]]:
+        return self._pairs[frame_id]
+
+    def subjects(self, frame_id) -> frozenset[int]:
+        return self._subjects[frame_id]
+
+    def occurs(self, frame_id, event_type_id, element_id) -> bool:
+        return (event_type_id, element_id) in self._pairs[frame_id]
+
+    def follows(self, trigger_id, effect_id, element_id) -> int:
+
+        trigger_frames = self.frames(trigger_id, element_id)
+        trigger_frames = trigger_frames[trigger_frames < self._n_frames - 1]
+
+        return int(np.count_nonzero(np.isin(trigger_frames + 1, self.frames(effect_id, element_id))))
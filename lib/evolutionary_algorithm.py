@@ -1,38 +1,117 @@
 import math
 import time
+import heapq
 import random
+import concurrent.futures
 
+from .async_evaluator import AsyncEvaluator
+from .category_memo import CategoryMemo
+from .checkpoint import CheckpointWriter, load_checkpoint
 from .classes import Individual
+from .distributed_evaluator import DistributedEvaluator
+from .event_index import EventIndex
+from .fitness_cache import FitnessCache
+from .mapped_recording import MappedEvents
+from .parallel_evaluator import ParallelEvaluator
+from .population_evaluator import PopulationEvaluator
+from .transition_statistics import TransitionStatistics
 from .utils import ID_creator, format_time
 
 """
 evolutionary_algorithm.py
 
 Functions:
-- __init__(self, element_pool, event_pool, events_per_frame)
+- __init__(self, element_pool, event_pool, events_per_frame, event_index= None, batch_evaluation= True, cache_size= None, workers= None, category_memo_size= None, copy_on_write= False, broker_address= None, broker_authkey= None)
   Create and initialize the EvolutionaryAlgorithm class, with the element_pool, the event_pool. also initialize the id_generators.
+  The transition statistics of the log are computed once here (from the event_index, built if not passed) and used for all the fitness evaluations.
+  If events_per_frame are the events of a MappedRecording, no event_index is built: the statistics are computed on its mapped arrays.
+  With batch_evaluation the whole population is scored at once by a PopulationEvaluator, otherwise one individual at a time
+  (offspring only recompute the contributions touched by their mutation, see Individual.compute_fitness_5).
+  If cache_size is set, the fitness of already seen genomes is taken from a FitnessCache of cache_size entries.
+  With workers > 1 the evaluation is split over a pool of worker processes (see ParallelEvaluator).
+  With broker_address the evaluation is sent to the workers (local or on other hosts) that connect to the broker on that address
+  with broker_authkey, required (see DistributedEvaluator and evaluation_worker.py).
+  If category_memo_size is set, the individuals are evaluated scanning the log (compute_fitness_4) with a CategoryMemo of category_memo_size
+  entries shared by the whole population, so only the categories never seen before are scanned; batch_evaluation is then ignored
+  and it can not be combined with workers or broker_address (raises).
+  With copy_on_write the offspring share objects, rules and categories with their parent and copy only what their mutation changes.
 
 - initialize_population(self, num_individuals= 100) -> 'EvolutionaryAlgorithm'
   Initialize the population.
 
-- run(self, max_generations= 100, num_individuals= 100, patience= None, num_survivors= None) -> None
+- evaluate_population(self, individuals: list[Individual]) -> None
+  Compute the fitness of the individuals not yet evaluated, looking first in the fitness cache (by Individual.fingerprint).
+
+- evolve(self, generations, num_survivors= None) -> None
+  Evolve exactly generations generations (evaluation, selection, repopulation) without prints, patience or checkpoints,
+  then evaluate the new population. Calling it again continues from there (e.g. between the migrations of an IslandModel).
+
+- run(self, max_generations= 100, patience= None, num_survivors= None, verbose= True, checkpoint_path= None, checkpoint_every= None, checkpoint_seconds= None) -> None
   Run the evolutionary algorithm. (fitness and mutation are contained in individual.py)
+  It can be called again to continue the evolution of the current population. With verbose= False nothing is printed.
+  With checkpoint_path a checkpoint (see checkpoint.py) is written every checkpoint_every generations and/or every
+  checkpoint_seconds seconds, by a background thread.
+
+- run_steady_state(self, max_evaluations= 10000, tournament_size= 3, offspring_per_step= 1, patience= None, verbose= True) -> None
+  Steady state alternative to run: at each step offspring_per_step parents are chosen by tournament (the best of
+  tournament_size random individuals), cloned and mutated, the offspring are evaluated and each one replaces the worst
+  individual of the population if it is not worse. The worst individual is kept at the top of a heap, so there is no sort
+  of the whole population. Stop after max_evaluations offspring or patience offspring without a new best fitness
+  (max_evaluations // 10 by default). The lifespans are not used.
+
+- run_async(self, max_evaluations= 10000, tournament_size= 3, workers= None, executor= 'process', in_flight= None, patience= None, verbose= True) -> None
+  Steady state evolution (see run_steady_state) as a pipeline: the offspring are produced while the previous ones are
+  evaluated by an AsyncEvaluator of workers processes or threads (executor), in_flight offspring at a time (2 per worker by
+  default), and each one enters the selection as soon as its evaluation completes, so no worker waits for the slowest one.
+  The fitness cache is used, the category memo is not.
+
+- checkpoint_state(self, generation, last_best_gen, max_generations, patience, num_survivors) -> dict
+  State of the run at the start of the generation: configuration, old_best, population, state of random.
+
+- resume_from(self, path, verbose= True, checkpoint_every= None, checkpoint_seconds= None) -> None
+  Restore a checkpoint and continue its run, exactly as if it was never stopped (same population, fitness and random numbers).
+  The new checkpoints are written over the same file.
 
 - get_winner(self) -> Individual
   Return the winner of the last run.
 
+- close(self) -> None
+  Stop the worker processes (or the broker and its workers), if any.
+
 Dependencies:
 -
 """
 
 class EvolutionaryAlgorithm:
 
-    def __init__(self, element_pool, event_pool, events_per_frame):
+    def __init__(self, element_pool, event_pool, events_per_frame, event_index: EventIndex = None, batch_evaluation= True, cache_size= None, workers= None, category_memo_size= None, copy_on_write= False, broker_address= None, broker_authkey= None):
 
         self.element_pool = element_pool
         self.events_per_frame = events_per_frame
         self.event_pool = event_pool
 
+        if event_index is None and not isinstance(events_per_frame, MappedEvents): event_index = EventIndex.from_events(events_per_frame)
+        self.event_index = event_index
+        self.statistics = TransitionStatistics(element_pool, event_pool, events_per_frame, event_index)
+
+        # the memo scans the log in this process: a pool of workers would never be used
+        if category_memo_size and (broker_address is not None or (workers is not None and workers > 1)):
+            raise Exception('EvolutionaryAlgorithm.__init__ error: category_memo_size can not be used with workers or broker_address')
+
+        if category_memo_size: self.evaluator = None
+        elif broker_address is not None: self.evaluator = DistributedEvaluator(element_pool, event_pool, events_per_frame, broker_address, broker_authkey)
+        elif workers is not None and workers > 1: self.evaluator = ParallelEvaluator(element_pool, event_pool, events_per_frame, workers)
+        elif batch_evaluation: self.evaluator = PopulationEvaluator(self.statistics)
+        else: self.evaluator = None
+
+        if cache_size: self.fitness_cache = FitnessCache(cache_size)
+        else: self.fitness_cache = None
+
+        if category_memo_size: self.category_memo = CategoryMemo(category_memo_size)
+        else: self.category_memo = None
+
+        self.copy_on_write = copy_on_write
+
         self.population = []
 
         self.get_object_id = ID_creator().get_id
@@ -41,12 +120,92 @@ class EvolutionaryAlgorithm:
 
         self.old_best = - math.inf
 
+        self._resume = None # (generation, last_best_gen) of a checkpoint, see resume_from
+
     def initialize_population(self, num_individuals= 100, lifespan= 1) -> 'EvolutionaryAlgorithm':
         self.population = [Individual(self.element_pool, self.event_pool, lifespan= lifespan).initialize() for _ in range(num_individuals)]
         return self
 
+    def evaluate_population(self, individuals: list[Individual]) -> None:
+
+        to_evaluate = [ind for ind in individuals if not ind.evaluated]
+
+        if self.fitness_cache is not None:
+
+            missing: dict[tuple, list[Individual]] = {}
+            for ind in to_evaluate:
+                key = ind.fingerprint()
+                fitness = self.fitness_cache.get(key)
+                if fitness is not None: ind.set_fitness(fitness)
+                else: missing.setdefault(key, []).append(ind)
+
+            # identical genomes are evaluated only once
+            to_evaluate = [inds[0] for inds in missing.values()]
+
+        if self.category_memo is not None:
+            for individual in to_evaluate: individual.compute_fitness(self.events_per_frame, event_index= self.event_index, memo= self.category_memo)
+        elif self.evaluator is not None: self.evaluator.evaluate(to_evaluate)
+        else:
+            for individual in to_evaluate: individual.compute_fitness(self.events_per_frame, statistics= self.statistics)
+
+        if self.fitness_cache is not None:
+            for key, inds in missing.items():
+                self.fitness_cache.put(key, inds[0].fitness)
+                for ind in inds[1:]: ind.set_fitness(inds[0].fitness)
+
+
+    def _select_survivors(self, num_survivors) -> list[Individual]:
+
+        #survivors = sorted(self.population, key= lambda ind: ind.fitness, reverse= True)[:num_survivors] # without lifespan
+        survivors = []
+        for i, ind in enumerate(sorted(self.population, key= lambda ind: ind.fitness, reverse= True)): # with lifespan
+            if i < num_survivors: life = ind.reset_lifespan()
+            else: life = ind.reduce_lifespan()
+            if life > 0: survivors.append(ind)
+
+        return survivors
+
+    def _repopulate(self, survivors: list[Individual]) -> list[Individual]:
+
+        # Repopulation
+
+        offspring: list[Individual] = []
+
+        # add the survivors untouched or not ?
+
+        offspring.extend(survivors) # directly
+        #offspring.append(survivors[0]) # only the best one
 
-    def run(self, max_generations= 100, patience= None, num_survivors= None) -> None:
+        # one garanteed mutation per survivor ?
+
+        for survivor in survivors:
+            survivor_clone = Individual(self.element_pool, self.event_pool, survivor, copy_on_write= self.copy_on_write).mutate() # clone and mutate one time
+            #for _ in range(random.randint(0, 5)): survivor_clone.mutate() # more random mutations ?
+            offspring.append(survivor_clone)
+
+        # Mutation
+
+        while len(offspring) < len(self.population):
+            offspring.append(Individual(self.element_pool, self.event_pool, random.choice(survivors), copy_on_write= self.copy_on_write).mutate())
+
+        return offspring
+
+    def evolve(self, generations, num_survivors= None) -> None:
+
+        if num_survivors is None: num_survivors = len(self.population) // 5
+
+        for _ in range(generations):
+
+            self.evaluate_population(self.population)
+
+            survivors = self._select_survivors(num_survivors)
+            if survivors[0].fitness > self.old_best: self.old_best = survivors[0].fitness
+
+            self.population = self._repopulate(survivors)
+
+        self.evaluate_population(self.population)
+
+    def run(self, max_generations= 100, patience= None, num_survivors= None, verbose= True, checkpoint_path= None, checkpoint_every= None, checkpoint_seconds= None) -> None:
 
         # setting loop config
 
@@ -58,80 +217,282 @@ class EvolutionaryAlgorithm:
 
         if num_survivors is None: num_survivors = len(self.population) // 5
 
+        if self._resume is None: start_gen, last_best_gen = 0, 0
+        else: start_gen, last_best_gen = self._resume
+        self._resume = None
+
+        # checkpoints are written by a background thread, at the start of a generation
+        checkpoint_writer = None
+        if checkpoint_path is not None and (checkpoint_every or checkpoint_seconds): checkpoint_writer = CheckpointWriter(checkpoint_path)
+        last_checkpoint_time = time.time()
+
         # evolution loop start
 
-        for gen_id in range(max_generations):
+        try:
 
-            # print messages
+            for gen_id in range(start_gen, max_generations):
 
-            if gen_id > 0: print(f"\r{gen_id}/{max_generations} - eta: {format_time((((time.time() - starting_time) / gen_id) * (max_generations - gen_id)) * 2)}                  ", end= '')
-            else: print(f"{gen_id}/{max_generations}", end= '')
+                # checkpoint
 
-            # Evaluation
+                if checkpoint_writer is not None and gen_id > start_gen:
+                    if (checkpoint_every and gen_id % checkpoint_every == 0) or (checkpoint_seconds and time.time() - last_checkpoint_time >= checkpoint_seconds):
+                        checkpoint_writer.write(self.checkpoint_state(gen_id, last_best_gen, max_generations, patience, num_survivors))
+                        last_checkpoint_time = time.time()
 
-            for individual in self.population: individual.compute_fitness(self.events_per_frame)
+                # print messages
 
-            # Selection
+                if verbose:
+                    if gen_id > start_gen: print(f"\r{gen_id}/{max_generations} - eta: {format_time((((time.time() - starting_time) / (gen_id - start_gen)) * (max_generations - gen_id)) * 2)}                  ", end= '')
+                    else: print(f"{gen_id}/{max_generations}", end= '')
 
-            #survivors = sorted(self.population, key= lambda ind: ind.fitness, reverse= True)[:num_survivors] # without lifespan
-            survivors = []
-            for i, ind in enumerate(sorted(self.population, key= lambda ind: ind.fitness, reverse= True)): # with lifespan
-                if i < num_survivors: life = ind.reset_lifespan()
-                else: life = ind.reduce_lifespan()
-                if life > 0: survivors.append(ind)
+                # Evaluation
 
-            #print fitness improvement
+                self.evaluate_population(self.population)
 
-            best_fitness = survivors[0].fitness
-            if best_fitness > self.old_best:
+                # Selection
 
-                last_best_gen = gen_id
-                self.old_best = best_fitness
-                
-                print(f'\rgeneration {gen_id}                                   ', end= '')
-                print(f'\nnew best fitness: {best_fitness}')
-                if gen_id > 0: print(f"\n{gen_id}/{max_generations} - eta: {format_time((((time.time() - starting_time) / gen_id) * (max_generations - gen_id)) * 2)}                      ", end= '')
-                else: print(f"\n{gen_id}/{max_generations}                      ", end= '')
+                survivors = self._select_survivors(num_survivors)
 
-            ok = True
-            try:
-                # Repopulation
+                #print fitness improvement
 
-                offspring: list[Individual] = []
+                best_fitness = survivors[0].fitness
+                if best_fitness > self.old_best:
 
-                # add the survivors untouched or not ?
+                    last_best_gen = gen_id
+                    self.old_best = best_fitness
 
-                offspring.extend(survivors) # directly
-                #offspring.append(survivors[0]) # only the best one
+                    if verbose:
+                        print(f'\rgeneration {gen_id}                                   ', end= '')
+                        print(f'\nnew best fitness: {best_fitness}')
+                        if gen_id > start_gen: print(f"\n{gen_id}/{max_generations} - eta: {format_time((((time.time() - starting_time) / (gen_id - start_gen)) * (max_generations - gen_id)) * 2)}                      ", end= '')
+                        else: print(f"\n{gen_id}/{max_generations}                      ", end= '')
 
-                # one garanteed mutation per survivor ?
+                ok = True
+                try:
+                    offspring = self._repopulate(survivors)
 
-                for survivor in survivors:
-                    survivor_clone = Individual(self.element_pool, self.event_pool, survivor).mutate() # clone and mutate one time
-                    #for _ in range(random.randint(0, 5)): survivor_clone.mutate() # more random mutations ?
-                    offspring.append(survivor_clone)
+                except KeyboardInterrupt:
+                    print('evolution stopped by user request')
+                    ok = False
 
-                # Mutation
+                # Replace old population with offspring
+                if (gen_id < max_generations - 1) and ok:
+                    self.population = offspring
 
-                while len(offspring) < len(self.population):
-                    offspring.append(Individual(self.element_pool, self.event_pool, random.choice(survivors)).mutate())
-            
-            except KeyboardInterrupt:
-                print('evolution stopped by user request')
-                ok = False
+                # Termination conditions
 
-            # Replace old population with offspring
-            if (gen_id < max_generations - 1) and ok:
-                self.population = offspring
+                if ((gen_id - last_best_gen) > patience) or not ok:
+                    if verbose: print('terminated for lack of patience')
+                    break
 
-            # Termination conditions
+        finally:
+            if checkpoint_writer is not None: checkpoint_writer.close()
 
-            if ((gen_id - last_best_gen) > patience) or not ok:
-                print('terminated for lack of patience')
-                break
+        if not verbose: return
 
         print(f"\rTotal run time: {format_time(time.time() - starting_time)}", end= '')
+        if self.fitness_cache is not None: print(f'\nfitness cache: {self.fitness_cache.hits} hits, {self.fitness_cache.misses} misses', end= '')
+        if self.category_memo is not None: print(f'\ncategory memo: {self.category_memo.hits} hits, {self.category_memo.misses} misses', end= '')
+        print('\n-------------------------------------------')
+
+    def _worst_heap(self) -> list[tuple]:
+        # min heap of (fitness, insertion order, slot in the population): the worst individual is always heap[0]
+        heap = [(ind.fitness, slot, slot) for slot, ind in enumerate(self.population)]
+        heapq.heapify(heap)
+        return heap
+
+    def _tournament_offspring(self, tournament_size) -> Individual:
+        parent = max((self.population[random.randrange(len(self.population))] for _ in range(tournament_size)), key= lambda ind: ind.fitness)
+        return Individual(self.element_pool, self.event_pool, parent, copy_on_write= self.copy_on_write).mutate()
+
+    def _replace_worst(self, heap: list[tuple], child: Individual, counter: int) -> bool:
+        # the child takes the slot of the worst individual, unless it is worse
+        if child.fitness < heap[0][0]: return False
+        slot = heap[0][2]
+        self.population[slot] = child
+        heapq.heapreplace(heap, (child.fitness, counter, slot))
+        return True
+
+    def run_steady_state(self, max_evaluations= 10000, tournament_size= 3, offspring_per_step= 1, patience= None, verbose= True) -> None:
+
+        starting_time = time.time()
+
+        if not self.population: raise Exception('EvolutionaryAlgorithm.run_steady_state error: the population is not initialized')
+        if patience is None: patience = max(max_evaluations // 10, 1)
+        tournament_size = min(tournament_size, len(self.population))
+
+        self.evaluate_population(self.population)
+
+        heap = self._worst_heap()
+        counter = len(self.population)
+
+        best_fitness = max(ind.fitness for ind in self.population)
+        if best_fitness > self.old_best: self.old_best = best_fitness
+        last_best_evaluation = 0
+
+        evaluations = 0
+        replaced = 0
+        try:
+            while evaluations < max_evaluations:
+
+                # Selection (tournament) and mutation
+
+                offspring: list[Individual] = []
+                for _ in range(min(offspring_per_step, max_evaluations - evaluations)): offspring.append(self._tournament_offspring(tournament_size))
+
+                # Evaluation
+
+                self.evaluate_population(offspring)
+                evaluations += len(offspring)
+
+                # Replacement of the worst individual
+
+                for child in offspring:
+                    if not self._replace_worst(heap, child, counter): continue
+                    counter += 1
+                    replaced += 1
+
+                    if child.fitness > self.old_best:
+                        self.old_best = child.fitness
+                        last_best_evaluation = evaluations
+                        if verbose: print(f'\revaluation {evaluations}/{max_evaluations} - new best fitness: {child.fitness} - eta: {format_time(((time.time() - starting_time) / evaluations) * (max_evaluations - evaluations))}              ')
+
+                # Termination conditions
+
+                if (evaluations - last_best_evaluation) > patience:
+                    if verbose: print('terminated for lack of patience')
+                    break
+
+        except KeyboardInterrupt:
+            print('evolution stopped by user request')
+
+        if not verbose: return
+
+        print(f"\rTotal run time: {format_time(time.time() - starting_time)}, {evaluations} evaluations, {replaced} replacements", end= '')
+        if self.fitness_cache is not None: print(f'\nfitness cache: {self.fitness_cache.hits} hits, {self.fitness_cache.misses} misses', end= '')
+        if self.category_memo is not None: print(f'\ncategory memo: {self.category_memo.hits} hits, {self.category_memo.misses} misses', end= '')
+        print('\n-------------------------------------------')
+
+    def run_async(self, max_evaluations= 10000, tournament_size= 3, workers= None, executor= 'process', in_flight= None, patience= None, verbose= True) -> None:
+
+        starting_time = time.time()
+
+        if not self.population: raise Exception('EvolutionaryAlgorithm.run_async error: the population is not initialized')
+        if patience is None: patience = max(max_evaluations // 10, 1)
+        tournament_size = min(tournament_size, len(self.population))
+
+        self.evaluate_population(self.population)
+
+        heap = self._worst_heap()
+        counter = len(self.population)
+
+        best_fitness = max(ind.fitness for ind in self.population)
+        if best_fitness > self.old_best: self.old_best = best_fitness
+        last_best_evaluation = 0
+
+        evaluator = AsyncEvaluator(self.element_pool, self.event_pool, self.events_per_frame, self.statistics, workers, executor)
+        if in_flight is None: in_flight = 2 * evaluator.workers # the workers always have the next offspring ready
+
+        pending: dict[concurrent.futures.Future, tuple[Individual, tuple]] = {}
+        evaluations = 0
+        submitted = 0
+        replaced = 0
+        try:
+            while evaluations < max_evaluations:
+
+                # Producer: clone and mutate tournament winners while the workers are scoring the previous offspring
+
+                completed: list[Individual] = []
+                while len(pending) < in_flight and submitted < max_evaluations:
+
+                    child = self._tournament_offspring(tournament_size)
+                    submitted += 1
+
+                    key = None
+                    if self.fitness_cache is not None:
+                        key = child.fingerprint()
+                        fitness = self.fitness_cache.get(key)
+                        if fitness is not None:
+                            child.set_fitness(fitness)
+                            completed.append(child)
+                            continue
+
+                    pending[evaluator.submit(child)] = (child, key)
+
+                # Consumer: selection as soon as the evaluations complete
+
+                if not completed:
+                    done, _ = concurrent.futures.wait(pending, return_when= concurrent.futures.FIRST_COMPLETED)
+                    for future in done:
+                        child, key = pending.pop(future)
+                        child.set_fitness(future.result())
+                        if key is not None: self.fitness_cache.put(key, child.fitness)
+                        completed.append(child)
+
+                for child in completed:
+                    evaluations += 1
+                    if not self._replace_worst(heap, child, counter): continue
+                    counter += 1
+                    replaced += 1
+
+                    if child.fitness > self.old_best:
+                        self.old_best = child.fitness
+                        last_best_evaluation = evaluations
+                        if verbose: print(f'\revaluation {evaluations}/{max_evaluations} - new best fitness: {child.fitness} - eta: {format_time(((time.time() - starting_time) / evaluations) * (max_evaluations - evaluations))}              ')
+
+                # Termination conditions
+
+                if (evaluations - last_best_evaluation) > patience:
+                    if verbose: print('terminated for lack of patience')
+                    break
+
+        except KeyboardInterrupt:
+            print('evolution stopped by user request')
+
+        finally:
+            evaluator.close()
+
+        if not verbose: return
+
+        print(f"\rTotal run time: {format_time(time.time() - starting_time)}, {evaluations} evaluations, {replaced} replacements ({evaluator})", end= '')
+        if self.fitness_cache is not None: print(f'\nfitness cache: {self.fitness_cache.hits} hits, {self.fitness_cache.misses} misses', end= '')
         print('\n-------------------------------------------')
 
+    def checkpoint_state(self, generation, last_best_gen, max_generations, patience, num_survivors) -> dict:
+
+        return {
+            'generation': generation,
+            'last_best_gen': last_best_gen,
+            'max_generations': max_generations,
+            'patience': patience,
+            'num_survivors': num_survivors,
+            'old_best': None if self.old_best == - math.inf else self.old_best,
+            'population': [
+                {'genome': ind.to_genome(), 'fitness': ind.fitness if ind.evaluated else None, 'lifespan': ind.lifespan, 'max_lifespan': ind.max_lifespan}
+                for ind in self.population
+            ],
+            'random_state': random.getstate(),
+        }
+
+    def resume_from(self, path, verbose= True, checkpoint_every= None, checkpoint_seconds= None) -> None:
+
+        state = load_checkpoint(path)
+
+        self.population = []
+        for saved in state['population']:
+            individual = Individual.from_genome(self.element_pool, self.event_pool, saved['genome'], lifespan= saved['max_lifespan'])
+            individual.set_lifespan(saved['lifespan'])
+            if saved['fitness'] is not None: individual.set_fitness(saved['fitness'])
+            self.population.append(individual)
+
+        self.old_best = - math.inf if state['old_best'] is None else state['old_best']
+        random.setstate(state['random_state'])
+        self._resume = (state['generation'], state['last_best_gen'])
+
+        self.run(state['max_generations'], state['patience'], state['num_survivors'], verbose, path, checkpoint_every, checkpoint_seconds)
+
     def get_winner(self) -> Individual:
-        return sorted(self.population, key= lambda ind: ind.fitness, reverse= True)[0]
\ No newline at end of file
+        return sorted(self.population, key= lambda ind: ind.fitness, reverse= True)[0]
+
+    def close(self) -> None:
+        if isinstance(self.evaluator, (ParallelEvaluator, DistributedEvaluator)): self.evaluator.close()
\ No newline at end of file
@@ -0,0 +1,26 @@
+from .lru_cache import LRUCache
+
+"""
+fitness_cache.py
+
+Functions:
+- __init__(self, max_size= 10000)
+  Create an empty cache of fitness values, that keeps at most max_size entries evicting the least recently used.
+
+- get(self, key) -> int | None
+  Return the fitness stored for the key (and mark it as recently used), None if not present. Updates hits and misses.
+
+- put(self, key, fitness) -> None
+  Store the fitness of the key, evicting the least recently used entry if the cache is full.
+
+- hit_rate -> float
+  Fraction of the get that found the key.
+
+The eviction and the counters are the ones of LRUCache.
+
+Dependencies:
+-
+"""
+
+class FitnessCache(LRUCache):
+    pass
@@ -0,0 +1,618 @@
+import math
+import random
+import numpy as np
+
+"""
+game.py
+
+Arkanoid simulation, without any display: arkanoid.py draws it with pygame (and reads the keyboard), here it can also be
+stepped as fast as possible with a controller in place of the player to generate logs.
+
+Functions:
+- Game.__init__(self, render= True, seed= None)
+  New game. With render= False the colour grids are not updated (get_grid is not available), only the simulation runs.
+  With a seed the game is reproducible (the start of the ball), otherwise it uses the global random.
+
+- Game.update(self) -> tuple[dict, list[dict], bool]
+  Advance one frame, return the elements, the events of the frame and whether the game ended.
+
+- Game.apply_command(self, command)
+  Apply one of COMMANDS (paddle_left, paddle_stop, paddle_right) to the paddle.
+
+- Game.play(self, controller, log_writer= None, max_frames= None) -> int
+  Play until the game ends (or for max_frames frames), asking the command of each frame to controller(game) -> str.
+  The frames are added to log_writer (ColumnarLogWriter or StreamingLogWriter) as in the interactive game: a first frame with
+  the elements, the frames with game_start in the first one, and a last frame with game_end. Return the number of frames played.
+  Every frame is simulated: the controller looks at the game, its commands are not known in advance (see play_commands).
+
+- Game.free_frames(self) -> int
+  Number of next frames without events, computed from the position and speed of the ball and the hitboxes of the walls and
+  of the bricks (the frames near the rows of the paddle are never free, whatever the commands).
+
+- Game.skip_frames(self, commands: list[str])
+  Advance len(commands) free frames at once, moving the ball and the paddle as the frames would (the paddle by runs of the same command).
+
+- Game.play_commands(self, commands: list[str], log_writer= None, fast_forward= True) -> int
+  Play a known list of commands, as play(ReplayController(commands), log_writer, len(commands)). With fast_forward the free
+  frames are skipped and added as one run with log_writer.add_empty_frames (the writer must not record the element states).
+
+- Game.get_grid(self) -> np.ndarray
+  RGB image of the grid (grid_width, grid_height, 3).
+
+Dependencies:
+- numpy
+"""
+
+grid_width, grid_height = 121, 71
+
+COMMANDS = {'paddle_left': -1, 'paddle_stop': 0, 'paddle_right': 1}
+
+# 0 environment
+# 1 ball
+# 2 paddle_left
+# 3 paddle_center
+# 4 paddle_right
+# 5 wall_left
+# 6 wall_right
+# 7 wall_top
+# 8 wall_bottom
+# 9:34 bricks
+
+class Game:
+
+    def __init__(self, render= True, seed= None):
+
+        self.render = render
+        self.seed = seed
+        self.random = random if seed is None else random.Random(seed)
+        self.elements = {}
+        self.event_log = []
+
+        self.elements['environment'] = {
+            'id': 0,
+            'pos': (grid_width // 2, grid_height // 2),
+            'shape': (grid_width // 2, grid_height // 2),
+            'hitbox': ((0, 0), (grid_width - 1, grid_height - 1)),
+            'color': (0, 0, 0)
+        }
+
+        self.init_grid()
+
+        self.init_walls()
+
+        self.first_brick = 11, 10
+        self.brick_nrow, self.brick_ncol = 3, 8
+        self.brick_distance = 14, 10
+        self.brick_halfwidth, self.brick_halfheight = 5, 2
+
+        self.init_bricks()
+
+        self.paddle_x, self.paddle_y = 60, 60
+        self.paddle_halfwidth, self.paddle_halfheight = 5, 1
+        self.paddle_base_speed = 2
+
+        self.init_paddle()
+
+        self.ball_x, self.ball_y = 40 + self.random.randint(0, 10), 40 + self.random.randint(0, 10)
+        self.ball_radius = 1
+        self.ball_speed_x, self.ball_speed_y = 1, 1
+
+        self.init_ball()
+
+        self.event_pending = []
+
+
+    def init_grid(self):
+
+        self.grid = np.zeros((grid_width, grid_height), dtype= int)
+        self.r = np.zeros((grid_width, grid_height), dtype= int)
+        self.g = np.zeros((grid_width, grid_height), dtype= int)
+        self.b = np.zeros((grid_width, grid_height), dtype= int)
+
+
+    def init_walls(self):
+
+        self.grid[0:3, 3:grid_height - 3] = 5 # left wall
+        self.r[0:3, 3:grid_height - 3] = 0
+        self.g[0:3, 3:grid_height - 3] = 255
+        self.b[0:3, 3:grid_height - 3] = 50
+
+        self.elements['wall_left'] = {
+            'id': 5,
+            'pos': (1, math.floor(grid_height / 2)),
+            'shape': (1, math.floor(grid_height / 2)),
+            'hitbox': ((0, 3), (2, grid_height - 4)),
+            'color': (0, 255, 50),
+            'state': {
+                'color_state': 0,
+            }
+        }
+
+        self.grid[grid_width - 3:grid_width, 3:grid_height - 3] = 6 # right wall
+        self.r[grid_width - 3:grid_width, 3:grid_height - 3] = 0
+        self.g[grid_width - 3:grid_width, 3:grid_height - 3] = 255
+        self.b[grid_width - 3:grid_width, 3:grid_height - 3] = 100
+
+        self.elements['wall_right'] = {
+            'id': 6,
+            'pos': (grid_width - 2, math.floor(grid_height / 2)),
+            'shape': (1, math.floor(grid_height / 2)),
+            'hitbox': ((grid_width - 3, 3), (grid_width - 1, grid_height - 4)),
+            'color': (0, 255, 100),
+            'state': {
+                'color_state': 0,
+            }
+        }
+
+        self.grid[3:grid_width - 3, 0:3] = 7 # top wall
+        self.r[3:grid_width - 3, 0:3] = 0
+        self.g[3:grid_width - 3, 0:3] = 255
+        self.b[3:grid_width - 3, 0:3] = 150
+
+        self.elements['wall_top'] = {
+            'id': 7,
+            'pos': (math.floor(grid_width / 2), 1),
+            'shape': (math.floor(grid_width / 2), 1),
+            'hitbox': ((3, 0), (grid_width - 4, 2)),
+            'color': (0, 255, 150),
+            'state': {
+                'color_state': 0,
+            }
+        }
+
+        self.grid[3:grid_width - 3, grid_height - 3:grid_height] = 8 # bottom wall
+        self.r[3:grid_width - 3, grid_height - 3:grid_height] = 0
+        self.g[3:grid_width - 3, grid_height - 3:grid_height] = 255
+        self.b[3:grid_width - 3, grid_height - 3:grid_height] = 200
+
+        self.elements['wall_bottom'] = {
+            'id': 8,
+            'pos': (math.floor(grid_width / 2), grid_height - 2),
+            'shape': (math.floor(grid_width / 2), 1),
+            'hitbox': ((3, grid_height - 3), (grid_width - 4, grid_height - 1)),
+            'color': (0, 255, 150),
+            'state': {
+                'color_state': 0,
+            }
+        }
+
+
+    def init_bricks(self):
+
+        self.brick_positions = [(self.first_brick[0] + j * self.brick_distance[0], self.first_brick[1] + i * self.brick_distance[1]) for j in range(self.brick_ncol) for i in range(self.brick_nrow)]
+        self.bricks_alive = len(self.brick_positions)
+
+        for i, brick_pos in enumerate(self.brick_positions):
+
+            self.grid[brick_pos[0] - self.brick_halfwidth:brick_pos[0] + self.brick_halfwidth + 1, brick_pos[1] - self.brick_halfheight:brick_pos[1] + self.brick_halfheight + 1] = i + 9
+            self.r[brick_pos[0] - self.brick_halfwidth:brick_pos[0] + self.brick_halfwidth + 1, brick_pos[1] - self.brick_halfheight:brick_pos[1] + self.brick_halfheight + 1] = 255
+            self.g[brick_pos[0] - self.brick_halfwidth:brick_pos[0] + self.brick_halfwidth + 1, brick_pos[1] - self.brick_halfheight:brick_pos[1] + self.brick_halfheight + 1] = 255
+            self.b[brick_pos[0] - self.brick_halfwidth:brick_pos[0] + self.brick_halfwidth + 1, brick_pos[1] - self.brick_halfheight:brick_pos[1] + self.brick_halfheight + 1] = 255
+            
+            self.elements[f'brick_{i}'] = {
+                'id': i + 9,
+                'pos': brick_pos,
+                'shape': (self.brick_halfwidth, self.brick_halfheight),
+                'hitbox': ((brick_pos[0] - self.brick_halfwidth, brick_pos[1] - self.brick_halfheight), (brick_pos[0] + self.brick_halfwidth, brick_pos[1] + self.brick_halfheight)),
+                'color': (255, 255, 255),
+                'state': {
+                    'never_hit': True,
+                },
+            }
+
+
+    def hit_brick(self, id):
+
+        brick_id = id - 9
+        brick_pos = self.brick_positions[brick_id]
+
+        if False:
+        #if self.elements[f'brick_{brick_id}']['state']['never_hit']: # first hit change color, the second destroy the brick
+
+            self.r[brick_pos[0] - self.brick_halfwidth:brick_pos[0] + self.brick_halfwidth + 1, brick_pos[1] - self.brick_halfheight:brick_pos[1] + self.brick_halfheight + 1] = 0
+
+            self.elements[f'brick_{brick_id}']['state']['never_hit'] = False
+
+            self.event_log.append({
+                'description': 'change_color',
+                'subject': id
+            })
+
+        else:
+        
+            self.grid[brick_pos[0] - self.brick_halfwidth:brick_pos[0] + self.brick_halfwidth + 1, brick_pos[1] - self.brick_halfheight:brick_pos[1] + self.brick_halfheight + 1] = 0
+            if self.render:
+                self.r[brick_pos[0] - self.brick_halfwidth:brick_pos[0] + self.brick_halfwidth + 1, brick_pos[1] - self.brick_halfheight:brick_pos[1] + self.brick_halfheight + 1] = 0
+                self.g[brick_pos[0] - self.brick_halfwidth:brick_pos[0] + self.brick_halfwidth + 1, brick_pos[1] - self.brick_halfheight:brick_pos[1] + self.brick_halfheight + 1] = 0
+                self.b[brick_pos[0] - self.brick_halfwidth:brick_pos[0] + self.brick_halfwidth + 1, brick_pos[1] - self.brick_halfheight:brick_pos[1] + self.brick_halfheight + 1] = 0
+            
+            self.elements[f'brick_{brick_id}']['alive'] = False
+            self.event_log.append({
+                'description': 'disappearance',
+                'subject': id
+            })
+            self.bricks_alive -= 1
+
+    def hit_wall(self, id):
+
+        match(id):
+
+            case 5: # wall_left
+                color_state = self.elements['wall_left']['state']['color_state'] + 1
+                if color_state == 3: color_state = 0
+                self.elements['wall_left']['state']['color_state'] = color_state
+
+                if self.render: self.r[0:3, 3:grid_height - 3] = 100 * color_state
+
+            case 6: # wall_right
+                color_state = self.elements['wall_right']['state']['color_state'] + 1
+                if color_state == 3: color_state = 0
+                self.elements['wall_right']['state']['color_state'] = color_state
+
+                if self.render: self.r[grid_width - 3:grid_width, 3:grid_height - 3] = 100 * color_state
+
+            case 7: # wall_top
+                color_state = self.elements['wall_top']['state']['color_state'] + 1
+                if color_state == 3: color_state = 0
+                self.elements['wall_top']['state']['color_state'] = color_state
+
+                if self.render: self.r[3:grid_width - 3, 0:3] = 100 * color_state
+
+            case 8: # wall_bottom
+                color_state = self.elements['wall_bottom']['state']['color_state'] + 1
+                if color_state == 3: color_state = 0
+                self.elements['wall_bottom']['state']['color_state'] = color_state
+
+                if self.render: self.r[3:grid_width - 3, grid_height - 3:grid_height] = 100 * color_state
+
+                self.bricks_alive = 0
+
+        self.event_log.append({
+            'description': 'change_color',
+            'subject': id
+        })
+
+
+    def init_paddle(self):
+        
+        self.paddle_speed = 0
+        self.paddle_old_x, self.paddle_old_y = self.paddle_x, self.paddle_y
+        self.draw_paddle()
+        self.elements['paddle_center'] = {
+            'id': 3,
+            'pos': (self.paddle_x, self.paddle_y),
+            'shape': (self.paddle_halfwidth, self.paddle_halfheight),
+            'hitbox': ((self.paddle_x - self.paddle_halfwidth, self.paddle_y - self.paddle_halfheight), (self.paddle_x + self.paddle_halfwidth, self.paddle_y + self.paddle_halfheight)),
+            'color': (0, 0, 255)
+        }
+
+
+    def set_paddle_speed(self, value):
+        self.paddle_speed = value * self.paddle_base_speed
+
+
+    def update_paddle(self):
+
+        if self.paddle_speed != 0:
+        
+            if (self.paddle_x - self.paddle_halfwidth + self.paddle_speed > 2) and (self.paddle_x + self.paddle_halfwidth + self.paddle_speed < grid_width - 3):
+                if (self.ball_y + self.ball_radius > self.paddle_y - self.paddle_halfheight - 1 and self.ball_y - self.ball_radius < self.paddle_y + self.paddle_halfheight + 1) and (self.ball_x + self.ball_radius > self.paddle_x - self.paddle_halfwidth + self.paddle_speed and self.ball_x - self.ball_radius < self.paddle_x + self.paddle_halfwidth + self.paddle_speed):
+                    pass
+
+                else:
+                    self.paddle_old_x = self.paddle_x
+                    self.paddle_x += self.paddle_speed
+
+            self.elements['paddle_center']['pos'] = (self.paddle_x, self.paddle_y)
+            self.elements['paddle_center']['hitbox'] = ((self.paddle_x - self.paddle_halfwidth, self.paddle_y - self.paddle_halfheight), (self.paddle_x + self.paddle_halfwidth, self.paddle_y + self.paddle_halfheight))
+
+    def draw_paddle(self):
+
+        self.grid[self.paddle_old_x - self.paddle_halfwidth:self.paddle_old_x + self.paddle_halfwidth + 1, self.paddle_old_y - self.paddle_halfheight:self.paddle_old_y + self.paddle_halfheight + 1] = 0
+        self.grid[self.paddle_x - self.paddle_halfwidth:self.paddle_x + self.paddle_halfwidth + 1, self.paddle_y - self.paddle_halfheight:self.paddle_y + self.paddle_halfheight + 1] = 3
+
+        if not self.render: return
+
+#        self.r[self.paddle_old_x - self.paddle_halfwidth:self.paddle_old_x + self.paddle_halfwidth + 1, self.paddle_old_y - self.paddle_halfheight:self.paddle_old_y + self.paddle_halfheight + 1] = 0
+#        self.g[self.paddle_old_x - self.paddle_halfwidth:self.paddle_old_x + self.paddle_halfwidth + 1, self.paddle_old_y - self.paddle_halfheight:self.paddle_old_y + self.paddle_halfheight + 1] = 0
+        self.b[self.paddle_old_x - self.paddle_halfwidth:self.paddle_old_x + self.paddle_halfwidth + 1, self.paddle_old_y - self.paddle_halfheight:self.paddle_old_y + self.paddle_halfheight + 1] = 0
+#        self.r[self.paddle_x - self.paddle_halfwidth:self.paddle_x + self.paddle_halfwidth + 1, self.paddle_y - self.paddle_halfheight:self.paddle_y + self.paddle_halfheight + 1] = 0
+#        self.g[self.paddle_x - self.paddle_halfwidth:self.paddle_x + self.paddle_halfwidth + 1, self.paddle_y - self.paddle_halfheight:self.paddle_y + self.paddle_halfheight + 1] = 0
+        self.b[self.paddle_x - self.paddle_halfwidth:self.paddle_x + self.paddle_halfwidth + 1, self.paddle_y - self.paddle_halfheight:self.paddle_y + self.paddle_halfheight + 1] = 255
+
+
+    def init_ball(self):
+        
+        self.ball_old_x, self.ball_old_y = self.ball_x, self.ball_y
+        self.draw_ball()
+        self.elements['ball'] = {
+            'id': 1,
+            'pos': (self.ball_x, self.ball_y),
+            'shape': (self.ball_radius, self.ball_radius),
+            'hitbox': ((self.ball_x - self.ball_radius, self.ball_y - self.ball_radius), (self.ball_x + self.ball_radius, self.ball_y + self.ball_radius)),
+            'color': (255, 0, 0)
+        }
+
+
+    def update_ball(self):
+        
+        invert_speed_x = False
+        invert_speed_y = False
+
+        collisions = []
+        
+        ball_new_x = self.ball_x + self.ball_speed_x
+        ball_new_y = self.ball_y + self.ball_speed_y
+
+
+        if np.any(self.grid[ball_new_x - self.ball_radius: ball_new_x + self.ball_radius + 1, self.ball_y - self.ball_radius:self.ball_y + self.ball_radius + 1] != 0):
+            invert_speed_x = True
+            collisions.extend(set(list(self.grid[ball_new_x - self.ball_radius: ball_new_x + self.ball_radius + 1, self.ball_y - self.ball_radius:self.ball_y + self.ball_radius + 1].ravel())))
+
+        if np.any(self.grid[self.ball_x - self.ball_radius: self.ball_x + self.ball_radius + 1, ball_new_y - self.ball_radius:ball_new_y + self.ball_radius + 1] != 0):
+            invert_speed_y = True
+            collisions.extend(set(list(self.grid[self.ball_x - self.ball_radius: self.ball_x + self.ball_radius + 1, ball_new_y - self.ball_radius:ball_new_y + self.ball_radius + 1].ravel())))
+
+        if (not invert_speed_x) and (not invert_speed_y):
+            if np.any(self.grid[ball_new_x - self.ball_radius: ball_new_x + self.ball_radius + 1, ball_new_y - self.ball_radius:ball_new_y + self.ball_radius + 1] != 0):
+                invert_speed_x = True
+                invert_speed_y = True
+                collisions.extend(set(list(self.grid[ball_new_x - self.ball_radius: ball_new_x + self.ball_radius + 1, ball_new_y - self.ball_radius:ball_new_y + self.ball_radius + 1].ravel())))
+
+
+        ## qui si ha la collisione, si puo mettere "no movimento" e "disappearance del brick" in coda come eventi nel prossimo frame
+        
+        #if invert_speed_x: self.ball_speed_x = -self.ball_speed_x
+        #if invert_speed_y: self.ball_speed_y = -self.ball_speed_y
+
+        if invert_speed_x or invert_speed_y:
+            if invert_speed_x: self.event_pending.append((self.bounce_x, None))
+            if invert_speed_y: self.event_pending.append((self.bounce_y, None))
+
+        else:
+            self.ball_old_x = self.ball_x
+            self.ball_old_y = self.ball_y
+
+            self.ball_x += self.ball_speed_x
+            self.ball_y += self.ball_speed_y
+        
+        for collision_id in collisions:
+            if collision_id != 0:
+                self.event_log.append({
+                    'description': 'collision',
+                    'subject': 1,
+                    'object': collision_id,
+                })
+                self.event_log.append({
+                    'description': 'collision',
+                    'subject': collision_id,
+                    'object': 1,
+                })
+                if collision_id >= 9:
+                    self.event_pending.append((self.hit_brick, collision_id))
+                
+                elif collision_id >= 5:
+                    self.event_pending.append((self.hit_wall, collision_id))
+
+        ######
+
+        self.elements['ball']['pos'] = (self.ball_x, self.ball_y)
+        self.elements['ball']['hitbox'] = ((self.ball_x - self.ball_radius, self.ball_y - self.ball_radius), (self.ball_x + self.ball_radius, self.ball_y + self.ball_radius))
+
+    def draw_ball(self):
+
+        if not self.render: return
+
+        #self.grid[self.ball_old_x - self.ball_radius:self.ball_old_x + self.ball_radius + 1, self.ball_old_y - self.ball_radius:self.ball_old_y + self.ball_radius] = 0
+        self.r[self.ball_old_x - self.ball_radius:self.ball_old_x + self.ball_radius + 1, self.ball_old_y - self.ball_radius:self.ball_old_y + self.ball_radius + 1] = 0
+#        self.g[self.ball_old_x - self.ball_radius:self.ball_old_x + self.ball_radius + 1, self.ball_old_y - self.ball_radius:self.ball_old_y + self.ball_radius + 1] = 0
+#        self.b[self.ball_old_x - self.ball_radius:self.ball_old_x + self.ball_radius + 1, self.ball_old_y - self.ball_radius:self.ball_old_y + self.ball_radius + 1] = 0
+
+        #self.grid[self.ball_x - self.ball_radius:self.ball_x + self.ball_radius + 1, self.ball_y - self.ball_radius:self.ball_y + self.ball_radius] = 1
+        self.r[self.ball_x - self.ball_radius:self.ball_x + self.ball_radius + 1, self.ball_y - self.ball_radius:self.ball_y + self.ball_radius + 1] = 255
+#        self.g[self.ball_x - self.ball_radius:self.ball_x + self.ball_radius + 1, self.ball_y - self.ball_radius:self.ball_y + self.ball_radius + 1] = 0
+#        self.b[self.ball_x - self.ball_radius:self.ball_x + self.ball_radius + 1, self.ball_y - self.ball_radius:self.ball_y + self.ball_radius + 1] = 0
+
+    def bounce_x(self):
+        self.ball_speed_x = - self.ball_speed_x
+        self.event_log.append({
+            'description': 'bounce',
+            'subject': 1
+        })
+
+    def bounce_y(self):
+        self.ball_speed_y = - self.ball_speed_y
+        self.event_log.append({
+            'description': 'bounce',
+            'subject': 1
+        })
+
+    def resolve_pending(self):
+        for event, param in self.event_pending:
+            if param is None: event()
+            else: event(param)
+        
+        self.event_pending = []
+
+    def update(self):
+        self.resolve_pending()
+        self.update_paddle()
+        self.draw_paddle()
+        self.update_ball()
+        self.draw_ball()
+
+        event_log = self.event_log
+        self.event_log = []
+
+        return self.elements, event_log, (self.bricks_alive == 0)
+    
+    def get_log(self): return self.elements, self.event_log
+    
+    def get_grid(self):
+        if not self.render: raise Exception('Game.get_grid error: game created with render= False')
+        return np.transpose(np.stack([self.r, self.g, self.b]), (1, 2, 0))
+
+    def apply_command(self, command):
+        if command not in COMMANDS: raise Exception(f'Game.apply_command error: unknown command {command}')
+        self.set_paddle_speed(COMMANDS[command])
+
+    def play(self, controller, log_writer= None, max_frames= None) -> int:
+
+        if log_writer is not None: log_writer.add_frame(self.elements, [], [])
+
+        n_frames = 0
+        while max_frames is None or n_frames < max_frames:
+
+            command = controller(self)
+            self.apply_command(command)
+
+            element_log, event_log, end_game = self.update()
+
+            if n_frames == 0:
+                event_log.append({
+                    'description': 'game_start',
+                    'subject': 0
+                })
+
+            if log_writer is not None: log_writer.add_frame(element_log, event_log, [command])
+            n_frames += 1
+
+            if end_game: break
+
+        if log_writer is not None: log_writer.add_frame({}, [{'description': 'game_end', 'subject': 0}], [])
+
+        return n_frames
+
+    def obstacles(self) -> list[tuple[tuple[int, int], tuple[int, int]]]:
+        return [self.elements[wall]['hitbox'] for wall in ('wall_left', 'wall_right', 'wall_top', 'wall_bottom')] + \
+               [self.elements[f'brick_{i}']['hitbox'] for i in range(len(self.brick_positions)) if self.elements[f'brick_{i}'].get('alive', True)]
+
+    def free_frames(self) -> int:
+
+        if self.event_pending: return 0
+
+        x, y, vx, vy, r = self.ball_x, self.ball_y, self.ball_speed_x, self.ball_speed_y, self.ball_radius
+
+        # the three regions checked by update_ball, as offsets of the ball position
+        regions = ((vx, 0), (0, vy), (vx, vy))
+
+        free = None
+        for (x0, y0), (x1, y1) in self.obstacles():
+            for dx, dy in regions:
+                t = _first_overlap(x + dx, vx, x0 - r, x1 + r, y + dy, vy, y0 - r, y1 + r)
+                if t is not None and (free is None or t < free): free = t
+
+        # near the rows of the paddle the ball can hit it or stop it, whatever the commands
+        band_y0, band_y1 = self.paddle_y - self.paddle_halfheight, self.paddle_y + self.paddle_halfheight
+        for dy in (0, vy):
+            t = _first_overlap(x, 0, x, x, y + dy, vy, band_y0 - r, band_y1 + r)
+            if t is not None and (free is None or t < free): free = t
+
+        if free is None: raise Exception('Game.free_frames error: the ball never hits anything')
+
+        return free
+
+    def skip_frames(self, commands: list[str]):
+
+        n = len(commands)
+        if n == 0: return
+        if n > self.free_frames(): raise Exception(f'Game.skip_frames error: an event happens before {n} frames')
+
+        self._advance(commands)
+
+    def _advance(self, commands: list[str]):
+
+        # skip_frames without checking that the frames are free
+        n = len(commands)
+        paddle_x = self.paddle_x
+        ball_x, ball_y = self.ball_x, self.ball_y
+
+        i = 0
+        while i < n: # one step per run of the same command
+            j = i
+            while j < n and commands[j] == commands[i]: j += 1
+
+            self.apply_command(commands[i])
+            speed = self.paddle_speed
+
+            if speed != 0:
+                if speed > 0: room = grid_width - 3 - self.paddle_halfwidth - speed - self.paddle_x
+                else: room = self.paddle_x - 2 - self.paddle_halfwidth + speed
+                moves = min(j - i, max(0, - (- room // abs(speed))))
+
+                if moves > 0:
+                    self.paddle_old_x = self.paddle_x + (moves - 1) * speed
+                    self.paddle_x += moves * speed
+
+            i = j
+
+        self.elements['paddle_center']['pos'] = (self.paddle_x, self.paddle_y)
+        self.elements['paddle_center']['hitbox'] = ((self.paddle_x - self.paddle_halfwidth, self.paddle_y - self.paddle_halfheight), (self.paddle_x + self.paddle_halfwidth, self.paddle_y + self.paddle_halfheight))
+
+        self.ball_x += n * self.ball_speed_x
+        self.ball_y += n * self.ball_speed_y
+        self.ball_old_x, self.ball_old_y = self.ball_x - self.ball_speed_x, self.ball_y - self.ball_speed_y
+
+        self.elements['ball']['pos'] = (self.ball_x, self.ball_y)
+        self.elements['ball']['hitbox'] = ((self.ball_x - self.ball_radius, self.ball_y - self.ball_radius), (self.ball_x + self.ball_radius, self.ball_y + self.ball_radius))
+
+        # the frames in between only moved the paddle and the ball: clear where they were and draw where they are
+        self.grid[paddle_x - self.paddle_halfwidth:paddle_x + self.paddle_halfwidth + 1, self.paddle_y - self.paddle_halfheight:self.paddle_y + self.paddle_halfheight + 1] = 0
+        if self.render:
+            self.b[paddle_x - self.paddle_halfwidth:paddle_x + self.paddle_halfwidth + 1, self.paddle_y - self.paddle_halfheight:self.paddle_y + self.paddle_halfheight + 1] = 0
+            self.r[ball_x - self.ball_radius:ball_x + self.ball_radius + 1, ball_y - self.ball_radius:ball_y + self.ball_radius + 1] = 0
+        self.draw_paddle()
+        self.draw_ball()
+
+    def play_commands(self, commands: list[str], log_writer= None, fast_forward= True) -> int:
+
+        if log_writer is not None: log_writer.add_frame(self.elements, [], [])
+
+        n_frames = 0
+        while n_frames < len(commands):
+
+            if fast_forward and n_frames > 0:
+                skip = min(self.free_frames(), len(commands) - n_frames)
+                if skip > 0:
+                    run = commands[n_frames:n_frames + skip]
+                    self._advance(run) # free by construction
+                    if log_writer is not None: log_writer.add_empty_frames(self.elements, run)
+                    n_frames += skip
+                    continue
+
+            command = commands[n_frames]
+            self.apply_command(command)
+
+            element_log, event_log, end_game = self.update()
+
+            if n_frames == 0:
+                event_log.append({
+                    'description': 'game_start',
+                    'subject': 0
+                })
+
+            if log_writer is not None: log_writer.add_frame(element_log, event_log, [command])
+            n_frames += 1
+
+            if end_game: break
+
+        if log_writer is not None: log_writer.add_frame({}, [{'description': 'game_end', 'subject': 0}], [])
+
+        return n_frames
+
+
+def _first_overlap(x, vx, x0, x1, y, vy, y0, y1) -> int:
+
+    # first t >= 0 with x + t * vx in [x0, x1] and y + t * vy in [y0, y1], None if never
+    lo, hi = 0, None
+    for p, v, p0, p1 in ((x, vx, x0, x1), (y, vy, y0, y1)):
+        if v == 0:
+            if not p0 <= p <= p1: return None
+            continue
+        a, b = sorted(((p0 - p) / v, (p1 - p) / v))
+        lo = max(lo, math.ceil(a))
+        hi = math.floor(b) if hi is None else min(hi, math.floor(b))
+
+    if hi is not None and lo > hi: return None
+
+    return lo
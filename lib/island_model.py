@@ -0,0 +1,186 @@
+import random
+import multiprocessing
+
+from .classes import Element, Event, EventType, Individual
+from .evolutionary_algorithm import EvolutionaryAlgorithm
+
+"""
+island_model.py
+
+Island model: islands independent EvolutionaryAlgorithm populations, each one in its own process. Every migration_interval
+generations each island sends its best migrants individuals (genome encoding and fitness, see Individual.to_genome) to the
+islands it is connected to and replaces its worst individuals with the ones it receives.
+The islands wait for the migrants of the same round (the ones of later rounds, sent by islands that are ahead, are kept
+aside until their round), so with a seed the whole run is reproducible.
+
+Topologies:
+- ring             island i sends to island i + 1 (the last one to the first one)
+- fully_connected  every island sends to all the others
+
+Functions:
+- IslandModel.__init__(self, element_pool, event_pool, events_per_frame, islands= 4, topology= 'ring', migration_interval= 10, migrants= 2, seed= None, **evo_kwargs)
+  Configure the model, evo_kwargs are passed to the EvolutionaryAlgorithm of every island (e.g. cache_size, copy_on_write).
+  Island i seeds its random with seed + i (if seed is not None).
+
+- IslandModel.run(self, max_generations= 100, num_individuals= 100, lifespan= 1, verbose= True) -> Individual
+  Start the islands, evolve them for max_generations generations and return the best individual of all the islands.
+  With verbose the best fitness of every island is printed at each migration.
+
+- IslandModel.get_winner(self) -> Individual
+  The best individual of the last run.
+
+- IslandModel.best_fitness -> list[int]
+  Best fitness of each island at the end of the last run.
+
+Dependencies:
+-
+"""
+
+TOPOLOGIES = ('ring', 'fully_connected')
+
+def _destinations(topology, islands) -> list[list[int]]:
+
+    if topology == 'ring': return [[(i + 1) % islands] if islands > 1 else [] for i in range(islands)]
+    if topology == 'fully_connected': return [[j for j in range(islands) if j != i] for i in range(islands)]
+
+    raise Exception(f'IslandModel error: unknown topology {topology}, expected one of {TOPOLOGIES}')
+
+def _run_island(island_id, element_pool, event_pool, events_per_frame, evo_kwargs, seed, max_generations, num_individuals, lifespan,
+                migration_interval, migrants, inbox, outboxes, n_senders, results) -> None:
+
+    try:
+        if seed is not None: random.seed(seed)
+
+        evo = EvolutionaryAlgorithm(element_pool, event_pool, events_per_frame, **evo_kwargs).initialize_population(num_individuals, lifespan)
+
+        num_survivors = num_individuals // 5 # fixed, the population can grow with lifespan > 1
+
+        early: dict[int, list[tuple]] = {} # migrants of later rounds, sent by islands that are ahead
+
+        generation = 0
+        while generation < max_generations:
+
+            generations = min(migration_interval, max_generations - generation)
+            evo.evolve(generations, num_survivors)
+            generation += generations
+
+            ranking = sorted(evo.population, key= lambda ind: ind.fitness, reverse= True)
+            results.put(('generation', island_id, generation, ranking[0].fitness))
+
+            if generation >= max_generations: break
+
+            # Migration
+
+            emigrants = [(ind.to_genome(), ind.fitness) for ind in ranking[:migrants]]
+            for outbox in outboxes: outbox.put((generation, island_id, emigrants))
+
+            arrived = early.pop(generation, [])
+            while len(arrived) < n_senders:
+                sender_generation, sender_id, sender_emigrants = inbox.get()
+                if sender_generation == generation: arrived.append((sender_id, sender_emigrants))
+                else: early.setdefault(sender_generation, []).append((sender_id, sender_emigrants))
+
+            # sorted by fitness, then by sender and rank: the order of arrival does not matter, the run stays reproducible
+            received = []
+            for sender_id, sender_emigrants in arrived:
+                received.extend((-fitness, sender_id, rank, genome) for rank, (genome, fitness) in enumerate(sender_emigrants))
+            immigrants = [(genome, -fitness) for fitness, _, _, genome in sorted(received, key= lambda immigrant: immigrant[:3])][:len(ranking) - migrants] # the best ones of the island always stay
+
+            worst = ranking[len(ranking) - len(immigrants):] if immigrants else []
+            replaced = set(map(id, worst))
+            evo.population = [ind for ind in evo.population if id(ind) not in replaced]
+            for genome, fitness in immigrants:
+                immigrant = Individual.from_genome(element_pool, event_pool, genome, lifespan= lifespan)
+                immigrant.set_fitness(fitness)
+                evo.population.append(immigrant)
+
+        winner = evo.get_winner()
+        results.put(('done', island_id, winner.to_genome(), winner.fitness))
+
+        evo.close()
+
+    except Exception as e:
+        results.put(('error', island_id, repr(e), None))
+
+
+class IslandModel:
+
+    def __init__(self, element_pool: list[Element], event_pool: list[EventType], events_per_frame: list[list[Event]], islands= 4, topology= 'ring',
+                 migration_interval= 10, migrants= 2, seed= None, **evo_kwargs):
+
+        if islands < 1: raise Exception('IslandModel.__init__ error: at least one island is needed')
+        if migration_interval < 1: raise Exception('IslandModel.__init__ error: migration_interval must be at least 1')
+
+        self.element_pool = element_pool
+        self.event_pool = event_pool
+        self.events_per_frame = events_per_frame
+
+        self.islands = islands
+        self.topology = topology
+        self.destinations = _destinations(topology, islands)
+        self.migration_interval = migration_interval
+        self.migrants = migrants
+        self.seed = seed
+        self.evo_kwargs = evo_kwargs
+
+        self._winner: Individual = None
+        self._best_fitness: list[int] = []
+
+    def __repr__(self):
+        return f'IslandModel({self.islands} islands, {self.topology}, migration every {self.migration_interval} generations)'
+
+    @property
+    def best_fitness(self) -> list[int]:
+        return self._best_fitness
+
+    def run(self, max_generations= 100, num_individuals= 100, lifespan= 1, verbose= True) -> Individual:
+
+        if self.migrants >= num_individuals: raise Exception('IslandModel.run error: migrants must be less than num_individuals')
+
+        inboxes = [multiprocessing.Queue() for _ in range(self.islands)]
+        results = multiprocessing.Queue()
+        n_senders = [sum(i in destinations for destinations in self.destinations) for i in range(self.islands)]
+
+        processes = [
+            multiprocessing.Process(target= _run_island, args= (
+                i, self.element_pool, self.event_pool, self.events_per_frame, self.evo_kwargs, None if self.seed is None else self.seed + i,
+                max_generations, num_individuals, lifespan, self.migration_interval, self.migrants,
+                inboxes[i], [inboxes[j] for j in self.destinations[i]], n_senders[i], results))
+            for i in range(self.islands)
+        ]
+        for process in processes: process.start()
+
+        winners: dict[int, tuple] = {}
+        round_best: dict[int, dict[int, int]] = {}
+
+        try:
+            while len(winners) < self.islands:
+
+                kind, island_id, value, fitness = results.get()
+
+                if kind == 'error': raise Exception(f'IslandModel.run error: island {island_id} failed ({value})')
+
+                if kind == 'done': winners[island_id] = (value, fitness)
+
+                else: # best fitness of an island after a round
+                    round_best.setdefault(value, {})[island_id] = fitness
+                    if verbose and len(round_best[value]) == self.islands:
+                        print(f'generation {value}/{max_generations} - best fitness per island: {[round_best[value][i] for i in range(self.islands)]}')
+
+        except BaseException:
+            for process in processes: process.terminate()
+            raise
+
+        for process in processes: process.join()
+
+        self._best_fitness = [winners[i][1] for i in range(self.islands)]
+        genome, fitness = max(winners.values(), key= lambda winner: winner[1])
+        self._winner = Individual.from_genome(self.element_pool, self.event_pool, genome)
+        self._winner.set_fitness(fitness)
+
+        if verbose: print(f'best fitness: {fitness}')
+
+        return self._winner
+
+    def get_winner(self) -> Individual:
+        return self._winner
@@ -0,0 +1,93 @@
+import os
+import re
+import hashlib
+from datetime import datetime
+
+from .classes import Element, Event, EventType
+from .columnar_log import LOG_FORMAT_VERSION, convert_pickle_log, load_columnar_log
+from .compact_recording import convert_compact_recording
+from .event_index import EventIndex
+from .streaming_log import convert_streaming_log
+
+"""
+log_cache.py
+
+Functions:
+- file_hash(path) -> str
+  sha256 of the bytes of the file.
+
+- cache_path(log_path, cache_dir= None) -> str
+  Path of the preprocessed log: cache_dir (by default the .cache directory next to the log) / <log name>.<hash>.v<versions>.npz.
+  The name changes when the content of the log changes or when ENCODING_VERSION (or the columnar LOG_FORMAT_VERSION) is bumped.
+
+- load_cached_log(log_path, cache_dir= None) -> tuple[list[Element], list[EventType], list[list[Event]], list[list[Element]], EventIndex]
+  Load a log returning element_pool, event_pool, events_per_frame, elements_per_frame and the event_index.
+  A pickled (.pkl), streaming (.stream) or compact (.replay, replayed) log is preprocessed once into the columnar format (see columnar_log.py) and the
+  following loads read the cache; stale caches of the same log are removed when it is rebuilt. A columnar log (.npz) is loaded directly.
+
+- latest_log(log_dir) -> str
+  Name of the most recent log in log_dir, by the timestamp in its name (arkanoid_log_%d_%m_%Y_%H_%M_%S, .npz, .stream, .replay, .pkl or recording directory).
+  With more formats of the same log the recording is preferred, then the .npz, the .stream and the .replay.
+
+Dependencies:
+-
+"""
+
+# bump when the preprocessing of the pickled logs changes, the old caches are rebuilt
+ENCODING_VERSION = 1
+
+LOG_NAME_PATTERN = re.compile(r'^arkanoid_log_(\d{2}_\d{2}_\d{4}_\d{2}_\d{2}_\d{2})(\.npz|\.stream|\.replay|\.pkl)?$')
+LOG_FORMAT_PRIORITY = {'.pkl': 0, '.replay': 1, '.stream': 2, '.npz': 3, None: 4}
+
+def file_hash(path) -> str:
+
+    sha256 = hashlib.sha256()
+    with open(path, 'rb') as file:
+        for chunk in iter(lambda: file.read(1 << 20), b''):
+            sha256.update(chunk)
+
+    return sha256.hexdigest()
+
+def cache_path(log_path, cache_dir= None) -> str:
+
+    if cache_dir is None: cache_dir = os.path.join(os.path.dirname(log_path), '.cache')
+    log_name = os.path.splitext(os.path.basename(log_path))[0]
+
+    return os.path.join(cache_dir, f'{log_name}.{file_hash(log_path)[:16]}.v{LOG_FORMAT_VERSION}.{ENCODING_VERSION}.npz')
+
+def load_cached_log(log_path, cache_dir= None) -> tuple[list[Element], list[EventType], list[list[Event]], list[list[Element]], EventIndex]:
+
+    if log_path.endswith('.npz'): return load_columnar_log(log_path)
+
+    path = cache_path(log_path, cache_dir)
+
+    if not os.path.exists(path):
+
+        cache_dir = os.path.dirname(path)
+        os.makedirs(cache_dir, exist_ok= True)
+
+        log_name = os.path.splitext(os.path.basename(log_path))[0]
+        for file_name in os.listdir(cache_dir):
+            if file_name.startswith(f'{log_name}.') and file_name.endswith('.npz'): os.remove(os.path.join(cache_dir, file_name))
+
+        # written aside and then renamed, a run stopped while writing never leaves a broken cache
+        if log_path.endswith('.stream'): convert_log = convert_streaming_log
+        elif log_path.endswith('.replay'): convert_log = convert_compact_recording
+        else: convert_log = convert_pickle_log
+        tmp_path = convert_log(log_path, f'{path[:-len(".npz")]}.tmp.npz')
+        os.replace(tmp_path, path)
+
+    return load_columnar_log(path)
+
+def latest_log(log_dir) -> str:
+
+    logs = []
+    for file_name in os.listdir(log_dir):
+        match = LOG_NAME_PATTERN.match(file_name)
+        if match is None: continue
+        if match.group(2) is None and not os.path.isdir(os.path.join(log_dir, file_name)): continue
+        logs.append((datetime.strptime(match.group(1), '%d_%m_%Y_%H_%M_%S'), LOG_FORMAT_PRIORITY[match.group(2)], file_name))
+
+    if not logs: raise Exception('no saved logs')
+
+    return max(logs)[2]
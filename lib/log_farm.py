@@ -0,0 +1,111 @@
+import os
+import json
+import multiprocessing
+from datetime import datetime
+
+from .columnar_log import ColumnarLogWriter
+from .controllers import Controller, NoisyTrackingController, RandomController, TrackingController
+from .game import Game
+
+"""
+log_farm.py
+
+Generation of logs with simulated games (headless Game driven by a controller) in a pool of processes. Every game writes
+its own shard (a columnar log, see columnar_log.py) and a json manifest lists the shards with their seed, policy, number
+of frames and events per event type, so that the shards can be chosen without opening them.
+
+Functions:
+- run_farm(n_games, log_dir= 'logs/arkanoid_logs', policies= ('tracking', 'noisy_tracking', 'random', 'guarded_random'), base_seed= 0,
+           max_frames= 100000, processes= None, keyframe_interval= 50, name= None) -> str
+  Play n_games games, the i-th with seed base_seed + i and policy policies[i % len(policies)] (a key of POLICIES),
+  on processes processes (all the cores if None). The shards are saved as log_dir/<name>_shard_<i>.npz and the manifest as
+  log_dir/<name>_manifest.json (name is arkanoid_farm_<timestamp> by default). Return the path of the manifest.
+  The element states are recorded with a keyframe every keyframe_interval frames (not recorded if None).
+
+- select_shards(manifest_path, policies= None, min_frames= 0, event_types= ()) -> list[str]
+  Paths of the shards of a manifest played with one of policies (any if None), with at least min_frames frames and with
+  at least one event of each of event_types.
+
+Dependencies:
+-
+"""
+
+POLICIES = {
+    'tracking': lambda seed: TrackingController(),
+    'noisy_tracking': lambda seed: NoisyTrackingController(epsilon= 0.1, seed= seed),
+    'random': lambda seed: RandomController(seed= seed),
+    'guarded_random': lambda seed: RandomController(seed= seed, guard= 10, leash= 10),
+}
+
+def _play_shard(task: tuple) -> dict:
+
+    shard_id, path, seed, policy, max_frames, keyframe_interval = task
+
+    game = Game(render= False, seed= seed)
+    controller: Controller = POLICIES[policy](seed)
+
+    log_writer = ColumnarLogWriter(keyframe_interval)
+    game.play(controller, log_writer, max_frames)
+    log_writer.save(path)
+
+    event_counts = log_writer.event_counts
+
+    return {
+        'shard': shard_id,
+        'file': os.path.basename(path),
+        'seed': seed,
+        'policy': policy,
+        'n_frames': log_writer.n_frames,
+        'n_events': sum(event_counts.values()),
+        'event_counts': event_counts,
+    }
+
+def run_farm(n_games, log_dir= 'logs/arkanoid_logs', policies= ('tracking', 'noisy_tracking', 'random', 'guarded_random'), base_seed= 0,
+             max_frames= 100000, processes= None, keyframe_interval= 50, name= None) -> str:
+
+    for policy in policies:
+        if policy not in POLICIES: raise Exception(f'run_farm error: unknown policy {policy}')
+
+    if name is None: name = f'arkanoid_farm{datetime.now().strftime("_%d_%m_%Y_%H_%M_%S")}'
+    os.makedirs(log_dir, exist_ok= True)
+
+    tasks = [(i, os.path.join(log_dir, f'{name}_shard_{i:04d}.npz'), base_seed + i, policies[i % len(policies)], max_frames, keyframe_interval) for i in range(n_games)]
+
+    # one game per task, the games have very different lengths
+    with multiprocessing.Pool(processes) as pool:
+        shards = sorted(pool.imap_unordered(_play_shard, tasks), key= lambda shard: shard['shard'])
+
+    event_counts = {}
+    for shard in shards:
+        for description, count in shard['event_counts'].items(): event_counts[description] = event_counts.get(description, 0) + count
+
+    manifest = {
+        'name': name,
+        'base_seed': base_seed,
+        'max_frames': max_frames,
+        'keyframe_interval': keyframe_interval,
+        'n_games': n_games,
+        'n_frames': sum(shard['n_frames'] for shard in shards),
+        'event_counts': event_counts,
+        'shards': shards,
+    }
+
+    manifest_path = os.path.join(log_dir, f'{name}_manifest.json')
+    with open(manifest_path, 'w') as manifest_file:
+        json.dump(manifest, manifest_file, indent= 1)
+
+    return manifest_path
+
+def select_shards(manifest_path, policies= None, min_frames= 0, event_types= ()) -> list[str]:
+
+    with open(manifest_path, 'r') as manifest_file:
+        manifest = json.load(manifest_file)
+
+    log_dir = os.path.dirname(manifest_path)
+
+    return [
+        os.path.join(log_dir, shard['file']) for shard in manifest['shards']
+        if (policies is None or shard['policy'] in policies)
+        and shard['n_frames'] >= min_frames
+        and all(shard['event_counts'].get(description, 0) > 0 for description in event_types)
+    ]
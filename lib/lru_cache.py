@@ -0,0 +1,65 @@
+from collections import OrderedDict
+
+"""
+lru_cache.py
+
+Functions:
+- __init__(self, max_size= 10000)
+  Create an empty cache that keeps at most max_size entries evicting the least recently used.
+  Base of FitnessCache and CategoryMemo.
+
+- get(self, key) -> object | None
+  Return the value stored for the key (and mark it as recently used), None if not present. Updates hits and misses.
+
+- put(self, key, value) -> None
+  Store the value of the key, evicting the least recently used entry if the cache is full.
+
+- hit_rate -> float
+  Fraction of the get that found the key.
+
+Dependencies:
+-
+"""
+
+class LRUCache:
+
+    def __init__(self, max_size= 10000):
+
+        self._max_size = max_size
+        self._entries: OrderedDict = OrderedDict()
+
+        self.hits = 0
+        self.misses = 0
+
+    @property
+    def max_size(self) -> int:
+        return self._max_size
+
+    @property
+    def hit_rate(self) -> float:
+        if self.hits + self.misses == 0: return 0.
+        return self.hits / (self.hits + self.misses)
+
+    def __len__(self):
+        return len(self._entries)
+
+    def __repr__(self):
+        return f'{type(self).__name__}({len(self._entries)}/{self._max_size} entries, {self.hits} hits, {self.misses} misses)'
+
+    def get(self, key):
+
+        if key in self._entries:
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return self._entries[key]
+
+        self.misses += 1
+        return None
+
+    def put(self, key, value) -> None:
+
+        self._entries[key] = value
+        self._entries.move_to_end(key)
+
+        while len(self._entries) > self._max_size:
+            self._entries.popitem(last= False)
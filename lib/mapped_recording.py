@@ -0,0 +1,194 @@
+import os
+import json
+
+import numpy as np
+
+from .classes import Element, Event, EventType
+
+"""
+mapped_recording.py
+
+A recording is a directory with one raw .npy file per array of the columnar log (see columnar_log.py) and a meta.json
+with the vocabularies. The arrays are memory-mapped when the recording is opened: nothing is parsed at start, frames are
+read lazily as slices of the mapped arrays, and every process that opens the same recording shares the same pages.
+The events are sorted by frame and frame_offsets.npy holds, for each frame, the position of its first event.
+
+Functions:
+- MappedRecording.create(path, npz_path) -> 'MappedRecording'
+  Write the recording of a columnar log (.npz) in the directory path and open it.
+
+- MappedRecording.__init__(self, path)
+  Open the recording, memory-mapping its arrays (read only).
+
+- n_frames, element_pool, event_pool
+  Length of the recording and the element and event type pools, the same that load_columnar_log returns.
+
+- event_arrays -> tuple[np.ndarray, np.ndarray, np.ndarray]
+  The mapped (frame, event_type, subject) arrays of all the events.
+
+- frame_events(self, frame_id) -> tuple[np.ndarray, np.ndarray]
+  event_type and subject ids of the events of the frame (views of the mapped arrays, nothing is copied).
+
+- event(self, position) -> Event
+  The Event at the position in the event arrays.
+
+- events_per_frame -> MappedEvents
+  Read only sequence of the events of each frame, built when a frame is accessed. It can be used as the events_per_frame
+  of the rest of the library (fitness, TransitionStatistics, EvolutionaryAlgorithm, ParallelEvaluator).
+
+- elements_per_frame -> MappedElements
+  Same for the elements present in each frame.
+
+Pickling a recording (or its events_per_frame) sends only its path: the receiving process maps the same files.
+
+Dependencies:
+- numpy
+"""
+
+RECORDING_ARRAYS = ('event_frame', 'event_type', 'event_subject', 'event_object', 'command_frame', 'command', 'element_presence', 'frame_offsets')
+
+class MappedRecording:
+
+    def __init__(self, path):
+
+        self._path = path
+
+        with open(os.path.join(path, 'meta.json'), 'r') as meta_file:
+            meta = json.load(meta_file)
+
+        self._n_frames: int = meta['n_frames']
+        self._element_pool = [Element(elem_id, description, None) for elem_id, description in zip(meta['element_ids'], meta['element_descriptions'])]
+        self._event_pool = [EventType(event_type_id, description) for event_type_id, description in enumerate(meta['event_types'])]
+        self._commands: list[str] = meta['commands']
+
+        self._elements = {elem.id: elem for elem in self._element_pool}
+
+        for name in RECORDING_ARRAYS:
+            setattr(self, f'_{name}', np.load(os.path.join(path, f'{name}.npy'), mmap_mode= 'r'))
+
+    @staticmethod
+    def create(path, npz_path) -> 'MappedRecording':
+
+        with np.load(npz_path, allow_pickle= False) as log:
+
+            n_frames = int(log['n_frames'])
+            element_ids = log['element_ids']
+
+            if log['event_subject'].size and not np.isin(log['event_subject'], element_ids).all():
+                raise Exception('MappedRecording.create error: subject of an event is not an element of the log')
+
+            os.makedirs(path, exist_ok= True)
+
+            for name in RECORDING_ARRAYS[:-1]:
+                np.save(os.path.join(path, f'{name}.npy'), log[name])
+
+            np.save(os.path.join(path, 'frame_offsets.npy'), np.searchsorted(log['event_frame'], np.arange(n_frames + 1)).astype(np.int64))
+
+            meta = {
+                'version': int(log['version']),
+                'n_frames': n_frames,
+                'element_ids': element_ids.tolist(),
+                'element_descriptions': log['element_descriptions'].tolist(),
+                'event_types': log['event_types'].tolist(),
+                'commands': log['commands'].tolist(),
+            }
+
+        with open(os.path.join(path, 'meta.json'), 'w') as meta_file:
+            json.dump(meta, meta_file)
+
+        return MappedRecording(path)
+
+    def __reduce__(self):
+        return (MappedRecording, (self._path,))
+
+    def __repr__(self):
+        return f'MappedRecording({self._path}, {self._n_frames} frames, {len(self._event_frame)} events)'
+
+    @property
+    def path(self) -> str:
+        return self._path
+
+    @property
+    def n_frames(self) -> int:
+        return self._n_frames
+
+    @property
+    def element_pool(self) -> list[Element]:
+        return self._element_pool
+
+    @property
+    def event_pool(self) -> list[EventType]:
+        return self._event_pool
+
+    @property
+    def commands(self) -> list[str]:
+        return self._commands
+
+    @property
+    def frame_offsets(self) -> np.ndarray:
+        return self._frame_offsets
+
+    @property
+    def event_arrays(self) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+        return self._event_frame, self._event_type, self._event_subject
+
+    @property
+    def events_per_frame(self) -> 'MappedEvents':
+        return MappedEvents(self)
+
+    @property
+    def elements_per_frame(self) -> 'MappedElements':
+        return MappedElements(self)
+
+    def frame_events(self, frame_id) -> tuple[np.ndarray, np.ndarray]:
+        start, end = self._frame_offsets[frame_id], self._frame_offsets[frame_id + 1]
+        return self._event_type[start:end], self._event_subject[start:end]
+
+    def event(self, position) -> Event:
+        return Event(self._event_pool[int(self._event_type[position])], self._elements[int(self._event_subject[position])])
+
+    def frame_elements(self, frame_id) -> list[Element]:
+        return [self._element_pool[i] for i in np.flatnonzero(self._element_presence[frame_id])]
+
+
+class MappedEvents:
+
+    def __init__(self, recording: MappedRecording):
+        self._recording = recording
+
+    @property
+    def recording(self) -> MappedRecording:
+        return self._recording
+
+    def __len__(self):
+        return self._recording.n_frames
+
+    def __getitem__(self, frame_id) -> list[Event]:
+
+        if frame_id < 0: frame_id += len(self)
+        if not 0 <= frame_id < len(self): raise IndexError('MappedEvents index out of range')
+
+        event_pool = self._recording.event_pool
+        elements = self._recording._elements
+        event_types, subjects = self._recording.frame_events(frame_id)
+
+        return [Event(event_pool[event_type_id], elements[subject]) for event_type_id, subject in zip(event_types.tolist(), subjects.tolist())]
+
+    def __repr__(self):
+        return f'MappedEvents({self._recording.path})'
+
+
+class MappedElements:
+
+    def __init__(self, recording: MappedRecording):
+        self._recording = recording
+
+    def __len__(self):
+        return self._recording.n_frames
+
+    def __getitem__(self, frame_id) -> list[Element]:
+
+        if frame_id < 0: frame_id += len(self)
+        if not 0 <= frame_id < len(self): raise IndexError('MappedElements index out of range')
+
+        return self._recording.frame_elements(frame_id)
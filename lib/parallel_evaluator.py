@@ -0,0 +1,72 @@
+import multiprocessing
+
+from .classes import Element, Event, EventType, Individual
+from .population_evaluator import PopulationEvaluator
+from .transition_statistics import TransitionStatistics
+
+"""
+parallel_evaluator.py
+
+Functions:
+- __init__(self, element_pool: list[Element], event_pool: list[EventType], events_per_frame: list[list[Event]], workers: int)
+  Start a pool of worker processes. The element_pool, the event_pool and the events_per_frame are sent to each worker once, at start,
+  and every worker builds its own TransitionStatistics and PopulationEvaluator from them.
+  The events of a MappedRecording are sent as its path: each worker maps the same files, nothing is deserialized.
+
+- evaluate(self, population: list[Individual]) -> list[int]
+  Split the population in chunks, send the genome encodings (see Individual.to_genome) to the workers and set the fitness values they send back.
+  The scores are the same of the serial evaluation.
+
+- close(self) -> None
+  Stop the worker processes.
+
+Dependencies:
+-
+"""
+
+# state of a worker process, set once by _init_worker
+_worker_element_pool: list[Element] = None
+_worker_event_pool: list[EventType] = None
+_worker_evaluator: PopulationEvaluator = None
+
+def _init_worker(element_pool: list[Element], event_pool: list[EventType], events_per_frame: list[list[Event]]) -> None:
+
+    global _worker_element_pool, _worker_event_pool, _worker_evaluator
+
+    _worker_element_pool = element_pool
+    _worker_event_pool = event_pool
+    _worker_evaluator = PopulationEvaluator(TransitionStatistics(element_pool, event_pool, events_per_frame))
+
+def _evaluate_genomes(genomes: list[tuple]) -> list[int]:
+    population = [Individual.from_genome(_worker_element_pool, _worker_event_pool, genome) for genome in genomes]
+    return [int(fitness) for fitness in _worker_evaluator.evaluate(population)]
+
+
+class ParallelEvaluator:
+
+    def __init__(self, element_pool: list[Element], event_pool: list[EventType], events_per_frame: list[list[Event]], workers: int):
+
+        self._workers = workers
+        self._pool = multiprocessing.Pool(workers, initializer= _init_worker, initargs= (element_pool, event_pool, events_per_frame))
+
+    @property
+    def workers(self) -> int:
+        return self._workers
+
+    def evaluate(self, population: list[Individual]) -> list[int]:
+
+        if not population: return []
+
+        genomes = [ind.to_genome() for ind in population]
+        chunk_size = -(- len(genomes) // self._workers)
+        chunks = [genomes[i:i + chunk_size] for i in range(0, len(genomes), chunk_size)]
+
+        scores = [fitness for chunk_scores in self._pool.map(_evaluate_genomes, chunks) for fitness in chunk_scores]
+
+        for ind, fitness in zip(population, scores): ind.set_fitness(fitness)
+
+        return scores
+
+    def close(self) -> None:
+        self._pool.close()
+        self._pool.join()
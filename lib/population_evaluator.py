@@ -0,0 +1,189 @@
+import numpy as np
+
+from .classes import Individual
+from .transition_statistics import TransitionStatistics
+
+"""
+population_evaluator.py
+
+Functions:
+- __init__(self, statistics: TransitionStatistics)
+  Create the dense (trigger, effect, element) count tensors of the log from its transition statistics.
+
+- encode(self, population: list[Individual]) -> tuple[np.ndarray, ...]
+  Encode the genomes of the population as membership arrays (padded to the biggest individual):
+    - element -> object  (individual, object, element)
+    - object -> category  (individual, category, object)
+    - rule -> category  (individual, category, trigger * n_event_types + effect)
+    - number of objects, categories and rules of each individual
+
+- evaluate(self, population: list[Individual]) -> np.ndarray
+  Score the whole population with array operations, set the fitness of every individual and return the scores (python ints, the penalties can overflow int64).
+  The scores are the same of Individual.compute_fitness_4.
+
+Dependencies:
+- numpy
+"""
+
+class PopulationEvaluator:
+
+    def __init__(self, statistics: TransitionStatistics):
+
+        self._statistics = statistics
+
+        self._element_idx = {elem.id: i for i, elem in enumerate(statistics.element_pool)}
+        self._event_type_idx = {event_type.id: i for i, event_type in enumerate(statistics.event_pool)}
+
+        n_elements = len(statistics.element_pool)
+        n_event_types = len(statistics.event_pool)
+        self._n_elements = n_elements
+        self._n_event_types = n_event_types
+
+        # rows are rule slots (trigger * n_event_types + effect), columns are elements
+        triggered = np.zeros((n_event_types, n_elements), dtype= np.int64)
+        hits = np.zeros((n_event_types * n_event_types, n_elements), dtype= np.int64)
+        should_be_rule = np.zeros((n_event_types * n_event_types, n_elements), dtype= bool)
+        fired = np.zeros(n_event_types * n_event_types, dtype= bool)
+
+        for trigger in statistics.event_pool:
+            t = self._event_type_idx[trigger.id]
+            for elem in statistics.element_pool:
+                triggered[t, self._element_idx[elem.id]] = statistics.triggered(trigger.id, elem.id)
+            for effect in statistics.event_pool:
+                k = t * n_event_types + self._event_type_idx[effect.id]
+                fired[k] = statistics.fired(trigger.id)
+                for elem in statistics.element_pool:
+                    hits[k, self._element_idx[elem.id]] = statistics.hits(trigger.id, effect.id, elem.id)
+
+        for trigger_id, effect_id, element_id in statistics.should_be_rule:
+            should_be_rule[self._event_type_idx[trigger_id] * n_event_types + self._event_type_idx[effect_id], self._element_idx[element_id]] = True
+
+        triggered_per_rule = np.repeat(triggered, n_event_types, axis= 0)
+
+        self._hits = hits
+        self._misses = triggered_per_rule - hits
+        self._triggered = triggered_per_rule > 0
+        self._should_be_rule = should_be_rule
+        self._fired = fired
+
+        # +1 for an (elem, rule) always correct, -1 if wrong at least once or never used
+        self._element_rule_score = np.where((self._misses == 0) & (hits > 0), 1, -1)
+
+    @property
+    def statistics(self) -> TransitionStatistics:
+        return self._statistics
+
+    def encode(self, population: list[Individual]) -> tuple[np.ndarray, ...]:
+
+        n_individuals = len(population)
+        max_objects = max([len(ind.objects) for ind in population] + [1])
+        max_categories = max([len(ind.categories) for ind in population] + [1])
+
+        obj_elems = np.zeros((n_individuals, max_objects, self._n_elements), dtype= np.int64)
+        cat_objs = np.zeros((n_individuals, max_categories, max_objects), dtype= np.int64)
+        cat_rules = np.zeros((n_individuals, max_categories, self._n_event_types * self._n_event_types), dtype= np.int64)
+        n_objects = np.zeros(n_individuals, dtype= np.int64)
+        n_categories = np.zeros(n_individuals, dtype= np.int64)
+        n_rules = np.zeros(n_individuals, dtype= np.int64)
+
+        for p, ind in enumerate(population):
+
+            obj_idx = {}
+            for o, obj in enumerate(ind.objects):
+                obj_idx[obj.id] = o
+                for elem in obj.elements:
+                    obj_elems[p, o, self._element_idx[elem.id]] = 1
+
+            for c, cat in enumerate(ind.categories):
+                for obj in cat.objects:
+                    cat_objs[p, c, obj_idx[obj.id]] = 1
+                for rule in cat.rules:
+                    cat_rules[p, c, self._event_type_idx[rule.trigger.id] * self._n_event_types + self._event_type_idx[rule.effect.id]] = 1
+
+            n_objects[p] = len(ind.objects)
+            n_categories[p] = len(ind.categories)
+            n_rules[p] = len(ind.rules)
+
+        return obj_elems, cat_objs, cat_rules, n_objects, n_categories, n_rules
+
+    def evaluate(self, population: list[Individual]) -> np.ndarray:
+
+        if not population: return np.zeros(0, dtype= object)
+
+        obj_elems, cat_objs, cat_rules, n_objects, n_categories, n_rules = self.encode(population)
+
+        score = np.zeros(len(population), dtype= object)
+
+        obj_len = obj_elems.sum(axis= 2) # (p, o)
+        obj_exists = np.arange(obj_elems.shape[1])[None, :] < n_objects[:, None]
+        cat_len = cat_objs.sum(axis= 2) # (p, c)
+
+        cat_elems = np.einsum('pco,pox->pcx', cat_objs, obj_elems) > 0 # (p, c, x)
+        obj_rule_cats = np.einsum('pco,pck->pok', cat_objs, cat_rules) # (p, o, k) number of categories applying rule k to object o
+        elem_rule_cats = np.einsum('pck,pcx->pkx', cat_rules, cat_elems) > 0 # (p, k, x) rule k applied to element x in some category
+        rule_cats = cat_rules.sum(axis= 1) # (p, k)
+
+        # element penalties
+
+        elem_objs = obj_elems.sum(axis= 1) # (p, x)
+        elem_cats = cat_elems.sum(axis= 1) # (p, x)
+
+        score -= 10 * (elem_objs == 0).sum(axis= 1) # penalty for elem not present in any object
+        score -= 10 * (elem_cats == 0).sum(axis= 1) # penalty for elem not present in any category
+        score -= self._power_penalty(2, elem_objs - 1, elem_objs > 1) # penalty for same element in different objects
+        score -= self._power_penalty(2, elem_cats - 1, elem_cats > 1) # penalty for same element in different categories
+        score -= self._power_penalty(5, obj_rule_cats - 1, obj_rule_cats > 1, obj_len[:, :, None]) # penalty for same element in different objects with same rule applied
+
+        elem_rule_used = elem_rule_cats & self._fired[None, :, None]
+        score += (elem_rule_used * self._element_rule_score[None]).sum(axis= (1, 2))
+
+        # object penalties
+
+        score -= np.where(obj_len > 1, obj_len - 1, 0).sum(axis= 1) # penalty for number of elements per object
+        score -= (obj_exists & (cat_objs.sum(axis= 1) == 0)).sum(axis= 1) # penalty for object not present in any category
+
+        obj_hits = np.einsum('pox,kx->pok', obj_elems, self._hits)
+        obj_misses = np.einsum('pox,kx->pok', obj_elems, self._misses)
+        obj_rule_score = np.where(obj_misses > 0, -1, np.where(obj_hits > 0, 2, -1))
+        obj_rule_used = (obj_rule_cats > 0) & self._fired[None, None, :]
+        score += (obj_rule_used * obj_rule_score).sum(axis= (1, 2))
+
+        # category penalties
+
+        score -= cat_len.sum(axis= 1) # penalty for number of objects in a category
+
+        cat_hits = np.einsum('pcx,kx->pck', cat_elems, self._hits)
+        cat_misses = np.einsum('pcx,kx->pck', cat_elems, self._misses)
+        cat_rule_score = np.where(cat_misses > 0, -1, np.where(cat_hits > 0, 1, -1))
+        score += (cat_rules * cat_rule_score).sum(axis= (1, 2))
+
+        all_correct_cats = (cat_rules.sum(axis= 2) > 0) & ((cat_rules * (cat_misses > 0)).sum(axis= 2) == 0)
+        score += 2 * all_correct_cats.sum(axis= 1)
+
+        score -= n_categories # penalty for number of categories
+        score -= n_rules # penalty for number of rules
+        score -= self._power_penalty(2, rule_cats, rule_cats > 1) # penalty for rules in many categories
+
+        # rule usage
+
+        is_rule = elem_rule_cats & self._triggered[None]
+        both = (is_rule & self._should_be_rule[None]).sum(axis= (1, 2))
+        score += 3 * both - self._should_be_rule.sum() - is_rule.sum(axis= (1, 2))
+
+        for ind, fitness in zip(population, score):
+            ind.set_fitness(int(fitness))
+
+        return score
+
+    @staticmethod
+    def _power_penalty(base, exponents: np.ndarray, mask: np.ndarray, factors: np.ndarray = None) -> np.ndarray:
+
+        # exact integers (the powers can overflow int64), only few entries are ever masked in
+        penalty = np.zeros(exponents.shape[0], dtype= object)
+        if factors is None: factors = np.ones_like(exponents)
+        factors = np.broadcast_to(factors, exponents.shape)
+
+        for idx in zip(*np.nonzero(mask)):
+            penalty[idx[0]] += pow(base, int(exponents[idx])) * int(factors[idx])
+
+        return penalty
@@ -0,0 +1,362 @@
+import io
+import os
+import json
+import queue
+import struct
+import threading
+
+import numpy as np
+
+from .classes import Element, Event, EventType
+from .columnar_log import LOG_FORMAT_VERSION, _command_runs, _expand_runs, log_from_arrays
+from .element_states import ElementStateEncoder
+from .event_index import EventIndex
+
+"""
+streaming_log.py
+
+Append-only log written while the game runs (.stream), so that the memory does not grow with the session and a crash
+loses at most the last chunk:
+  - header: STREAM_MAGIC and the format version
+  - chunks, each one an 8 bytes length and an .npz with the frames of the chunk (the same arrays of the columnar format,
+    with global frame ids, and the element presence as (presence_frame, presence_element) pairs) and the entries of the
+    vocabularies first seen in the chunk (new_element_ids, new_element_descriptions, new_event_types, new_commands), and
+    the element states of its frames (see element_states.py, the offsets start from 0 in each chunk)
+  - footer, written on close: json with the vocabularies and the index of the chunks (offset, first frame, number of frames),
+    then the offset of the footer (8 bytes) and STREAM_MAGIC
+A log without footer (the game crashed) is read scanning the chunks up to the last complete one.
+
+Functions:
+- StreamingLogWriter.__init__(self, path, chunk_frames= 100, keyframe_interval= 50, fsync= True)
+  Open the log for writing. The frames are encoded in add_frame and every chunk_frames frames the chunk is handed to a
+  background thread that compresses it, appends it to the file and flushes (fsync to make it durable), so the game loop
+  never waits for the disk. The element states are recorded as in ColumnarLogWriter (not recorded if keyframe_interval is None).
+
+- StreamingLogWriter.add_frame(self, elements: dict, events: list[dict], commands: list[str]) -> int
+  Append a frame, same arguments of ColumnarLogWriter.add_frame. Return its frame id.
+
+- StreamingLogWriter.add_empty_frames(self, elements: dict, commands: list[str]) -> int
+  Append len(commands) frames without events, same as ColumnarLogWriter.add_empty_frames (kept as runs until the chunk is flushed).
+
+- StreamingLogWriter.flush(self)
+  Hand the frames added so far to the writer thread, without waiting.
+
+- StreamingLogWriter.close(self) -> str
+  Write the last chunk and the footer, wait for the writer thread and return the path. Also on exit of a with block.
+
+- read_streaming_log(path) -> dict[str, np.ndarray]
+  Read a streaming log into the arrays of the columnar format (see columnar_log.py), element states included.
+
+- load_streaming_log(path) -> tuple[list[Element], list[EventType], list[list[Event]], list[list[Element]], EventIndex]
+  Load a streaming log, same result of load_columnar_log.
+
+- convert_streaming_log(stream_path, npz_path= None) -> str
+  Convert a streaming log to the columnar format, by default next to it with the .npz extension.
+
+Dependencies:
+- numpy
+"""
+
+STREAM_MAGIC = b'ARKSTRM1'
+
+CHUNK_ARRAYS = ('event_frame', 'event_type', 'event_subject', 'event_object', 'command_frame', 'command', 'presence_frame', 'presence_element')
+
+class StreamingLogWriter:
+
+    def __init__(self, path, chunk_frames= 100, keyframe_interval= 50, fsync= True):
+
+        if chunk_frames < 1: raise Exception('StreamingLogWriter.__init__ error: chunk_frames must be at least 1')
+
+        self._path = path
+        self._chunk_frames = chunk_frames
+        self._fsync = fsync
+
+        self._element_ids: dict[str, int] = {}
+        self._event_types: dict[str, int] = {}
+        self._commands: dict[str, int] = {}
+
+        self._state_encoder = None if keyframe_interval is None else ElementStateEncoder(keyframe_interval)
+
+        self._n_frames = 0
+        self._closed = False
+        self._error = None
+
+        self._new_chunk()
+
+        self._file = open(path, 'wb')
+        self._file.write(STREAM_MAGIC + struct.pack('<Q', LOG_FORMAT_VERSION))
+
+        self._chunks: list[tuple[int, int, int]] = []
+        self._queue = queue.Queue()
+        self._thread = threading.Thread(target= self._write_loop, name= 'StreamingLogWriter', daemon= True)
+        self._thread.start()
+
+    @property
+    def path(self) -> str:
+        return self._path
+
+    @property
+    def n_frames(self) -> int:
+        return self._n_frames
+
+    def __repr__(self):
+        return f'StreamingLogWriter({self._path}, {self._n_frames} frames, {len(self._chunks)} chunks written)'
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def _new_chunk(self):
+
+        self._chunk = {name: [] for name in CHUNK_ARRAYS[:4]} # the events, the commands and the presence are kept as runs
+        self._command_runs: list[tuple[int, int, int]] = []
+        self._presence_runs: list[tuple[int, int, int]] = [] # (first frame, number of frames, element id)
+        self._chunk_first_frame = self._n_frames
+        self._new_element_ids: list[int] = []
+        self._new_element_descriptions: list[str] = []
+        self._new_event_types: list[str] = []
+        self._new_commands: list[str] = []
+        self._state_records: list[bytes] = []
+        self._state_keyframes: list[int] = []
+
+    def add_frame(self, elements: dict, events: list[dict], commands: list[str]) -> int:
+
+        if self._closed: raise Exception('StreamingLogWriter.add_frame error: log already closed')
+        if self._error is not None: raise Exception(f'StreamingLogWriter.add_frame error: writer thread failed ({self._error})')
+
+        frame_id = self._n_frames
+        chunk = self._chunk
+
+        for description, elem in elements.items():
+            if description not in self._element_ids:
+                self._element_ids[description] = elem['id']
+                self._new_element_ids.append(elem['id'])
+                self._new_element_descriptions.append(description)
+            self._presence_runs.append((frame_id, 1, elem['id']))
+
+        if self._state_encoder is not None:
+            record, keyframe = self._state_encoder.encode(elements)
+            self._state_records.append(record)
+            if keyframe: self._state_keyframes.append(frame_id)
+
+        for event in events:
+            if event['description'] not in self._event_types:
+                self._event_types[event['description']] = len(self._event_types)
+                self._new_event_types.append(event['description'])
+            chunk['event_frame'].append(frame_id)
+            chunk['event_type'].append(self._event_types[event['description']])
+            chunk['event_subject'].append(event['subject'])
+            chunk['event_object'].append(event.get('object', -1))
+
+        for command in commands:
+            if command not in self._commands:
+                self._commands[command] = len(self._commands)
+                self._new_commands.append(command)
+            self._command_runs.append((frame_id, 1, self._commands[command]))
+
+        self._n_frames += 1
+
+        if self._n_frames - self._chunk_first_frame >= self._chunk_frames: self.flush()
+
+        return frame_id
+
+    def add_empty_frames(self, elements: dict, commands: list[str]) -> int:
+
+        if self._closed: raise Exception('StreamingLogWriter.add_empty_frames error: log already closed')
+        if self._error is not None: raise Exception(f'StreamingLogWriter.add_empty_frames error: writer thread failed ({self._error})')
+        if self._state_encoder is not None: raise Exception('StreamingLogWriter.add_empty_frames error: the element states of skipped frames are not known, use keyframe_interval= None')
+
+        frame_id = self._n_frames
+        n = len(commands)
+
+        for description, elem in elements.items():
+            if description not in self._element_ids:
+                self._element_ids[description] = elem['id']
+                self._new_element_ids.append(elem['id'])
+                self._new_element_descriptions.append(description)
+            self._presence_runs.append((frame_id, n, elem['id']))
+
+        for command in commands:
+            if command not in self._commands:
+                self._commands[command] = len(self._commands)
+                self._new_commands.append(command)
+        self._command_runs.extend(_command_runs(frame_id, [self._commands[command] for command in commands]))
+
+        self._n_frames += n
+
+        if self._n_frames - self._chunk_first_frame >= self._chunk_frames: self.flush()
+
+        return frame_id
+
+    def flush(self):
+
+        if self._n_frames == self._chunk_first_frame: return
+
+        chunk = {name: np.array(values, dtype= np.int32) for name, values in self._chunk.items()}
+        chunk['command_frame'], chunk['command'] = _expand_runs(self._command_runs)
+        chunk['presence_frame'], chunk['presence_element'] = _expand_runs(self._presence_runs)
+        chunk['first_frame'] = np.array(self._chunk_first_frame, dtype= np.int64)
+        chunk['n_frames'] = np.array(self._n_frames - self._chunk_first_frame, dtype= np.int64)
+        chunk['new_element_ids'] = np.array(self._new_element_ids, dtype= np.int64)
+        chunk['new_element_descriptions'] = np.array(self._new_element_descriptions, dtype= str)
+        chunk['new_event_types'] = np.array(self._new_event_types, dtype= str)
+        chunk['new_commands'] = np.array(self._new_commands, dtype= str)
+        if self._state_encoder is not None: chunk.update(ElementStateEncoder.arrays(self._state_records, self._state_keyframes))
+
+        self._queue.put(chunk)
+        self._new_chunk()
+
+    def close(self) -> str:
+
+        if self._closed: return self._path
+
+        self.flush()
+        self._closed = True
+        self._queue.put(None)
+        self._thread.join()
+
+        if self._error is not None: raise Exception(f'StreamingLogWriter.close error: writer thread failed ({self._error})')
+
+        return self._path
+
+    def _write_loop(self):
+
+        try:
+            while True:
+                chunk = self._queue.get()
+                if chunk is None: break
+
+                buffer = io.BytesIO()
+                np.savez_compressed(buffer, **chunk)
+                data = buffer.getvalue()
+
+                self._chunks.append((self._file.tell(), int(chunk['first_frame']), int(chunk['n_frames'])))
+                self._file.write(struct.pack('<Q', len(data)))
+                self._file.write(data)
+                self._sync()
+
+            footer = json.dumps({
+                'version': LOG_FORMAT_VERSION,
+                'n_frames': self._n_frames,
+                'element_ids': list(self._element_ids.values()),
+                'element_descriptions': list(self._element_ids.keys()),
+                'event_types': list(self._event_types.keys()),
+                'commands': list(self._commands.keys()),
+                'chunks': self._chunks,
+            }).encode()
+
+            footer_offset = self._file.tell()
+            self._file.write(footer)
+            self._file.write(struct.pack('<Q', footer_offset) + STREAM_MAGIC)
+            self._sync()
+
+        except Exception as e:
+            self._error = e
+
+        finally:
+            self._file.close()
+
+    def _sync(self):
+
+        self._file.flush()
+        if self._fsync: os.fsync(self._file.fileno())
+
+
+def _read_chunks(data) -> list[dict[str, np.ndarray]]:
+
+    chunks = []
+    offset = len(STREAM_MAGIC) + 8
+
+    while offset + 8 <= len(data):
+
+        length = struct.unpack_from('<Q', data, offset)[0]
+        if offset + 8 + length > len(data): break # chunk cut by a crash
+
+        try:
+            with np.load(io.BytesIO(data[offset + 8:offset + 8 + length]), allow_pickle= False) as chunk:
+                chunks.append({name: chunk[name] for name in chunk.files})
+        except Exception:
+            break
+
+        offset += 8 + length
+
+    return chunks
+
+def read_streaming_log(path) -> dict[str, np.ndarray]:
+
+    with open(path, 'rb') as log_file:
+        data = log_file.read()
+
+    if data[:len(STREAM_MAGIC)] != STREAM_MAGIC: raise Exception(f'read_streaming_log error: {path} is not a streaming log')
+
+    version = struct.unpack_from('<Q', data, len(STREAM_MAGIC))[0]
+    if version != LOG_FORMAT_VERSION: raise Exception(f'read_streaming_log error: unsupported log format version {version}')
+
+    complete = len(data) >= 2 * len(STREAM_MAGIC) + 16 and data[-len(STREAM_MAGIC):] == STREAM_MAGIC
+    if complete:
+        footer_offset = struct.unpack_from('<Q', data, len(data) - len(STREAM_MAGIC) - 8)[0]
+        footer = json.loads(data[footer_offset:len(data) - len(STREAM_MAGIC) - 8])
+        data = data[:footer_offset]
+
+    chunks = _read_chunks(data)
+
+    if complete:
+        if len(chunks) != len(footer['chunks']): raise Exception(f'read_streaming_log error: {path} has {len(chunks)} chunks, the footer indexes {len(footer["chunks"])}')
+        n_frames = footer['n_frames']
+        element_ids, element_descriptions = footer['element_ids'], footer['element_descriptions']
+        event_types, commands = footer['event_types'], footer['commands']
+
+    else: # no footer, the vocabularies are rebuilt from the chunks
+        n_frames = sum(int(chunk['n_frames']) for chunk in chunks)
+        element_ids = [elem_id for chunk in chunks for elem_id in chunk['new_element_ids'].tolist()]
+        element_descriptions = [description for chunk in chunks for description in chunk['new_element_descriptions'].tolist()]
+        event_types = [description for chunk in chunks for description in chunk['new_event_types'].tolist()]
+        commands = [command for chunk in chunks for command in chunk['new_commands'].tolist()]
+
+    def concatenate(name):
+        if not chunks: return np.zeros(0, dtype= np.int32)
+        return np.concatenate([chunk[name] for chunk in chunks])
+
+    element_idx = np.full(max(element_ids, default= 0) + 1, -1, dtype= np.int64)
+    element_idx[element_ids] = np.arange(len(element_ids))
+    element_presence = np.zeros((n_frames, len(element_ids)), dtype= bool)
+    element_presence[concatenate('presence_frame'), element_idx[concatenate('presence_element')]] = True
+
+    log = {
+        'version': np.array(LOG_FORMAT_VERSION, dtype= np.int64),
+        'n_frames': np.array(n_frames, dtype= np.int64),
+        'element_ids': np.array(element_ids, dtype= np.int64),
+        'element_descriptions': np.array(element_descriptions, dtype= str),
+        'event_types': np.array(event_types, dtype= str),
+        'commands': np.array(commands, dtype= str),
+        'event_frame': concatenate('event_frame'),
+        'event_type': concatenate('event_type'),
+        'event_subject': concatenate('event_subject'),
+        'event_object': concatenate('event_object'),
+        'command_frame': concatenate('command_frame'),
+        'command': concatenate('command'),
+        'element_presence': element_presence
+    }
+
+    if chunks and all('element_states' in chunk for chunk in chunks):
+        offsets = [np.zeros(1, dtype= np.int64)]
+        for chunk in chunks: offsets.append(chunk['element_state_offsets'][1:] + offsets[-1][-1])
+        log['element_states'] = np.concatenate([chunk['element_states'] for chunk in chunks])
+        log['element_state_offsets'] = np.concatenate(offsets)
+        log['state_keyframes'] = np.concatenate([chunk['state_keyframes'] for chunk in chunks])
+
+    return log
+
+def load_streaming_log(path) -> tuple[list[Element], list[EventType], list[list[Event]], list[list[Element]], EventIndex]:
+    return log_from_arrays(read_streaming_log(path))
+
+def convert_streaming_log(stream_path, npz_path= None) -> str:
+
+    if npz_path is None: npz_path = os.path.splitext(stream_path)[0] + '.npz'
+    if not npz_path.endswith('.npz'): npz_path += '.npz'
+
+    np.savez_compressed(npz_path, **read_streaming_log(stream_path))
+
+    return npz_path
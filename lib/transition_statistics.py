@@ -0,0 +1,197 @@
+import numpy as np
+
+from .classes import Element, Event, EventType
+from .event_index import EventIndex
+from .mapped_recording import MappedEvents, MappedRecording
+
+"""
+transition_statistics.py
+
+Functions:
+- __init__(self, element_pool: list[Element], event_pool: list[EventType], events_per_frame: list[list[Event]], event_index: EventIndex = None)
+  Scan the log once and count, for each (trigger, element), how many times the trigger fired and, for each (trigger, effect, element), how many times the effect followed in the next frame.
+  If the event_index of the log is passed, the counts are taken from its frame arrays instead of scanning the events.
+  If events_per_frame are the events of a MappedRecording, the counts are computed with array operations on its mapped arrays
+  (no Event is created, except the two needed for the last transition).
+
+- fired(self, trigger_id) -> bool
+  True if the trigger fired at least once (on any element) in a frame that has a next frame.
+
+- triggered(self, trigger_id, element_id) -> int
+  Number of times the trigger fired on the element.
+
+- hits(self, trigger_id, effect_id, element_id) -> int
+  Number of times the trigger fired on the element and the effect on the same element followed in the next frame.
+
+- misses(self, trigger_id, effect_id, element_id) -> int
+  Number of times the trigger fired on the element and the effect didn't follow.
+
+- should_be_rule -> set[tuple[int, int, int]]
+  (trigger, effect, element) transitions observed at least once in the log.
+
+Dependencies:
+- numpy
+"""
+
+class TransitionStatistics:
+
+    def __init__(self, element_pool: list[Element], event_pool: list[EventType], events_per_frame: list[list[Event]], event_index: EventIndex = None):
+
+        self._element_pool = element_pool
+        self._event_pool = event_pool
+        self._n_frames = len(events_per_frame)
+
+        self._trigger_count: dict[tuple[int, int], int] = {}
+        self._follow_count: dict[tuple[int, int, int], int] = {}
+        self._fired: set[int] = set()
+
+        if isinstance(events_per_frame, MappedEvents): last_event, last_next_event = self._count_from_recording(events_per_frame.recording)
+        elif event_index is None: last_event, last_next_event = self._count_from_events(events_per_frame)
+        else: last_event, last_next_event = self._count_from_index(events_per_frame, event_index)
+
+        self._should_be_rule = set(self._follow_count.keys())
+
+        # compute_fitness_4 marks one more transition after its scan, built from the last event inspected and
+        # the last event of the next frame it was compared with. Mirrored here so that both give the same score.
+        if last_event is not None and last_next_event is not None:
+            self._should_be_rule.add((last_event.event_type.id, last_next_event.event_type.id, last_event.subject.id))
+
+    def _count_from_events(self, events_per_frame: list[list[Event]]) -> tuple[Event, Event]:
+
+        last_event = None
+        last_next_event = None
+
+        for frame_id in range(len(events_per_frame) - 1):
+
+            next_frame_events = events_per_frame[frame_id + 1]
+
+            next_effects: dict[int, set[int]] = {}
+            for nfe in next_frame_events:
+                next_effects.setdefault(nfe.subject.id, set()).add(nfe.event_type.id)
+
+            for current_event in events_per_frame[frame_id]:
+
+                trigger_id = current_event.event_type.id
+                subject_id = current_event.subject.id
+
+                self._fired.add(trigger_id)
+                self._trigger_count[trigger_id, subject_id] = self._trigger_count.get((trigger_id, subject_id), 0) + 1
+
+                if subject_id in next_effects:
+                    last_next_event = next_frame_events[-1]
+                    for effect_id in next_effects[subject_id]:
+                        self._follow_count[trigger_id, effect_id, subject_id] = self._follow_count.get((trigger_id, effect_id, subject_id), 0) + 1
+
+                last_event = current_event
+
+        return last_event, last_next_event
+
+    def _count_from_index(self, events_per_frame: list[list[Event]], event_index: EventIndex) -> tuple[Event, Event]:
+
+        event_types_per_element: dict[int, list[int]] = {}
+        for event_type_id, element_id in event_index.keys:
+            event_types_per_element.setdefault(element_id, []).append(event_type_id)
+
+        for (trigger_id, element_id) in event_index.keys:
+
+            trigger_frames = event_index.frames(trigger_id, element_id)
+            trigger_frames = trigger_frames[trigger_frames < self._n_frames - 1]
+            if len(trigger_frames) == 0: continue
+
+            self._fired.add(trigger_id)
+            self._trigger_count[trigger_id, element_id] = len(trigger_frames)
+
+            for effect_id in event_types_per_element[element_id]:
+                n_follow = int(np.count_nonzero(np.isin(trigger_frames + 1, event_index.frames(effect_id, element_id))))
+                if n_follow > 0: self._follow_count[trigger_id, effect_id, element_id] = n_follow
+
+        # the last transition inspected only needs the tail of the log
+        last_event = None
+        for frame_id in range(len(events_per_frame) - 2, -1, -1):
+            if events_per_frame[frame_id]:
+                last_event = events_per_frame[frame_id][-1]
+                break
+
+        last_next_event = None
+        for frame_id in range(len(events_per_frame) - 2, -1, -1):
+            if any(event.subject.id in event_index.subjects(frame_id + 1) for event in events_per_frame[frame_id]):
+                last_next_event = events_per_frame[frame_id + 1][-1]
+                break
+
+        return last_event, last_next_event
+
+    def _count_from_recording(self, recording: MappedRecording) -> tuple[Event, Event]:
+
+        event_frame, event_type, event_subject = (np.asarray(array, dtype= np.int64) for array in recording.event_arrays)
+        if len(event_frame) == 0: return None, None
+
+        n_types = len(recording.event_pool)
+        n_subjects = int(event_subject.max()) + 1
+
+        # distinct (frame, subject, event_type) of the log, sorted by (frame, subject)
+        keys = np.unique((event_frame * n_subjects + event_subject) * n_types + event_type)
+        frame_subject_keys = keys // n_types
+        key_types = keys % n_types
+
+        triggers = event_frame < self._n_frames - 1
+        trigger_frame, trigger_type, trigger_subject = event_frame[triggers], event_type[triggers], event_subject[triggers]
+
+        self._fired.update(np.unique(trigger_type).tolist())
+
+        trigger_keys, counts = np.unique(trigger_type * n_subjects + trigger_subject, return_counts= True)
+        for key, count in zip(trigger_keys.tolist(), counts.tolist()):
+            self._trigger_count[divmod(key, n_subjects)] = count
+
+        # every trigger occurrence paired with each distinct event type of its subject in the next frame
+        next_keys = (trigger_frame + 1) * n_subjects + trigger_subject
+        start = np.searchsorted(frame_subject_keys, next_keys, side= 'left')
+        n_next = np.searchsorted(frame_subject_keys, next_keys, side= 'right') - start
+
+        positions = np.repeat(start, n_next) + np.arange(int(n_next.sum())) - np.repeat(np.cumsum(n_next) - n_next, n_next)
+        follow_keys = (np.repeat(trigger_type, n_next) * n_types + key_types[positions]) * n_subjects + np.repeat(trigger_subject, n_next)
+
+        follow_keys, counts = np.unique(follow_keys, return_counts= True)
+        for key, count in zip(follow_keys.tolist(), counts.tolist()):
+            rule_key, subject_id = divmod(key, n_subjects)
+            self._follow_count[(*divmod(rule_key, n_types), subject_id)] = count
+
+        # the last transition: last event before the last frame, last event of the last frame that followed one of its subjects
+        last_event = recording.event(len(trigger_frame) - 1) if len(trigger_frame) else None
+
+        last_next_event = None
+        if (n_next > 0).any():
+            frame_id = int(trigger_frame[n_next > 0].max())
+            last_next_event = recording.event(int(recording.frame_offsets[frame_id + 2]) - 1)
+
+        return last_event, last_next_event
+
+    @property
+    def element_pool(self) -> list[Element]:
+        return self._element_pool
+
+    @property
+    def event_pool(self) -> list[EventType]:
+        return self._event_pool
+
+    @property
+    def n_frames(self) -> int:
+        return self._n_frames
+
+    @property
+    def should_be_rule(self) -> set[tuple[int, int, int]]:
+        return self._should_be_rule
+
+    def __repr__(self):
+        return f'TransitionStatistics({self._n_frames} frames, {len(self._trigger_count)} triggers, {len(self._follow_count)} transitions)'
+
+    def fired(self, trigger_id) -> bool:
+        return trigger_id in self._fired
+
+    def triggered(self, trigger_id, element_id) -> int:
+        return self._trigger_count.get((trigger_id, element_id), 0)
+
+    def hits(self, trigger_id, effect_id, element_id) -> int:
+        return self._follow_count.get((trigger_id, effect_id, element_id), 0)
+
+    def misses(self, trigger_id, effect_id, element_id) -> int:
+        return self.triggered(trigger_id, element_id) - self.hits(trigger_id, effect_id, element_id)
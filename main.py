@@ -1,7 +1,9 @@
 import os
-import pickle
+import tempfile
 
-from lib.classes import Element, EventType, Event
+from lib.columnar_log import convert_pickle_log, load_columnar_log
+from lib.log_cache import latest_log, load_cached_log
+from lib.mapped_recording import MappedRecording
 from lib.evolutionary_algorithm import EvolutionaryAlgorithm
 
 
@@ -14,61 +16,30 @@ log_file_name = None
 #log_file_name = 'arkanoid_log_20_10_2024_16_31_59.pkl' # added change_color
 log_file_name = 'arkanoid_log_20_10_2024_16_48_34.pkl' # added lose game if bottom hit
 
-if log_file_name is None: # use last saved
+use_cache = True # pickled logs are preprocessed once and cached in logs/arkanoid_logs/.cache (see lib/log_cache.py)
 
-    log_files_name = os.listdir('logs/arkanoid_logs')
-    if not log_files_name: raise Exception('no saved logs')
-    log_file_name = sorted(log_files_name, reverse= True)[0]
+if log_file_name is None: # use last saved (by the timestamp in the name)
+    log_file_name = latest_log('logs/arkanoid_logs')
 
 log_file_path = f'logs/arkanoid_logs/{log_file_name}'
-with open(log_file_path, 'rb') as log_file:
-    log = pickle.load(log_file)
 
-print(f'{log_file_path} loaded')
+if os.path.isdir(log_file_path): # memory-mapped recording, frames are read lazily (see lib/mapped_recording.py)
 
+    recording = MappedRecording(log_file_path)
+    element_pool, event_pool = recording.element_pool, recording.event_pool
+    events_per_frame, elements_per_frame, event_index = recording.events_per_frame, recording.elements_per_frame, None
+    print(f'{recording} loaded')
 
-## Create element_pool and event_pool
+elif log_file_path.endswith('.npz') or use_cache: # columnar log (or cache of the pickled log), already split in pools, events and index (see lib/columnar_log.py)
 
-events_per_frame = []
-event_pool = {}
-elements_per_frame = []
-element_pool = {}
-event_type_id = 0
+    element_pool, event_pool, events_per_frame, elements_per_frame, event_index = load_cached_log(log_file_path)
+    print(f'{log_file_path} loaded')
 
-for frame in log:
-    frame_id = frame['frame_id']
+else: # pickled log converted in a temporary directory, nothing is cached (same conversion of the cache, see lib/columnar_log.py)
 
-    elements = []
-    for description, elem in frame['elements'].items():
-
-        if elem['id'] in element_pool.keys():
-            elements.append(element_pool[elem['id']])
-
-        else:
-            new_elem = Element(elem['id'], description, None)
-            element_pool[elem['id']] = new_elem
-            elements.append(new_elem)
-
-    elements_per_frame.append(elements)
-
-    events = []
-    for event in frame['events']:
-        description = event['description']
-        subject = event['subject']
-
-        #if subject: # TODO implement NoElement Element and assign it to 0 id
-        if True:
-
-            if description not in event_pool.keys():
-                event_pool[description] = EventType(event_type_id, description)
-                event_type_id += 1
-                
-            events.append(Event(event_pool[description], element_pool[subject]))
-    
-    events_per_frame.append(events)
-
-element_pool: list[Element] = list(element_pool.values())
-event_pool: list[EventType] = list(event_pool.values())
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        element_pool, event_pool, events_per_frame, elements_per_frame, event_index = load_columnar_log(convert_pickle_log(log_file_path, os.path.join(tmp_dir, 'log.npz')))
+    print(f'{log_file_path} loaded')
 
 print('\n-------------------------------------\nelement pool:\n')
 print(element_pool)
@@ -96,9 +67,9 @@ if False:
     bricks = []
     walls = []
     for i, elem in enumerate(element_pool):
-        if elem == 'ball':
+        if elem.has_description('ball'):
             ball = Object(666, [elem])
-        if elem == 'paddle_center':
+        if elem.has_description('paddle_center'):
             paddle = Object(667, [elem])
         if 'brick' in elem.description:
             bricks.append(Object(668 + i, [elem]))
@@ -109,9 +80,9 @@ if False:
     bounce = None
     disappearance = None
     for event_type in event_pool:
-        if event_type == 'collision': collision = event_type
-        if event_type == 'bounce': bounce = event_type
-        if event_type == 'disappearance': disappearance = event_type
+        if event_type.has_description('collision'): collision = event_type
+        if event_type.has_description('bounce'): bounce = event_type
+        if event_type.has_description('disappearance'): disappearance = event_type
 
     ball_rule = Rule(666, collision, bounce)
     bricks_rule = Rule(667, collision, disappearance)
@@ -124,7 +95,7 @@ if False:
     
     print('my_cat:')
     print(my_cat)
-    my_cat.compute_fitness(events_per_frame, log= True)
+    my_cat.compute_fitness(events_per_frame, log= True, event_index= event_index)
     print(f'my_cat_fitness: {my_cat.fitness}') # 81 with latest (change based on event_pool and element_pool)
 
     exit()
@@ -132,14 +103,32 @@ if False:
 
 ## initialize evolution
 
-evo = EvolutionaryAlgorithm(element_pool, event_pool, events_per_frame).initialize_population(num_individuals= 100, lifespan= 1)
+broker_address = None # e.g. ('localhost', 6000): the evaluation is done by the workers started with evaluation_worker.py (see lib/distributed_evaluator.py)
+broker_authkey = os.environ.get('ARKANOID_BROKER_AUTHKEY') # the secret shared with the workers, required with broker_address
+
+if broker_address is not None:
+    if not broker_authkey: raise Exception('set ARKANOID_BROKER_AUTHKEY to use broker_address')
+    broker_authkey = broker_authkey.encode()
+
+evo = EvolutionaryAlgorithm(element_pool, event_pool, events_per_frame, event_index, broker_address= broker_address, broker_authkey= broker_authkey).initialize_population(num_individuals= 100, lifespan= 1)
 
 ## run evolution
 
+checkpoint_path = None # e.g. 'evolution.ckpt': a checkpoint every checkpoint_every generations (see lib/checkpoint.py)
+checkpoint_every = 50
+resume = False # continue the run of the checkpoint of checkpoint_path instead of starting a new one
+steady_state = False # one offspring at a time, tournament selection and replacement of the worst individual (no checkpoints)
+async_executor = None # 'process' or 'thread': steady state with the offspring evaluated by a pool of workers while the next ones are produced
+
 try:
-    evo.run(1000, patience= 200)
+    if async_executor is not None: evo.run_async(100000, tournament_size= 3, executor= async_executor)
+    elif steady_state: evo.run_steady_state(100000, tournament_size= 3)
+    elif resume and checkpoint_path is not None and os.path.exists(checkpoint_path): evo.resume_from(checkpoint_path, checkpoint_every= checkpoint_every)
+    else: evo.run(1000, patience= 200, checkpoint_path= checkpoint_path, checkpoint_every= checkpoint_every)
 except KeyboardInterrupt:
     print('evolution stopped by user request')
+finally:
+    evo.close()
 
 ## evaluate results
 
@@ -147,7 +136,7 @@ print('========================================================================'
 print('========================================================================')
 
 winner = evo.get_winner()
-winner.compute_fitness(events_per_frame) #, log= True) # log= True to show fitness computation on winner
+winner.compute_fitness(events_per_frame, statistics= evo.statistics) #, log= True) # log= True to show fitness computation on winner
 print('winner:\n')
 print(winner)
 print(f'best_fitness: {winner.fitness}\n')
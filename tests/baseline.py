@@ -0,0 +1,205 @@
+import random
+
+from lib.classes import Individual
+
+"""
+baseline.py
+
+The original fitness, the reference of every optimized way of scoring an individual, and the populations it is checked on.
+
+Functions:
+- baseline_fitness_4(individual: Individual, events_per_frame: list[list[Event]]) -> int
+  The original compute_fitness_4, with the comparisons between different types (event == event type, element in events, ...)
+  written out by id.
+
+- random_population(element_pool, event_pool, seed, n_individuals= 25, max_mutations= 30) -> list[Individual]
+  Random individuals, cloned (or copied on write) and mutated a random number of times, the same for the same seed.
+
+- rescored(individuals: list[Individual], score) -> list[int]
+  Fitness of fresh copies of the individuals (same genome, nothing cached), scored by score(individual).
+
+Dependencies:
+-
+"""
+
+SEEDS = (0, 1, 2)
+
+def _same_rule(rule, other) -> bool:
+    return rule.id == other.id or rule.pair == other.pair
+
+def baseline_fitness_4(individual: Individual, events_per_frame) -> int:
+
+    score = 0
+
+    element_pool, event_pool = individual.element_pool, individual.event_pool
+    objects, rules, categories = individual.objects, individual.rules, individual.categories
+
+    elements_correctness = {elem.id: {rule.id: [0, 0, False] for rule in rules} for elem in element_pool}
+    objects_correctness = {obj.id: {rule.id: [0, 0, False] for rule in rules} for obj in objects}
+    categories_correctness = {cat.id: {rule.id: [0, 0] for rule in rules} for cat in categories}
+    all_correct_cats = 0
+
+    rule_usage = {(et1.id, et2.id, elem.id): [False, False] for et1 in event_pool for et2 in event_pool for elem in element_pool}
+
+    current_event, nfe = None, None
+
+    for cat in categories:
+
+        cat_is_correct = True
+
+        for frame_id in range(len(events_per_frame) - 1):
+
+            next_frame_events = events_per_frame[frame_id + 1]
+
+            for current_event in events_per_frame[frame_id]:
+
+                if any(event.subject.id == current_event.subject.id for event in next_frame_events):
+                    for nfe in next_frame_events:
+                        if nfe.subject.id == current_event.subject.id:
+                            rule_usage[current_event.event_type.id, nfe.event_type.id, current_event.subject.id][0] = True
+
+                for cat_rule in cat.rules:
+
+                    cat_used = False
+                    cat_rule_is_correct = True
+
+                    if cat_rule.trigger.id == current_event.event_type.id:
+
+                        for cat_obj in cat.objects:
+
+                            cat_obj_used = False
+                            obj_is_correct = True
+
+                            objects_correctness[cat_obj.id][cat_rule.id][2] = True
+
+                            for cat_obj_elem in cat_obj.elements:
+
+                                elements_correctness[cat_obj_elem.id][cat_rule.id][2] = True
+
+                                if current_event.subject.id == cat_obj_elem.id:
+
+                                    cat_obj_used, cat_used = True, True
+                                    rule_usage[cat_rule.trigger.id, cat_rule.effect.id, current_event.subject.id][1] = True
+
+                                    if any(event.event_type.id == cat_rule.effect.id and event.subject.id == current_event.subject.id for event in next_frame_events):
+                                        elements_correctness[cat_obj_elem.id][cat_rule.id][0] += 1
+                                    else:
+                                        cat_is_correct, obj_is_correct, cat_rule_is_correct = False, False, False
+                                        elements_correctness[cat_obj_elem.id][cat_rule.id][1] += 1
+
+                            if cat_obj_used:
+                                if obj_is_correct: objects_correctness[cat_obj.id][cat_rule.id][0] += 1
+                                else: objects_correctness[cat_obj.id][cat_rule.id][1] += 1
+
+                    if cat_used:
+                        if cat_rule_is_correct: categories_correctness[cat.id][cat_rule.id][0] += 1
+                        else: categories_correctness[cat.id][cat_rule.id][1] += 1
+
+        if cat.rules and cat_is_correct:
+            all_correct_cats += 1
+
+    for elem in element_pool:
+
+        objs = []
+        objs_rules = {}
+        for obj in objects:
+            if any(obj_elem.id == elem.id for obj_elem in obj.elements):
+                objs.append(obj.id)
+                for cat in categories:
+                    if any(cat_obj.id == obj.id for cat_obj in cat.objects):
+                        for rule in cat.rules: objs_rules[rule.id, obj.id] = objs_rules.get((rule.id, obj.id), 0) + 1
+
+        cats = []
+        cats_rules = {}
+        for cat in categories:
+            if elem.id in cat.get_elements_id():
+                cats.append(cat.id)
+                for rule in cat.rules: cats_rules[rule.id, cat.id] = cats_rules.get((rule.id, cat.id), 0) + 1
+
+        if objs:
+            if len(objs) > 1: score -= pow(2, len(objs) - 1)
+        else: score -= 10
+
+        for rep in objs_rules.values():
+            if rep > 1: score -= pow(5, rep - 1)
+
+        if cats:
+            if len(cats) > 1: score -= pow(2, len(cats) - 1)
+        else: score -= 10
+
+        for rep in cats_rules.values():
+            if rep > 1: score -= pow(2, rep - 1)
+
+        for rule in rules:
+            ec = elements_correctness[elem.id][rule.id]
+            if ec[2]:
+                if ec[1] > 0: score -= 1
+                elif ec[0] > 0: score += 1
+                else: score -= 1
+
+    for obj in objects:
+
+        if len(obj.elements) > 1: score -= len(obj.elements) - 1
+
+        if not any(cat_obj.id == obj.id for cat in categories for cat_obj in cat.objects): score -= 1
+
+        for rule in rules:
+            oc = objects_correctness[obj.id][rule.id]
+            if oc[2]:
+                if oc[1] > 0: score -= 1
+                elif oc[0] > 0: score += 2
+                else: score -= 1
+
+    for cat in categories:
+
+        score -= len(cat.objects)
+
+        for rule in rules:
+            if any(_same_rule(cat_rule, rule) for cat_rule in cat.rules):
+                cc = categories_correctness[cat.id][rule.id]
+                if cc[1] > 0: score -= 1
+                elif cc[0] > 0: score += 1
+                else: score -= 1
+
+    score -= len(categories)
+    score += all_correct_cats * 2
+    score -= len(rules)
+
+    for rule in rules:
+        n_cat = len([cat.id for cat in categories if any(_same_rule(cat_rule, rule) for cat_rule in cat.rules)])
+        if n_cat > 1: score -= pow(2, n_cat)
+
+    # the original marks the last transition it inspected, whatever it was
+    if current_event is not None and nfe is not None:
+        rule_usage[current_event.event_type.id, nfe.event_type.id, current_event.subject.id][0] = True
+
+    for should_be_rule, is_rule in rule_usage.values():
+        if should_be_rule and is_rule: score += 1
+        elif should_be_rule or is_rule: score -= 1
+
+    return score
+
+def random_population(element_pool, event_pool, seed, n_individuals= 25, max_mutations= 30) -> list[Individual]:
+
+    # random individuals, cloned (or copied on write) and mutated a random number of times
+    random.seed(seed)
+    population = []
+    for _ in range(n_individuals):
+        individual = Individual(element_pool, event_pool).initialize()
+        for _ in range(random.randint(0, max_mutations)):
+            if random.random() < 0.3: individual = Individual(element_pool, event_pool, individual, copy_on_write= random.random() < 0.5)
+            individual.mutate()
+        population.append(individual)
+
+    return population
+
+def rescored(individuals: list[Individual], score) -> list[int]:
+
+    # fitness of fresh copies of the individuals (same genome, nothing cached), scored by score(individual)
+    fitness = []
+    for individual in individuals:
+        copy = Individual.from_genome(individual.element_pool, individual.event_pool, individual.to_genome())
+        score(copy)
+        fitness.append(copy.fitness)
+
+    return fitness
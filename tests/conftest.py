@@ -0,0 +1,34 @@
+import os
+
+import pytest
+
+from lib.log_cache import load_cached_log
+from lib.transition_statistics import TransitionStatistics
+
+"""
+conftest.py
+
+Fixtures shared by the tests, all on the same checked-in log (LOG_PATH).
+
+Functions:
+- log -> tuple[list[Element], list[EventType], list[list[Event]], EventIndex]
+  element_pool, event_pool, events_per_frame and event_index of the log, loaded once (the preprocessed cache goes in a temporary directory).
+
+- statistics -> TransitionStatistics
+  Transition statistics of the log.
+
+Dependencies:
+- pytest
+"""
+
+LOG_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'logs', 'arkanoid_logs', 'arkanoid_log_20_10_2024_16_48_34.pkl')
+
+@pytest.fixture(scope= 'session')
+def log(tmp_path_factory):
+    element_pool, event_pool, events_per_frame, elements_per_frame, event_index = load_cached_log(LOG_PATH, cache_dir= str(tmp_path_factory.mktemp('cache')))
+    return element_pool, event_pool, events_per_frame, event_index
+
+@pytest.fixture(scope= 'session')
+def statistics(log):
+    element_pool, event_pool, events_per_frame, event_index = log
+    return TransitionStatistics(element_pool, event_pool, events_per_frame, event_index)
@@ -0,0 +1,90 @@
+import random
+import threading
+import concurrent.futures
+
+import pytest
+
+from lib.async_evaluator import AsyncEvaluator
+from lib.classes import Individual
+from lib.evolutionary_algorithm import EvolutionaryAlgorithm
+from lib.population_evaluator import PopulationEvaluator
+
+from baseline import baseline_fitness_4, random_population
+
+"""
+test_async_evaluator.py
+
+Both executors of the AsyncEvaluator give the serial fitness, in whatever order the evaluations complete. run_async
+selects each offspring as soon as its evaluation completes (a slow one does not hold back the others), with one worker
+and one offspring in flight it is the steady state run, and with more it ends with individuals scored as the original
+fitness does.
+
+Dependencies:
+- pytest
+"""
+
+@pytest.mark.parametrize('executor', ('thread', 'process'))
+def test_async_evaluator_matches_population_evaluator(log, statistics, executor):
+
+    element_pool, event_pool, events_per_frame, event_index = log
+    genomes = [individual.to_genome() for individual in random_population(element_pool, event_pool, seed= 6, n_individuals= 20)]
+    expected = PopulationEvaluator(statistics).evaluate([Individual.from_genome(element_pool, event_pool, genome) for genome in genomes])
+
+    evaluator = AsyncEvaluator(element_pool, event_pool, events_per_frame, statistics, workers= 2, executor= executor)
+    try:
+        futures = {evaluator.submit(Individual.from_genome(element_pool, event_pool, genome)): i for i, genome in enumerate(genomes)}
+        fitness = {futures[future]: future.result() for future in concurrent.futures.as_completed(futures)}
+        assert [fitness[i] for i in range(len(genomes))] == [int(f) for f in expected]
+    finally:
+        evaluator.close()
+
+def final_population(log, run, seed= 8):
+
+    element_pool, event_pool, events_per_frame, event_index = log
+    random.seed(seed)
+    evo = EvolutionaryAlgorithm(element_pool, event_pool, events_per_frame, event_index).initialize_population(20)
+    run(evo)
+
+    return evo, [(individual.to_genome()[1:], individual.fitness) for individual in evo.population]
+
+def test_single_worker_is_the_steady_state_run(log):
+
+    evo, population = final_population(log, lambda evo: evo.run_async(60, workers= 1, executor= 'thread', in_flight= 1, patience= 60, verbose= False))
+    assert population == final_population(log, lambda evo: evo.run_steady_state(60, patience= 60, verbose= False))[1]
+
+def test_slow_evaluation_does_not_hold_back_the_others(log, monkeypatch):
+
+    first: list[Individual] = [] # the first offspring submitted, evaluated only after another one is selected
+    selected: list[Individual] = []
+    other_selected = threading.Event()
+    lock = threading.Lock()
+    evaluate, replace_worst = AsyncEvaluator._evaluate, EvolutionaryAlgorithm._replace_worst
+
+    def slow_first(self, individual):
+        with lock:
+            is_first = not first
+            if is_first: first.append(individual)
+        if is_first: assert other_selected.wait(timeout= 30)
+        return evaluate(self, individual)
+
+    def record(self, heap, child, counter):
+        selected.append(child)
+        if child is not first[0]: other_selected.set()
+        return replace_worst(self, heap, child, counter)
+
+    monkeypatch.setattr(AsyncEvaluator, '_evaluate', slow_first)
+    monkeypatch.setattr(EvolutionaryAlgorithm, '_replace_worst', record)
+
+    final_population(log, lambda evo: evo.run_async(10, workers= 2, executor= 'thread', patience= 10, verbose= False))
+    assert len(selected) == 10
+    assert selected.index(first[0]) > 0
+
+@pytest.mark.parametrize('executor', ('thread', 'process'))
+def test_async_run_scores_as_the_baseline(log, executor):
+
+    element_pool, event_pool, events_per_frame, event_index = log
+    evo, population = final_population(log, lambda evo: evo.run_async(40, workers= 2, executor= executor, patience= 40, verbose= False))
+
+    assert len(population) == 20
+    assert [individual.fitness for individual in evo.population] == [baseline_fitness_4(individual, events_per_frame) for individual in evo.population]
+    assert evo.get_winner().fitness == evo.old_best
@@ -0,0 +1,62 @@
+import random
+
+import pytest
+
+from lib.classes import Object
+
+from baseline import SEEDS, random_population
+
+"""
+test_bitmasks.py
+
+The element-id bitmasks of objects and categories always answer like the element lists they stand for, after any
+sequence of mutations and after each of the methods that change the elements of an object.
+
+Dependencies:
+- pytest
+"""
+
+def assert_masks_match_lists(individual, element_pool):
+
+    for obj in individual.objects:
+        assert obj.mask == sum(1 << elem.id for elem in set(obj.elements))
+        for elem in element_pool: assert obj.has_element(elem) == (elem in obj.elements)
+
+    for cat in individual.categories:
+        assert cat.get_elements_id() == sorted({elem.id for obj in cat.objects for elem in obj.elements})
+
+@pytest.mark.parametrize('seed', SEEDS)
+def test_masks_match_lists_after_mutations(log, seed):
+
+    element_pool, event_pool, events_per_frame, event_index = log
+    for individual in random_population(element_pool, event_pool, seed):
+        assert_masks_match_lists(individual, element_pool)
+
+def test_object_methods_keep_the_mask(log):
+
+    element_pool, event_pool, events_per_frame, event_index = log
+    random.seed(0)
+
+    obj = Object(0, [element_pool[0]])
+    other = Object(1, element_pool[1:4])
+
+    def assert_match(obj):
+        assert obj.mask == Object.elements_mask(obj.elements)
+        assert all(obj.has_element(elem) == (elem in obj.elements) for elem in element_pool)
+
+    obj.add_element(element_pool[5])
+    obj.add_element(element_pool[5]) # already present
+    assert_match(obj)
+    obj.remove_element(element_pool[0], elems_to_add= [element_pool[6]])
+    obj.remove_element(element_pool[0]) # not present
+    assert_match(obj)
+    obj.fuse(other)
+    obj.fuse(Object(2, [element_pool[1]])) # already present
+    assert_match(obj)
+    for _ in range(50):
+        obj.mutate(element_pool)
+        assert_match(obj)
+    for new_id in range(3, 6):
+        if len(obj.elements) > 1:
+            assert_match(obj.divide(new_id))
+            assert_match(obj)
@@ -0,0 +1,66 @@
+import random
+
+import pytest
+
+from lib.category_memo import CategoryMemo
+from lib.evolutionary_algorithm import EvolutionaryAlgorithm
+from lib.fitness_cache import FitnessCache
+from lib.lru_cache import LRUCache
+
+from baseline import SEEDS, baseline_fitness_4, random_population, rescored
+
+"""
+test_category_memo.py
+
+Scoring with a CategoryMemo gives the fitness of the original compute_fitness_4 (baseline_fitness_4, see baseline.py),
+whether the scan of a category is computed or taken from the memo, the memo evicts like the fitness cache (both are an
+LRUCache), and a run with the memo ends with the population of a run without it.
+
+Dependencies:
+- pytest
+"""
+
+@pytest.mark.parametrize('seed', SEEDS)
+def test_memo_scoring_matches_baseline(log, seed):
+
+    element_pool, event_pool, events_per_frame, event_index = log
+    population = random_population(element_pool, event_pool, seed)
+    expected = [baseline_fitness_4(individual, events_per_frame) for individual in population]
+
+    memo = CategoryMemo()
+    assert rescored(population, lambda ind: ind.compute_fitness_4(events_per_frame, memo= memo)) == expected
+    assert rescored(population, lambda ind: ind.compute_fitness_4(events_per_frame, event_index= event_index, memo= memo)) == expected # from the memo
+    assert memo.hits > 0
+
+def test_memo_and_fitness_cache_share_the_lru():
+
+    for cache in (CategoryMemo(max_size= 2), FitnessCache(max_size= 2)):
+        assert isinstance(cache, LRUCache)
+        cache.put('a', 1)
+        cache.put('b', 2)
+        cache.get('a')
+        cache.put('c', 3)
+        assert cache.get('b') is None
+        assert (len(cache), cache.hits, cache.misses) == (2, 1, 1)
+
+def test_run_with_memo_matches_run_without(log):
+
+    element_pool, event_pool, events_per_frame, event_index = log
+
+    def final_population(**options):
+        random.seed(7)
+        evo = EvolutionaryAlgorithm(element_pool, event_pool, events_per_frame, event_index, **options).initialize_population(20)
+        evo.evolve(5)
+        return evo, [(individual.to_genome()[1:], individual.fitness) for individual in evo.population]
+
+    evo, with_memo = final_population(category_memo_size= 1000)
+    assert evo.evaluator is None # the memo replaces the evaluator
+    assert evo.category_memo.hits > 0
+    assert with_memo == final_population()[1]
+
+@pytest.mark.parametrize('options', ({'workers': 2}, {'broker_address': ('localhost', 0), 'broker_authkey': b'secret'}), ids= ('workers', 'broker'))
+def test_memo_with_workers_raises(log, options):
+
+    element_pool, event_pool, events_per_frame, event_index = log
+    with pytest.raises(Exception, match= 'category_memo_size'):
+        EvolutionaryAlgorithm(element_pool, event_pool, events_per_frame, event_index, category_memo_size= 1000, **options)
@@ -0,0 +1,68 @@
+import os
+import json
+import zlib
+import random
+
+import pytest
+
+from lib.checkpoint import CheckpointWriter, load_checkpoint, save_checkpoint
+from lib.evolutionary_algorithm import EvolutionaryAlgorithm
+
+"""
+test_checkpoint.py
+
+A run resumed from its checkpoint ends as if it was never stopped, in every evaluation mode; checkpoints are written only
+when a path is given, the writer keeps the last state, and a checkpoint of another version is rejected.
+
+Dependencies:
+- pytest
+"""
+
+@pytest.mark.parametrize('options', ({}, {'batch_evaluation': False, 'copy_on_write': True}, {'cache_size': 1000}), ids= ('batch', 'incremental', 'cache'))
+def test_resume_from_checkpoint_matches_uninterrupted_run(log, tmp_path, options):
+
+    element_pool, event_pool, events_per_frame, event_index = log
+    checkpoint_path = str(tmp_path / 'evolution.ckpt')
+
+    def final_population(evo):
+        return [(individual.to_genome(), individual.fitness, individual.lifespan) for individual in evo.population]
+
+    random.seed(5)
+    evo = EvolutionaryAlgorithm(element_pool, event_pool, events_per_frame, event_index, **options).initialize_population(20, lifespan= 3)
+    evo.run(12, verbose= False, checkpoint_path= checkpoint_path, checkpoint_every= 5)
+    assert load_checkpoint(checkpoint_path)['generation'] == 10
+
+    random.seed(999) # the state of random comes from the checkpoint
+    resumed = EvolutionaryAlgorithm(element_pool, event_pool, events_per_frame, event_index, **options)
+    resumed.resume_from(checkpoint_path, verbose= False)
+
+    assert final_population(resumed) == final_population(evo)
+    assert resumed.old_best == evo.old_best
+
+def test_no_checkpoint_without_path(log, tmp_path, monkeypatch):
+
+    element_pool, event_pool, events_per_frame, event_index = log
+    monkeypatch.chdir(tmp_path)
+
+    random.seed(5)
+    evo = EvolutionaryAlgorithm(element_pool, event_pool, events_per_frame, event_index).initialize_population(10)
+    evo.run(6, verbose= False, checkpoint_every= 2)
+    assert os.listdir(tmp_path) == []
+
+def test_checkpoint_files(tmp_path):
+
+    path = str(tmp_path / 'evolution.ckpt')
+
+    checkpoint_writer = CheckpointWriter(path)
+    for generation in range(20): checkpoint_writer.write({'generation': generation, 'population': [{'genome': [[1, 2, 3], [], [], []]}], 'random_state': [3, [1, 2], None]})
+    checkpoint_writer.close()
+    assert 1 <= checkpoint_writer.written <= 20
+
+    state = load_checkpoint(path)
+    assert (state['generation'], state['population'][0]['genome'], state['random_state']) == (19, ((1, 2, 3), (), (), ()), (3, (1, 2), None))
+    assert os.listdir(tmp_path) == ['evolution.ckpt'] # no temporary file left
+
+    save_checkpoint(path, {'generation': 1, 'population': [], 'random_state': []})
+    with open(path, 'rb') as checkpoint_file: state = json.loads(zlib.decompress(checkpoint_file.read()))
+    with open(path, 'wb') as checkpoint_file: checkpoint_file.write(zlib.compress(json.dumps({**state, 'version': state['version'] + 1}).encode()))
+    with pytest.raises(Exception, match= 'unsupported checkpoint version'): load_checkpoint(path)
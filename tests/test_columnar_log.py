@@ -0,0 +1,68 @@
+import os
+import pickle
+
+import pytest
+
+from lib.columnar_log import convert_pickle_log, load_columnar_log
+from lib.event_index import EventIndex
+
+from conftest import LOG_PATH
+
+"""
+test_columnar_log.py
+
+A pickled log converted to the columnar format loads back as the pools, events, elements and index that the original
+main.py built parsing the pickle (pickled_log below), for each checked-in log. The first two logs have a game_start event
+on subject 0, that is not an element: the original parsing failed on them, so must the conversion.
+
+Dependencies:
+- pytest
+"""
+
+LOG_DIR = os.path.dirname(LOG_PATH)
+
+def pickled_log(path) -> tuple[list[tuple[int, str]], list[tuple[int, str]], list[list[tuple[int, int]]], list[list[int]]]:
+
+    # the parsing of the original main.py, by ids and descriptions: element_pool, event_pool, events_per_frame, elements_per_frame
+    with open(path, 'rb') as log_file:
+        log = pickle.load(log_file)
+
+    element_pool, event_pool = {}, {}
+    events_per_frame, elements_per_frame = [], []
+    for frame in log:
+        elements = []
+        for description, elem in frame['elements'].items():
+            element_pool.setdefault(elem['id'], description)
+            elements.append(elem['id'])
+        elements_per_frame.append(elements)
+
+        events = []
+        for event in frame['events']:
+            event_pool.setdefault(event['description'], len(event_pool))
+            element_pool[event['subject']] # the original failed here (KeyError) on a subject that is not an element
+            events.append((event_pool[event['description']], event['subject']))
+        events_per_frame.append(events)
+
+    return sorted(element_pool.items()), sorted((event_type_id, description) for description, event_type_id in event_pool.items()), events_per_frame, elements_per_frame
+
+@pytest.mark.parametrize('log_name', sorted(name for name in os.listdir(LOG_DIR) if name.endswith('.pkl')))
+def test_columnar_log_matches_pickled_log(tmp_path, log_name):
+
+    npz_path = convert_pickle_log(os.path.join(LOG_DIR, log_name), str(tmp_path / 'log.npz'))
+
+    try: expected = pickled_log(os.path.join(LOG_DIR, log_name))
+    except KeyError:
+        with pytest.raises(Exception, match= 'not an element of the log'): load_columnar_log(npz_path)
+        return
+
+    element_pool, event_pool, events_per_frame, elements_per_frame, event_index = load_columnar_log(npz_path)
+
+    assert sorted((elem.id, elem.description) for elem in element_pool) == expected[0]
+    assert [(event_type.id, event_type.description) for event_type in event_pool] == expected[1]
+    assert [[(event.event_type.id, event.subject.id) for event in events] for events in events_per_frame] == expected[2]
+    assert [[elem.id for elem in elements] for elements in elements_per_frame] == expected[3]
+
+    expected_index = EventIndex.from_events(events_per_frame)
+    assert event_index.n_frames == expected_index.n_frames == len(expected[2])
+    assert sorted(event_index.keys) == sorted(expected_index.keys)
+    for key in expected_index.keys: assert (event_index.frames(*key) == expected_index.frames(*key)).all()
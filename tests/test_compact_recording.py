@@ -0,0 +1,65 @@
+import numpy as np
+import pytest
+
+from lib.columnar_log import ColumnarLogWriter
+from lib.compact_recording import CompactRecording, convert_compact_recording
+from lib.game import Game
+from lib.log_farm import POLICIES
+
+"""
+test_compact_recording.py
+
+A game recorded as its seed and commands is replayed into the same log, element states included, of the game played
+frame by frame, after a round trip through the .replay file; a file that is not a replay or is truncated is rejected.
+
+Dependencies:
+- numpy
+- pytest
+"""
+
+MAX_FRAMES = 600
+
+def saved_arrays(log_writer, path) -> dict[str, np.ndarray]:
+    with np.load(log_writer.save(path), allow_pickle= False) as log: return {name: log[name] for name in log.files}
+
+def assert_same(log, other):
+    assert sorted(log) == sorted(other)
+    for name in log: assert np.array_equal(log[name], other[name]), name
+
+@pytest.mark.parametrize('policy', sorted(POLICIES))
+@pytest.mark.parametrize('seed', (0, 1))
+def test_replay_matches_played_game(tmp_path, seed, policy):
+
+    render = policy == 'tracking' # the grids are slow to draw, compared on one policy
+    game = Game(render= render, seed= seed)
+    log_writer = ColumnarLogWriter(keyframe_interval= 50)
+    n_frames = game.play(POLICIES[policy](seed), log_writer, MAX_FRAMES)
+    played = saved_arrays(log_writer, str(tmp_path / 'played.npz'))
+
+    recording = CompactRecording.record(seed, POLICIES[policy](seed), max_frames= MAX_FRAMES)
+    assert recording.n_frames == n_frames
+    loaded = CompactRecording.load(recording.save(str(tmp_path / 'game.replay')))
+    assert (loaded.seed, loaded.commands) == (seed, recording.commands)
+
+    log_writer = ColumnarLogWriter(keyframe_interval= 50)
+    replayed_game = loaded.replay(log_writer, render= render)
+    assert_same(played, saved_arrays(log_writer, str(tmp_path / 'replayed.npz')))
+    if render: assert (replayed_game.get_grid() == game.get_grid()).all()
+
+    # by default the conversion records the states
+    with np.load(convert_compact_recording(str(tmp_path / 'game.replay')), allow_pickle= False) as converted:
+        assert_same(played, {name: converted[name] for name in converted.files})
+
+def test_broken_replays_raise(tmp_path):
+
+    path = CompactRecording.record(0, POLICIES['tracking'](0), max_frames= 200).save(str(tmp_path / 'game.replay'))
+    with open(path, 'rb') as replay_file: data = replay_file.read()
+
+    (tmp_path / 'other.replay').write_bytes(b'NOTARPLY' + data[8:])
+    with pytest.raises(Exception, match= 'is not a replay'): CompactRecording.load(str(tmp_path / 'other.replay'))
+
+    (tmp_path / 'cut.replay').write_bytes(data[:-5])
+    with pytest.raises(Exception): CompactRecording.load(str(tmp_path / 'cut.replay'))
+
+    with pytest.raises(Exception, match= 'unknown command'): CompactRecording(0).add('paddle_up')
+    with pytest.raises(Exception, match= 'must be an int'): CompactRecording('0')
@@ -0,0 +1,103 @@
+import pickle
+
+import numpy as np
+import pytest
+
+from lib.columnar_log import ColumnarLogWriter
+from lib.controllers import NoisyTrackingController, RandomController, ReplayController, TrackingController
+from lib.game import COMMANDS, Game
+from lib.log_farm import POLICIES
+from lib.streaming_log import StreamingLogWriter
+
+from conftest import LOG_PATH
+
+"""
+test_controllers.py
+
+The policies of the farm: the tracking ones (and the guarded random one) keep the ball in play until the bricks are
+gone, the plain RandomController is random whatever the game and loses the ball, and ReplayController replays the
+commands of a log of any format.
+
+Dependencies:
+- numpy
+- pytest
+"""
+
+class RecordingController:
+
+    # forwards to controller and keeps the commands it played
+    def __init__(self, controller):
+        self._controller = controller
+        self.commands = []
+
+    def __call__(self, game):
+        self.commands.append(self._controller(game))
+        return self.commands[-1]
+
+def play(controller, seed, max_frames= 3000) -> tuple[Game, ColumnarLogWriter]:
+
+    game = Game(render= False, seed= seed)
+    log_writer = ColumnarLogWriter(keyframe_interval= None)
+    game.play(controller, log_writer, max_frames)
+    return game, log_writer
+
+@pytest.mark.parametrize('policy', ('tracking', 'noisy_tracking', 'guarded_random'))
+@pytest.mark.parametrize('seed', (0, 1))
+def test_policies_keep_the_ball_in_play(policy, seed):
+
+    game, log_writer = play(POLICIES[policy](seed), seed)
+    assert log_writer.event_counts['disappearance'] == len(game.brick_positions) # the game ended because the bricks are gone
+
+def test_random_controller_ignores_the_game():
+
+    assert repr(RandomController(seed= 5)) == 'RandomController(seed= 5, hold= (1, 10), guard= None, leash= None)'
+
+    # the same commands on two games with the ball in different places
+    games = (Game(render= False, seed= 0), Game(render= False, seed= 1))
+    games[1].paddle_x += 30
+    commands = [[controller(game) for _ in range(500)] for controller, game in zip((RandomController(seed= 5), RandomController(seed= 5)), games)]
+    assert commands[0] == commands[1]
+    assert set(commands[0]) == set(COMMANDS)
+
+    game, log_writer = play(RandomController(seed= 0), 0)
+    assert log_writer.event_counts['disappearance'] < len(game.brick_positions) # the game ended because the ball hit the bottom
+
+def test_noisy_tracking_without_noise_is_tracking():
+
+    game = Game(render= False, seed= 2)
+    tracking, noisy = TrackingController(), NoisyTrackingController(epsilon= 0., seed= 2)
+    for _ in range(300):
+        command = tracking(game)
+        assert noisy(game) == command
+        game.apply_command(command)
+        game.update()
+
+@pytest.mark.parametrize('log_format', ('.npz', '.stream'))
+def test_replay_controller_from_log(tmp_path, log_format):
+
+    path = str(tmp_path / f'log{log_format}')
+    controller = RecordingController(POLICIES['noisy_tracking'](4))
+    if log_format == '.npz':
+        game, log_writer = play(controller, 4, 400)
+        log_writer.save(path)
+    else:
+        with StreamingLogWriter(path, chunk_frames= 64, fsync= False) as log_writer: Game(render= False, seed= 4).play(controller, log_writer, 400)
+
+    replay = ReplayController.from_log(path)
+    assert replay.commands == controller.commands
+
+    def arrays(log_writer, name):
+        with np.load(log_writer.save(str(tmp_path / name)), allow_pickle= False) as log: return {name: log[name] for name in log.files}
+
+    played = arrays(play(POLICIES['noisy_tracking'](4), 4, 400)[1], 'played.npz')
+    replayed = arrays(play(replay, 4, 400)[1], 'replayed.npz')
+    for name in played: assert np.array_equal(played[name], replayed[name]), name
+
+def test_replay_controller_from_pickled_log():
+
+    with open(LOG_PATH, 'rb') as log_file: frames = pickle.load(log_file)
+    replay = ReplayController.from_log(LOG_PATH, default= 'paddle_left')
+
+    assert replay.commands == [command for frame in frames for command in frame['commands']]
+    game = Game(render= False, seed= 0)
+    assert [replay(game) for _ in range(len(replay.commands) + 2)][-2:] == ['paddle_left', 'paddle_left']
@@ -0,0 +1,63 @@
+import random
+
+import pytest
+
+from lib.classes import Individual
+from lib.evolutionary_algorithm import EvolutionaryAlgorithm
+
+from baseline import SEEDS, baseline_fitness_4
+from test_incremental_fitness import check_lineages
+
+"""
+test_copy_on_write.py
+
+Offspring that share objects and categories with their parent get the original fitness along mutated lineages, their
+mutations never leak into the parent or into the siblings sharing the same objects, and a run with copy on write ends
+with the population of a run that deep copies.
+
+Dependencies:
+- pytest
+"""
+
+@pytest.mark.parametrize('seed', SEEDS)
+def test_copy_on_write_scoring_matches_baseline(log, statistics, seed):
+
+    element_pool, event_pool, events_per_frame, event_index = log
+    random.seed(seed)
+    check_lineages(element_pool, event_pool, events_per_frame, statistics, copy_on_write= True)
+
+def test_siblings_do_not_share_mutations(log, statistics):
+
+    element_pool, event_pool, events_per_frame, event_index = log
+    random.seed(11)
+
+    parent = Individual(element_pool, event_pool).initialize()
+    for _ in range(15): parent.mutate()
+    parent.compute_fitness_5(statistics)
+    parent_genome = parent.to_genome()[1:]
+
+    children = [Individual(element_pool, event_pool, parent, copy_on_write= True) for _ in range(6)]
+    genomes = [child.to_genome()[1:] for child in children]
+    for i, child in enumerate(children):
+
+        for _ in range(random.randint(1, 4)): child.mutate()
+        child.compute_fitness_5(statistics)
+        assert child.fitness == baseline_fitness_4(child, events_per_frame)
+
+        genomes[i] = child.to_genome()[1:]
+        assert [sibling.to_genome()[1:] for sibling in children] == genomes # the siblings mutated before and after are untouched
+
+    assert parent.to_genome()[1:] == parent_genome
+    assert parent.fitness == baseline_fitness_4(parent, events_per_frame)
+
+def test_copy_on_write_run_matches_deep_copy_run(log):
+
+    element_pool, event_pool, events_per_frame, event_index = log
+
+    def final_population(copy_on_write):
+        random.seed(4)
+        evo = EvolutionaryAlgorithm(element_pool, event_pool, events_per_frame, event_index, batch_evaluation= False, copy_on_write= copy_on_write).initialize_population(20)
+        evo.evolve(8)
+        return [(individual.to_genome()[1:], individual.fitness) for individual in evo.population]
+
+    assert final_population(True) == final_population(False)
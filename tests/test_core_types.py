@@ -0,0 +1,70 @@
+import gc
+import pickle
+
+import pytest
+
+from lib.classes import Category, Element, Event, EventType, Object, Rule
+
+"""
+test_core_types.py
+
+The core types are equal only to instances of their own type, consistently with their hash, the comparisons with ids,
+descriptions and tuples that were allowed before they were interned raise a TypeError instead of silently being False,
+and the interned elements and event types live only as long as something references them.
+
+Dependencies:
+- pytest
+"""
+
+def test_equality_and_hash(log):
+
+    element_pool, event_pool, events_per_frame, event_index = log
+    elem, other_elem = element_pool[:2]
+    trigger, effect = event_pool[:2]
+
+    assert Element(elem.id, elem.description, elem.properties) is elem
+    assert pickle.loads(pickle.dumps(elem)) is elem
+    assert EventType(trigger.id, trigger.description) is trigger
+
+    assert Rule(0, trigger, effect) == Rule(1, trigger, effect)
+    assert hash(Rule(0, trigger, effect)) == hash(Rule(1, trigger, effect))
+    assert Rule(0, trigger, effect) != Rule(0, effect, trigger)
+    assert Event(trigger, elem) == Event(trigger, elem) and Event(trigger, elem) != Event(trigger, other_elem)
+    assert Object(3, [elem]) == Object(3, [other_elem]) and Object(3, [elem]) != Object(4, [elem])
+    assert Category(5) == Category(5) and Category(5) != Category(6)
+
+    # any other type is just not equal
+    for value in (elem, trigger, Rule(0, trigger, effect), Event(trigger, elem), Object(3, [elem]), Category(5)):
+        assert value != None and value != 1.5 and value not in (None, 1.5)
+
+def test_legacy_comparisons_raise(log):
+
+    element_pool, event_pool, events_per_frame, event_index = log
+    elem = element_pool[0]
+    trigger, effect = event_pool[:2]
+
+    legacy = (
+        (elem, elem.id), (elem, elem.description),
+        (trigger, trigger.id), (trigger, trigger.description), (trigger, Event(trigger, elem)),
+        (Rule(0, trigger, effect), 0), (Rule(0, trigger, effect), (trigger, effect)), (Rule(0, trigger, effect), trigger),
+        (Event(trigger, elem), trigger), (Event(trigger, elem), elem), (Event(trigger, elem), (trigger, elem)),
+        (Object(3, [elem]), 3), (Object(3, [elem]), [elem]),
+        (Category(5), 5), (Category(5), ([], [])),
+    )
+    for value, other in legacy:
+        with pytest.raises(TypeError): value == other
+        with pytest.raises(TypeError): other == value
+
+def test_registry_is_weak():
+
+    elem = Element(10 ** 6, 'registry_test', {})
+    event_type = EventType(10 ** 6, 'registry_test')
+    assert Element(10 ** 6, 'registry_test', {}) is elem
+    with pytest.raises(Exception, match= 'already exists'): Element(10 ** 6, 'registry_test', {'x': 1})
+
+    del elem, event_type
+    gc.collect()
+
+    assert (10 ** 6, 'registry_test') not in Element._registry
+    assert (10 ** 6, 'registry_test') not in EventType._registry
+    assert Element(10 ** 6, 'registry_test', {'x': 1}).properties == {'x': 1} # a new element, not the dropped one
@@ -0,0 +1,110 @@
+import os
+import time
+import multiprocessing
+
+import pytest
+
+from lib.classes import Individual
+from lib.distributed_evaluator import DistributedEvaluator, run_worker
+from lib.population_evaluator import PopulationEvaluator
+
+from baseline import random_population
+
+"""
+test_distributed_evaluator.py
+
+Local workers connected to the broker on a Unix socket give the fitness of the serial evaluation, also when one of them
+dies in the middle of a chunk (the chunk goes to the others). When every worker is lost, or nothing comes back within
+evaluate_timeout, evaluate raises instead of waiting forever, and the broker keeps working with the workers connecting later.
+
+Dependencies:
+- pytest
+"""
+
+AUTHKEY = b'test-secret'
+
+def dying_worker(address, element_pool, event_pool, events_per_frame):
+    # dies as soon as it receives a chunk, before answering
+    PopulationEvaluator.evaluate = lambda self, population: os._exit(1)
+    run_worker(address, AUTHKEY, element_pool, event_pool, events_per_frame)
+
+def start_workers(log, address, n_workers, n_dying= 0) -> list[multiprocessing.Process]:
+
+    element_pool, event_pool, events_per_frame, event_index = log
+    processes = [multiprocessing.Process(target= dying_worker if i < n_dying else run_worker, daemon= True,
+                                         args= (address, element_pool, event_pool, events_per_frame) if i < n_dying else (address, AUTHKEY, element_pool, event_pool, events_per_frame))
+                 for i in range(n_workers)]
+    for process in processes: process.start()
+
+    return processes
+
+def wait_for_workers(evaluator, n_workers, timeout= 30):
+
+    deadline = time.monotonic() + timeout
+    while evaluator.workers < n_workers:
+        assert time.monotonic() < deadline, f'{evaluator.workers}/{n_workers} workers connected'
+        time.sleep(0.01)
+
+def fresh(log, genomes) -> list[Individual]:
+    element_pool, event_pool, events_per_frame, event_index = log
+    return [Individual.from_genome(element_pool, event_pool, genome) for genome in genomes]
+
+@pytest.fixture
+def genomes(log):
+    element_pool, event_pool, events_per_frame, event_index = log
+    return [individual.to_genome() for individual in random_population(element_pool, event_pool, seed= 3, n_individuals= 45)]
+
+def test_lost_worker_chunk_goes_to_the_others(log, statistics, genomes, tmp_path):
+
+    element_pool, event_pool, events_per_frame, event_index = log
+    expected = [int(fitness) for fitness in PopulationEvaluator(statistics).evaluate(fresh(log, genomes))]
+
+    evaluator = DistributedEvaluator(element_pool, event_pool, events_per_frame, str(tmp_path / 'broker.sock'), AUTHKEY, chunk_size= 5, task_timeout= 10)
+    processes = start_workers(log, evaluator.address, 3, n_dying= 1)
+    try:
+        wait_for_workers(evaluator, 3)
+
+        # the chunks are taken by whichever worker is free: evaluate until the dying one got one
+        for _ in range(20):
+            population = fresh(log, genomes)
+            assert evaluator.evaluate(population) == expected
+            assert [individual.fitness for individual in population] == expected
+            if evaluator.lost_workers: break
+
+        assert (evaluator.lost_workers, evaluator.workers) == (1, 2)
+    finally:
+        evaluator.close()
+        for process in processes: process.join(timeout= 10)
+
+    assert [process.exitcode for process in processes] == [1, 0, 0]
+
+def test_all_workers_lost_raises(log, statistics, genomes, tmp_path):
+
+    element_pool, event_pool, events_per_frame, event_index = log
+    expected = [int(fitness) for fitness in PopulationEvaluator(statistics).evaluate(fresh(log, genomes))]
+
+    evaluator = DistributedEvaluator(element_pool, event_pool, events_per_frame, str(tmp_path / 'broker.sock'), AUTHKEY, chunk_size= 5, task_timeout= 1)
+    processes = start_workers(log, evaluator.address, 1, n_dying= 1)
+    try:
+        wait_for_workers(evaluator, 1)
+        with pytest.raises(Exception, match= 'all the workers were lost'): evaluator.evaluate(fresh(log, genomes))
+        assert (evaluator.lost_workers, evaluator.workers) == (1, 0)
+
+        # the chunks of the failed evaluation are dropped, a worker connecting later only gets the new ones
+        processes += start_workers(log, evaluator.address, 1)
+        assert evaluator.evaluate(fresh(log, genomes)) == expected
+    finally:
+        evaluator.close()
+        for process in processes: process.join(timeout= 10)
+
+def test_evaluate_timeout_without_workers(log, genomes, tmp_path):
+
+    element_pool, event_pool, events_per_frame, event_index = log
+    evaluator = DistributedEvaluator(element_pool, event_pool, events_per_frame, str(tmp_path / 'broker.sock'), AUTHKEY, chunk_size= 5, evaluate_timeout= 0.2)
+    try:
+        with pytest.raises(Exception, match= 'evaluate_timeout'): evaluator.evaluate(fresh(log, genomes))
+    finally:
+        evaluator.close()
+
+    with pytest.raises(Exception, match= 'evaluate_timeout'):
+        DistributedEvaluator(element_pool, event_pool, events_per_frame, str(tmp_path / 'other.sock'), AUTHKEY, evaluate_timeout= 0)
@@ -0,0 +1,63 @@
+import json
+
+import pytest
+
+from lib.columnar_log import ColumnarLogWriter
+from lib.element_states import STATE_FIELDS, load_element_states
+from lib.game import Game
+from lib.log_farm import POLICIES
+from lib.streaming_log import StreamingLogWriter
+
+"""
+test_element_states.py
+
+The delta encoded element states rebuild, for every frame and in any order of access, the state the elements had when the
+frame was logged, whatever the keyframe interval and whether the log is columnar or streaming.
+
+Dependencies:
+- pytest
+"""
+
+class SnapshotWriter:
+
+    # forwards the frames to log_writer and keeps the state of the elements of each one (json types, lists for tuples)
+    def __init__(self, log_writer):
+        self._log_writer = log_writer
+        self.states = []
+
+    def add_frame(self, elements, events, commands):
+        self.states.append(json.loads(json.dumps({description: {field: elem[field] for field in STATE_FIELDS if field in elem} for description, elem in elements.items()})))
+        return self._log_writer.add_frame(elements, events, commands)
+
+def as_json(state) -> dict:
+    return json.loads(json.dumps(state))
+
+@pytest.mark.parametrize('keyframe_interval', (1, 7, 50))
+def test_state_at_matches_per_frame_states(tmp_path, keyframe_interval):
+
+    columnar_writer = ColumnarLogWriter(keyframe_interval= keyframe_interval)
+    log_writer = SnapshotWriter(columnar_writer)
+    Game(render= False, seed= 1).play(POLICIES['noisy_tracking'](1), log_writer, 300) # bricks hit and destroyed, walls changing color
+    columnar = load_element_states(columnar_writer.save(str(tmp_path / 'log.npz')))
+
+    with StreamingLogWriter(str(tmp_path / 'log.stream'), chunk_frames= 64, keyframe_interval= keyframe_interval, fsync= False) as stream_writer:
+        Game(render= False, seed= 1).play(POLICIES['noisy_tracking'](1), stream_writer, 300)
+    streaming = load_element_states(str(tmp_path / 'log.stream'))
+
+    expected = log_writer.states
+    assert len(columnar) == len(streaming) == len(expected)
+    assert columnar.keyframes == list(range(0, len(expected), keyframe_interval))
+
+    for frame_id in reversed(range(len(expected))): # backwards, every access starts again from a keyframe
+        assert as_json(columnar.state_at(frame_id)) == expected[frame_id], frame_id
+        assert as_json(streaming[frame_id]) == expected[frame_id], frame_id
+
+    assert expected[-1] == {} # the game_end frame has no elements
+    assert as_json(columnar[-2]) == expected[-2]
+    with pytest.raises(IndexError): columnar.state_at(len(expected))
+
+def test_log_without_states_raises(tmp_path):
+
+    log_writer = ColumnarLogWriter(keyframe_interval= None)
+    Game(render= False, seed= 0).play(POLICIES['tracking'](0), log_writer, 50)
+    with pytest.raises(Exception, match= 'no element states'): load_element_states(log_writer.save(str(tmp_path / 'log.npz')))
@@ -0,0 +1,65 @@
+import pytest
+
+from lib.event_index import EventIndex
+from lib.transition_statistics import TransitionStatistics
+
+from baseline import SEEDS, baseline_fitness_4, random_population, rescored
+from test_transition_statistics import scanned_counts
+
+"""
+test_event_index.py
+
+The event index built while loading the log answers as the events of the log, the statistics counted from it are the
+ones counted from the events, and compute_fitness_4 with the index gives the original fitness.
+
+Dependencies:
+- pytest
+"""
+
+def test_index_answers_as_the_events(log):
+
+    element_pool, event_pool, events_per_frame, event_index = log
+    assert event_index.n_frames == len(events_per_frame)
+
+    frames = {}
+    for frame_id, events in enumerate(events_per_frame):
+        pairs = {(event.event_type.id, event.subject.id) for event in events}
+        assert event_index.pairs(frame_id) == pairs
+        assert event_index.subjects(frame_id) == {element_id for _, element_id in pairs}
+        for event in events: frames.setdefault((event.event_type.id, event.subject.id), []).append(frame_id) # one entry per occurrence
+
+    for event_type in event_pool:
+        for elem in element_pool:
+            assert event_index.frames(event_type.id, elem.id).tolist() == frames.get((event_type.id, elem.id), [])
+            assert event_index.occurs(0, event_type.id, elem.id) == ((event_type.id, elem.id) in event_index.pairs(0))
+
+    # the index loaded with the log is the one built from its events
+    rebuilt = EventIndex.from_events(events_per_frame)
+    assert sorted(rebuilt.keys) == sorted(event_index.keys)
+
+    _, followed = scanned_counts(events_per_frame)
+    for trigger in event_pool:
+        for effect in event_pool:
+            for elem in element_pool:
+                assert event_index.follows(trigger.id, effect.id, elem.id) == followed.get((trigger.id, effect.id, elem.id), 0)
+
+def test_statistics_from_the_index_match_the_events(log):
+
+    element_pool, event_pool, events_per_frame, event_index = log
+    from_events = TransitionStatistics(element_pool, event_pool, events_per_frame)
+    from_index = TransitionStatistics(element_pool, event_pool, events_per_frame, event_index)
+
+    assert from_index.should_be_rule == from_events.should_be_rule
+    for trigger in event_pool:
+        for elem in element_pool:
+            assert from_index.triggered(trigger.id, elem.id) == from_events.triggered(trigger.id, elem.id)
+            for effect in event_pool: assert from_index.hits(trigger.id, effect.id, elem.id) == from_events.hits(trigger.id, effect.id, elem.id)
+
+@pytest.mark.parametrize('seed', SEEDS)
+def test_compute_fitness_4_with_the_index_matches_baseline(log, seed):
+
+    element_pool, event_pool, events_per_frame, event_index = log
+    population = random_population(element_pool, event_pool, seed)
+    expected = [baseline_fitness_4(individual, events_per_frame) for individual in population]
+
+    assert rescored(population, lambda ind: ind.compute_fitness_4(events_per_frame, event_index= event_index)) == expected
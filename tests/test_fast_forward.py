@@ -0,0 +1,82 @@
+import numpy as np
+import pytest
+
+from lib.columnar_log import ColumnarLogWriter
+from lib.compact_recording import CompactRecording, convert_compact_recording
+from lib.game import Game
+from lib.log_farm import POLICIES
+from lib.streaming_log import StreamingLogWriter, read_streaming_log
+
+"""
+test_fast_forward.py
+
+Fast-forwarding a known list of commands (Game.play_commands, the replays) gives the log, the grid and the state of the
+game played frame by frame: the frames it skips are free of events, and its runs of empty frames reach the columnar and
+the streaming writers as the frames would.
+
+Dependencies:
+- numpy
+- pytest
+"""
+
+MAX_FRAMES = 3000
+
+def saved_arrays(log_writer, path) -> dict[str, np.ndarray]:
+    with np.load(log_writer.save(path), allow_pickle= False) as log: return {name: log[name] for name in log.files}
+
+def assert_same(log, other):
+    assert sorted(log) == sorted(other)
+    for name in log: assert np.array_equal(log[name], other[name]), name
+
+@pytest.mark.parametrize('policy', sorted(POLICIES))
+@pytest.mark.parametrize('seed', (0, 1))
+def test_fast_forward_matches_per_frame_play(tmp_path, seed, policy):
+
+    log_writer = ColumnarLogWriter(keyframe_interval= None)
+    recording = CompactRecording.record(seed, POLICIES[policy](seed), log_writer, MAX_FRAMES)
+    played = saved_arrays(log_writer, str(tmp_path / 'played.npz'))
+
+    game, fast_game = Game(seed= seed), Game(seed= seed)
+    game.play_commands(recording.commands, fast_forward= False)
+    log_writer = ColumnarLogWriter(keyframe_interval= None)
+    assert fast_game.play_commands(recording.commands, log_writer, fast_forward= True) == recording.n_frames
+    assert_same(played, saved_arrays(log_writer, str(tmp_path / 'fast.npz')))
+    assert (fast_game.get_grid() == game.get_grid()).all()
+    assert (fast_game.ball_x, fast_game.ball_y, fast_game.paddle_x, fast_game.bricks_alive) == (game.ball_x, game.ball_y, game.paddle_x, game.bricks_alive)
+
+    with StreamingLogWriter(str(tmp_path / 'fast.stream'), chunk_frames= 64, keyframe_interval= None, fsync= False) as stream_writer:
+        Game(render= False, seed= seed).play_commands(recording.commands, stream_writer, fast_forward= True)
+    assert_same(played, read_streaming_log(str(tmp_path / 'fast.stream')))
+
+    log_writer = ColumnarLogWriter(keyframe_interval= None)
+    replay_path = recording.save(str(tmp_path / 'game.replay'))
+    CompactRecording.load(replay_path).replay(log_writer, fast_forward= True)
+    assert_same(played, saved_arrays(log_writer, str(tmp_path / 'replayed.npz')))
+    with np.load(convert_compact_recording(replay_path, str(tmp_path / 'converted.npz'), keyframe_interval= None, fast_forward= True), allow_pickle= False) as converted:
+        assert_same(played, {name: converted[name] for name in converted.files})
+
+def test_free_frames_have_no_events():
+
+    recording = CompactRecording.record(0, POLICIES['noisy_tracking'](0), max_frames= 1500)
+    game = Game(render= False, seed= 0)
+
+    free, has_events = [], []
+    for command in recording.commands:
+        free.append(game.free_frames())
+        game.apply_command(command)
+        has_events.append(bool(game.update()[1]))
+
+    assert max(free) > 10
+    for frame_id, n in enumerate(free): assert not any(has_events[frame_id:frame_id + n]), frame_id
+
+def test_fast_forward_refuses_unknown_frames(tmp_path):
+
+    game = Game(render= False, seed= 0)
+    game.play_commands(['paddle_stop'] * 5, fast_forward= False)
+    with pytest.raises(Exception, match= 'an event happens'): game.skip_frames(['paddle_stop'] * (game.free_frames() + 1))
+
+    with pytest.raises(Exception, match= 'keyframe_interval= None'):
+        Game(render= False, seed= 0).play_commands(['paddle_stop'] * 50, ColumnarLogWriter(keyframe_interval= 50), fast_forward= True)
+
+    replay_path = CompactRecording.record(0, POLICIES['tracking'](0), max_frames= 100).save(str(tmp_path / 'game.replay'))
+    with pytest.raises(Exception, match= 'keyframe_interval= None'): convert_compact_recording(replay_path, fast_forward= True)
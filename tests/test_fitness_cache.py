@@ -0,0 +1,97 @@
+import random
+
+from lib.classes import Individual
+from lib.evolutionary_algorithm import EvolutionaryAlgorithm
+from lib.fitness_cache import FitnessCache
+from lib.population_evaluator import PopulationEvaluator
+
+from baseline import baseline_fitness_4, random_population
+
+"""
+test_fitness_cache.py
+
+The fitness cache evicts the least recently used entries, identical genomes share a fingerprint, and the evaluation of a
+population takes the known genomes from the cache and scores each new genome only once.
+
+Dependencies:
+-
+"""
+
+class CountingEvaluator:
+
+    # PopulationEvaluator that records how many individuals it scored
+    def __init__(self, statistics):
+        self._evaluator = PopulationEvaluator(statistics)
+        self.evaluated = 0
+
+    def evaluate(self, population):
+        self.evaluated += len(population)
+        return self._evaluator.evaluate(population)
+
+
+def test_lru_eviction():
+
+    cache = FitnessCache(max_size= 2)
+    cache.put('a', 1)
+    cache.put('b', 2)
+    assert cache.get('a') == 1 # 'a' is now the most recently used
+    cache.put('c', 3)
+
+    assert len(cache) == 2
+    assert cache.get('b') is None
+    assert (cache.get('a'), cache.get('c')) == (1, 3)
+    assert (cache.hits, cache.misses) == (3, 1)
+    assert cache.hit_rate == 0.75
+
+def test_fingerprint_ignores_ids_and_order(log):
+
+    element_pool, event_pool, events_per_frame, event_index = log
+    individual = random_population(element_pool, event_pool, seed= 0, n_individuals= 1)[0]
+    current_ids, objects, rules, categories = individual.to_genome()
+
+    # the same genome with other ids and the lists in another order
+    obj_ids = {obj_id: 100 + i for i, (obj_id, _) in enumerate(objects)}
+    rule_ids = {rule_id: 200 + i for i, (rule_id, _, _) in enumerate(rules)}
+    renumbered = (
+        (300, 300, 300),
+        tuple(reversed([(obj_ids[obj_id], elem_ids) for obj_id, elem_ids in objects])),
+        tuple(reversed([(rule_ids[rule_id], trigger_id, effect_id) for rule_id, trigger_id, effect_id in rules])),
+        tuple(reversed([(cat_id + 50, tuple(obj_ids[obj_id] for obj_id in cat_objs), tuple(rule_ids[rule_id] for rule_id in cat_rules)) for cat_id, cat_objs, cat_rules in categories])),
+    )
+    assert Individual.from_genome(element_pool, event_pool, renumbered).fingerprint() == individual.fingerprint()
+
+def test_cache_hits_and_identical_genomes_scored_once(log):
+
+    element_pool, event_pool, events_per_frame, event_index = log
+    evo = EvolutionaryAlgorithm(element_pool, event_pool, events_per_frame, event_index, cache_size= 100)
+    evo.evaluator = CountingEvaluator(evo.statistics)
+
+    population = random_population(element_pool, event_pool, seed= 1, n_individuals= 10)
+    genomes = [individual.to_genome() for individual in population]
+    copies = [Individual.from_genome(element_pool, event_pool, genome) for genome in genomes + genomes + genomes[:3]]
+
+    evo.evaluate_population(copies)
+    assert evo.evaluator.evaluated == 10 # each genome once
+    assert [individual.fitness for individual in copies] == [baseline_fitness_4(individual, events_per_frame) for individual in population] * 2 + [baseline_fitness_4(individual, events_per_frame) for individual in population[:3]]
+    assert len(evo.fitness_cache) == 10
+
+    again = [Individual.from_genome(element_pool, event_pool, genome) for genome in genomes]
+    evo.evaluate_population(again)
+    assert evo.evaluator.evaluated == 10 # all from the cache
+    assert evo.fitness_cache.hits == 10
+    assert [individual.fitness for individual in again] == [individual.fitness for individual in copies[:10]]
+
+def test_cached_run_matches_uncached_run(log):
+
+    element_pool, event_pool, events_per_frame, event_index = log
+
+    def final(options):
+        random.seed(3)
+        evo = EvolutionaryAlgorithm(element_pool, event_pool, events_per_frame, event_index, **options).initialize_population(30)
+        evo.run(40, verbose= False)
+        return [(individual.to_genome(), individual.fitness) for individual in evo.population], evo
+
+    uncached, _ = final({})
+    cached, evo = final({'cache_size': 1000})
+    assert cached == uncached
+    assert evo.fitness_cache.hits > 0
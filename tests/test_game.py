@@ -0,0 +1,68 @@
+import subprocess
+import sys
+
+import numpy as np
+import pytest
+
+from lib.columnar_log import ColumnarLogWriter
+from lib.game import Game
+from lib.log_farm import POLICIES
+
+"""
+test_game.py
+
+The headless Game imports without pygame and, driven by a controller, logs the same frames as the interactive loop of
+arkanoid.py (interactive_log below) driven by the same commands, with or without the colour grids.
+
+Dependencies:
+- numpy
+- pytest
+"""
+
+def saved_arrays(log_writer, path) -> dict[str, np.ndarray]:
+    with np.load(log_writer.save(path), allow_pickle= False) as log: return {name: log[name] for name in log.files}
+
+def interactive_log(seed, commands, path) -> dict[str, np.ndarray]:
+
+    # the logging of the main loop of arkanoid.py, the commands in place of the keyboard
+    game = Game(seed= seed)
+    log_writer = ColumnarLogWriter()
+
+    element_log, event_log = game.get_log()
+    log_writer.add_frame(element_log, [], [])
+
+    first_time_run = True
+    for command in commands:
+        game.apply_command(command)
+        element_log, event_log, end_game = game.update()
+        if first_time_run:
+            event_log.append({'description': 'game_start', 'subject': 0})
+            first_time_run = False
+        log_writer.add_frame(element_log, event_log, [command])
+        if end_game: break
+
+    log_writer.add_frame({}, [{'description': 'game_end', 'subject': 0}], [])
+
+    return saved_arrays(log_writer, path)
+
+def test_import_without_pygame():
+    subprocess.run([sys.executable, '-c', "import sys, lib.game; assert 'pygame' not in sys.modules"], check= True)
+
+@pytest.mark.parametrize('render', (False, True))
+def test_play_matches_interactive_loop(tmp_path, render):
+
+    commands = []
+    def recording_controller(controller):
+        def record(game):
+            commands.append(controller(game))
+            return commands[-1]
+        return record
+
+    log_writer = ColumnarLogWriter()
+    n_frames = Game(render= render, seed= 3).play(recording_controller(POLICIES['noisy_tracking'](3)), log_writer, 800)
+    played = saved_arrays(log_writer, str(tmp_path / 'played.npz'))
+    expected = interactive_log(3, commands, str(tmp_path / 'interactive.npz'))
+
+    assert n_frames == len(commands) == int(played['n_frames']) - 2
+    assert sorted(played) == sorted(expected)
+    for name in played: assert np.array_equal(played[name], expected[name]), name
@@ -0,0 +1,56 @@
+import random
+
+import pytest
+
+from lib.classes import Individual
+
+from baseline import SEEDS, baseline_fitness_4
+
+"""
+test_incremental_fitness.py
+
+Along mutated lineages every offspring scored with compute_fitness_5, recomputing only what its mutation touched, gets
+the original fitness, and the mutation of a child never changes its parent.
+
+Dependencies:
+- pytest
+"""
+
+def check_lineages(element_pool, event_pool, events_per_frame, statistics, copy_on_write, n_lineages= 4, generations= 15) -> None:
+
+    for _ in range(n_lineages):
+        parent = Individual(element_pool, event_pool).initialize()
+        parent.compute_fitness_5(statistics)
+
+        for _ in range(generations):
+            parent_genome, parent_fitness = parent.to_genome()[1:], parent.fitness # the id counters move anyway, a clone reserves its ids
+
+            child = Individual(element_pool, event_pool, parent, copy_on_write= copy_on_write).mutate()
+            child.compute_fitness_5(statistics)
+
+            assert child.fitness == baseline_fitness_4(child, events_per_frame)
+            assert parent.to_genome()[1:] == parent_genome and parent.fitness == parent_fitness
+            assert parent.fitness == baseline_fitness_4(parent, events_per_frame)
+
+            parent = child
+
+@pytest.mark.parametrize('seed', SEEDS)
+def test_incremental_scoring_matches_baseline(log, statistics, seed):
+
+    element_pool, event_pool, events_per_frame, event_index = log
+    random.seed(seed)
+    check_lineages(element_pool, event_pool, events_per_frame, statistics, copy_on_write= False)
+
+def test_repeated_mutations_before_scoring(log, statistics):
+
+    # more mutations between two evaluations accumulate what they touched
+    element_pool, event_pool, events_per_frame, event_index = log
+    random.seed(7)
+    individual = Individual(element_pool, event_pool).initialize()
+    individual.compute_fitness_5(statistics)
+
+    for _ in range(20):
+        individual = Individual(element_pool, event_pool, individual)
+        for _ in range(random.randint(1, 5)): individual.mutate()
+        individual.compute_fitness_5(statistics)
+        assert individual.fitness == baseline_fitness_4(individual, events_per_frame)
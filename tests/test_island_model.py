@@ -0,0 +1,51 @@
+import random
+
+import pytest
+
+from lib.evolutionary_algorithm import EvolutionaryAlgorithm
+from lib.island_model import IslandModel
+
+from baseline import baseline_fitness_4
+
+"""
+test_island_model.py
+
+With a seed an island run is reproducible, whatever the order in which the migrants arrive, its winner has the original
+fitness of its genome, and a single island evolves as a plain EvolutionaryAlgorithm seeded the same way.
+
+Dependencies:
+- pytest
+"""
+
+def island_run(log, topology, seed, islands= 3) -> tuple:
+
+    element_pool, event_pool, events_per_frame, event_index = log
+    model = IslandModel(element_pool, event_pool, events_per_frame, islands= islands, topology= topology, migration_interval= 3, migrants= 2, seed= seed)
+    winner = model.run(max_generations= 7, num_individuals= 15, verbose= False)
+
+    return winner.to_genome()[1:], winner.fitness, model.best_fitness, winner
+
+@pytest.mark.parametrize('topology', ('ring', 'fully_connected'))
+def test_seeded_islands_are_reproducible(log, topology):
+
+    element_pool, event_pool, events_per_frame, event_index = log
+    first = island_run(log, topology, seed= 11)
+    assert first[:3] == island_run(log, topology, seed= 11)[:3]
+    assert first[1] == max(first[2])
+    assert first[1] == baseline_fitness_4(first[3], events_per_frame)
+
+def test_single_island_is_a_plain_run(log):
+
+    element_pool, event_pool, events_per_frame, event_index = log
+    genome, fitness, best_fitness, winner = island_run(log, 'ring', seed= 4, islands= 1)
+
+    random.seed(4)
+    evo = EvolutionaryAlgorithm(element_pool, event_pool, events_per_frame).initialize_population(15)
+    evo.evolve(7, num_survivors= 3)
+    assert (genome, fitness) == (evo.get_winner().to_genome()[1:], evo.get_winner().fitness)
+
+def test_bad_configurations_raise(log):
+
+    element_pool, event_pool, events_per_frame, event_index = log
+    with pytest.raises(Exception, match= 'unknown topology'): IslandModel(element_pool, event_pool, events_per_frame, topology= 'star')
+    with pytest.raises(Exception, match= 'migrants'): IslandModel(element_pool, event_pool, events_per_frame, migrants= 5).run(num_individuals= 5, verbose= False)
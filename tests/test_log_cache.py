@@ -0,0 +1,53 @@
+import os
+import pickle
+import shutil
+
+from lib import log_cache
+from lib.log_cache import cache_path, load_cached_log
+
+from conftest import LOG_PATH
+
+"""
+test_log_cache.py
+
+A log is preprocessed once: the next loads read its cache, a changed log (or a bumped ENCODING_VERSION) gets a new
+cache, and the stale caches of that log, left over temporary files included, are removed without touching the caches
+of the other logs.
+
+Dependencies:
+-
+"""
+
+def test_cache_is_rebuilt_when_the_log_changes(tmp_path, monkeypatch):
+
+    log_path = str(tmp_path / 'arkanoid_log_20_10_2024_16_48_34.pkl')
+    shutil.copy(LOG_PATH, log_path)
+    cache_dir = tmp_path / '.cache'
+
+    n_frames = len(load_cached_log(log_path)[2])
+    path = cache_path(log_path)
+    assert os.listdir(cache_dir) == [os.path.basename(path)]
+
+    # the second load reads the cache
+    mtime = os.stat(path).st_mtime_ns
+    assert len(load_cached_log(log_path)[2]) == n_frames
+    assert os.stat(path).st_mtime_ns == mtime
+
+    # another log and a temporary file left by a stopped run
+    (cache_dir / 'arkanoid_log_19_10_2024_19_28_17.0123456789abcdef.v1.1.npz').write_bytes(b'')
+    (cache_dir / f'{os.path.basename(path)[:-len(".npz")]}.tmp.npz').write_bytes(b'')
+
+    # the log changes: one frame less
+    with open(log_path, 'rb') as log_file: frames = pickle.load(log_file)
+    with open(log_path, 'wb') as log_file: pickle.dump(frames[:-1], log_file)
+
+    assert len(load_cached_log(log_path)[2]) == n_frames - 1
+    assert cache_path(log_path) != path
+    assert sorted(os.listdir(cache_dir)) == sorted([os.path.basename(cache_path(log_path)), 'arkanoid_log_19_10_2024_19_28_17.0123456789abcdef.v1.1.npz'])
+
+    # a new encoding rebuilds it again
+    path = cache_path(log_path)
+    monkeypatch.setattr(log_cache, 'ENCODING_VERSION', log_cache.ENCODING_VERSION + 1)
+    assert len(load_cached_log(log_path)[2]) == n_frames - 1
+    assert cache_path(log_path) != path and not os.path.exists(path)
+    assert os.path.exists(cache_path(log_path))
@@ -0,0 +1,72 @@
+import json
+import os
+
+import numpy as np
+import pytest
+
+from lib.columnar_log import ColumnarLogWriter, load_columnar_log
+from lib.game import Game
+from lib.log_farm import POLICIES, run_farm, select_shards
+
+"""
+test_log_farm.py
+
+Every shard of the farm is the log of its game (seed and policy of the manifest), the manifest describes the shards as
+they are on disk, and select_shards picks them from the manifest alone.
+
+Dependencies:
+- numpy
+- pytest
+"""
+
+@pytest.fixture(scope= 'module')
+def farm(tmp_path_factory) -> tuple[str, dict]:
+
+    manifest_path = run_farm(8, log_dir= str(tmp_path_factory.mktemp('farm')), base_seed= 10, max_frames= 600, processes= 2, name= 'test_farm')
+    with open(manifest_path, 'r') as manifest_file: return manifest_path, json.load(manifest_file)
+
+def test_manifest_describes_the_shards(tmp_path, farm):
+
+    manifest_path, manifest = farm
+    policies = ('tracking', 'noisy_tracking', 'random', 'guarded_random')
+
+    assert manifest['keyframe_interval'] == 50 # the element states are recorded by default
+    assert [shard['shard'] for shard in manifest['shards']] == list(range(8))
+    assert [(shard['seed'], shard['policy']) for shard in manifest['shards']] == [(10 + i, policies[i % 4]) for i in range(8)]
+
+    event_counts = {}
+    for shard in manifest['shards']:
+
+        path = os.path.join(os.path.dirname(manifest_path), shard['file'])
+        element_pool, event_pool, events_per_frame, elements_per_frame, event_index = load_columnar_log(path)
+        counts = {event_type.description: sum(event.event_type == event_type for events in events_per_frame for event in events) for event_type in event_pool}
+        assert (shard['n_frames'], shard['n_events'], shard['event_counts']) == (len(events_per_frame), sum(counts.values()), counts)
+        for description, count in counts.items(): event_counts[description] = event_counts.get(description, 0) + count
+
+        # the same game played here
+        log_writer = ColumnarLogWriter(manifest['keyframe_interval'])
+        Game(render= False, seed= shard['seed']).play(POLICIES[shard['policy']](shard['seed']), log_writer, manifest['max_frames'])
+        with np.load(log_writer.save(str(tmp_path / shard['file'])), allow_pickle= False) as played, np.load(path, allow_pickle= False) as farmed:
+            assert sorted(played.files) == sorted(farmed.files)
+            for name in played.files: assert np.array_equal(played[name], farmed[name]), name
+
+    assert manifest['n_frames'] == sum(shard['n_frames'] for shard in manifest['shards'])
+    assert manifest['event_counts'] == event_counts
+
+def test_select_shards(farm):
+
+    manifest_path, manifest = farm
+    log_dir = os.path.dirname(manifest_path)
+    shards = manifest['shards']
+
+    def paths(selected): return [os.path.join(log_dir, shard['file']) for shard in selected]
+
+    assert select_shards(manifest_path) == paths(shards)
+    assert select_shards(manifest_path, policies= ('random',)) == paths(shards[2::4])
+    assert select_shards(manifest_path, min_frames= 500) == paths(shard for shard in shards if shard['n_frames'] >= 500)
+    assert select_shards(manifest_path, event_types= ('disappearance', 'change_color')) == paths(shard for shard in shards if shard['event_counts'].get('disappearance') and shard['event_counts'].get('change_color'))
+    assert 0 < len(select_shards(manifest_path, min_frames= 500)) < len(shards)
+    assert select_shards(manifest_path, event_types= ('no_such_event',)) == []
+
+def test_unknown_policy_raises(tmp_path):
+    with pytest.raises(Exception, match= 'unknown policy'): run_farm(1, log_dir= str(tmp_path), policies= ('nope',))
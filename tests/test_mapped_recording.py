@@ -0,0 +1,61 @@
+import pickle
+
+import pytest
+
+from lib.columnar_log import convert_pickle_log, load_columnar_log
+from lib.mapped_recording import MappedRecording
+from lib.population_evaluator import PopulationEvaluator
+from lib.transition_statistics import TransitionStatistics
+
+from baseline import baseline_fitness_4, random_population
+from conftest import LOG_PATH
+
+"""
+test_mapped_recording.py
+
+A memory-mapped recording reads the same frames of the columnar log it was created from, survives pickling, and its
+transition statistics (computed on the mapped arrays) score a population as the statistics of the loaded log.
+
+Dependencies:
+- pytest
+"""
+
+@pytest.fixture(scope= 'module')
+def recording_and_log(tmp_path_factory):
+    tmp_path = tmp_path_factory.mktemp('recording')
+    npz_path = convert_pickle_log(LOG_PATH, str(tmp_path / 'log.npz'))
+    return MappedRecording.create(str(tmp_path / 'recording'), npz_path), load_columnar_log(npz_path)
+
+def test_mapped_frames_match_loaded_log(recording_and_log):
+
+    recording, (element_pool, event_pool, events_per_frame, elements_per_frame, event_index) = recording_and_log
+
+    assert recording.n_frames == len(events_per_frame)
+    assert recording.element_pool == element_pool and recording.event_pool == event_pool
+    assert list(recording.events_per_frame) == events_per_frame
+    assert list(recording.elements_per_frame) == elements_per_frame
+    assert recording.events_per_frame[-1] == events_per_frame[-1]
+    with pytest.raises(IndexError): recording.events_per_frame[recording.n_frames]
+
+    unpickled = pickle.loads(pickle.dumps(recording.events_per_frame))
+    assert unpickled.recording.path == recording.path
+    assert list(unpickled) == events_per_frame
+
+def test_mapped_statistics_match_loaded_log(recording_and_log):
+
+    recording, (element_pool, event_pool, events_per_frame, elements_per_frame, event_index) = recording_and_log
+
+    mapped = TransitionStatistics(recording.element_pool, recording.event_pool, recording.events_per_frame)
+    loaded = TransitionStatistics(element_pool, event_pool, events_per_frame, event_index)
+    assert mapped.should_be_rule == loaded.should_be_rule
+
+    for trigger in event_pool:
+        assert mapped.fired(trigger.id) == loaded.fired(trigger.id)
+        for effect in event_pool:
+            for elem in element_pool:
+                assert mapped.hits(trigger.id, effect.id, elem.id) == loaded.hits(trigger.id, effect.id, elem.id)
+                assert mapped.misses(trigger.id, effect.id, elem.id) == loaded.misses(trigger.id, effect.id, elem.id)
+
+    population = random_population(element_pool, event_pool, seed= 0)
+    PopulationEvaluator(mapped).evaluate(population)
+    assert [individual.fitness for individual in population] == [baseline_fitness_4(individual, events_per_frame) for individual in population]
@@ -0,0 +1,48 @@
+import random
+
+from lib.classes import Individual
+from lib.evolutionary_algorithm import EvolutionaryAlgorithm
+from lib.parallel_evaluator import ParallelEvaluator
+from lib.population_evaluator import PopulationEvaluator
+
+from baseline import random_population
+
+"""
+test_parallel_evaluator.py
+
+The population scored by a pool of worker processes (each with its own copy of the log) gets the fitness of the serial
+evaluation, also inside a whole run.
+
+Dependencies:
+-
+"""
+
+def test_parallel_evaluator_matches_population_evaluator(log, statistics):
+
+    element_pool, event_pool, events_per_frame, event_index = log
+    genomes = [individual.to_genome() for individual in random_population(element_pool, event_pool, seed= 4, n_individuals= 45)]
+
+    serial = [Individual.from_genome(element_pool, event_pool, genome) for genome in genomes]
+    expected = [int(fitness) for fitness in PopulationEvaluator(statistics).evaluate(serial)]
+
+    evaluator = ParallelEvaluator(element_pool, event_pool, events_per_frame, workers= 2)
+    try:
+        parallel = [Individual.from_genome(element_pool, event_pool, genome) for genome in genomes]
+        assert evaluator.evaluate(parallel) == expected
+        assert [individual.fitness for individual in parallel] == expected
+        assert evaluator.evaluate([]) == []
+    finally:
+        evaluator.close()
+
+def test_parallel_run_matches_serial_run(log):
+
+    element_pool, event_pool, events_per_frame, event_index = log
+
+    def final(workers):
+        random.seed(2)
+        evo = EvolutionaryAlgorithm(element_pool, event_pool, events_per_frame, event_index, workers= workers).initialize_population(20)
+        try: evo.run(5, verbose= False)
+        finally: evo.close()
+        return [(individual.to_genome(), individual.fitness) for individual in evo.population]
+
+    assert final(2) == final(None)
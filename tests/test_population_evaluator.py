@@ -0,0 +1,42 @@
+import pytest
+
+from lib.classes import Individual
+from lib.population_evaluator import PopulationEvaluator
+
+from baseline import SEEDS, baseline_fitness_4, random_population
+
+"""
+test_population_evaluator.py
+
+The whole population scored at once with array operations gets the original fitness of every individual.
+
+Dependencies:
+- pytest
+"""
+
+@pytest.mark.parametrize('seed', SEEDS)
+def test_population_evaluator_matches_baseline(log, statistics, seed):
+
+    element_pool, event_pool, events_per_frame, event_index = log
+    population = random_population(element_pool, event_pool, seed)
+    expected = [baseline_fitness_4(individual, events_per_frame) for individual in population]
+
+    copies = [Individual.from_genome(element_pool, event_pool, individual.to_genome()) for individual in population]
+    scores = PopulationEvaluator(statistics).evaluate(copies)
+
+    assert [int(fitness) for fitness in scores] == expected
+    assert [individual.fitness for individual in copies] == expected
+    assert all(type(individual.fitness) is int for individual in copies)
+
+def test_population_evaluator_scores_individuals_of_any_size(log, statistics):
+
+    # the arrays are padded to the biggest individual: a minimal and a big one in the same batch
+    # (not an individual without categories: initialize and mutate never make one, and the original never scans the log for it)
+    element_pool, event_pool, events_per_frame, event_index = log
+    small = Individual(element_pool, event_pool).initialize(1, 1)
+    big = random_population(element_pool, event_pool, seed= 3, n_individuals= 1, max_mutations= 200)[0]
+    big = Individual.from_genome(element_pool, event_pool, big.to_genome()) # not evaluated
+    population = [small, big]
+
+    scores = PopulationEvaluator(statistics).evaluate(population)
+    assert [int(fitness) for fitness in scores] == [baseline_fitness_4(individual, events_per_frame) for individual in population]
@@ -0,0 +1,82 @@
+import random
+
+import pytest
+
+from lib.evolutionary_algorithm import EvolutionaryAlgorithm
+
+from baseline import baseline_fitness_4
+
+"""
+test_steady_state.py
+
+The heap of run_steady_state always replaces the worst individual (the oldest one among equal fitness), as a scan of the
+whole population would, so a seeded run ends with the population of the same run with a linear search of the worst, and
+its winner has the original fitness of its genome.
+
+Dependencies:
+- pytest
+"""
+
+def reference_steady_state(evo, max_evaluations, tournament_size, offspring_per_step):
+    # run_steady_state without patience, the worst individual found scanning the population at every replacement
+
+    evo.evaluate_population(evo.population)
+    ages = list(range(len(evo.population)))
+    counter = len(evo.population)
+
+    evaluations = 0
+    while evaluations < max_evaluations:
+
+        offspring = [evo._tournament_offspring(tournament_size) for _ in range(min(offspring_per_step, max_evaluations - evaluations))]
+        evo.evaluate_population(offspring)
+        evaluations += len(offspring)
+
+        for child in offspring:
+            worst = min(range(len(evo.population)), key= lambda slot: (evo.population[slot].fitness, ages[slot]))
+            if child.fitness < evo.population[worst].fitness: continue
+            evo.population[worst] = child
+            ages[worst] = counter
+            counter += 1
+
+def final_population(log, run, seed= 5):
+
+    element_pool, event_pool, events_per_frame, event_index = log
+    random.seed(seed)
+    evo = EvolutionaryAlgorithm(element_pool, event_pool, events_per_frame, event_index).initialize_population(20)
+    run(evo)
+
+    return evo, [(individual.to_genome()[1:], individual.fitness) for individual in evo.population]
+
+@pytest.mark.parametrize('offspring_per_step', (1, 4))
+def test_heap_replaces_the_worst(log, offspring_per_step):
+
+    evo, population = final_population(log, lambda evo: evo.run_steady_state(150, tournament_size= 3, offspring_per_step= offspring_per_step, patience= 150, verbose= False))
+    assert population == final_population(log, lambda evo: reference_steady_state(evo, 150, 3, offspring_per_step))[1]
+    assert population != final_population(log, lambda evo: evo.evaluate_population(evo.population))[1] # some individuals were replaced
+
+    element_pool, event_pool, events_per_frame, event_index = log
+    winner = evo.get_winner()
+    assert winner.fitness == max(fitness for _, fitness in population) == evo.old_best
+    assert winner.fitness == baseline_fitness_4(winner, events_per_frame)
+
+def test_worst_heap_ties_by_insertion(log):
+
+    evo, population = final_population(log, lambda evo: evo.evaluate_population(evo.population))
+    for individual in evo.population: individual.set_fitness(0)
+
+    heap = evo._worst_heap()
+    child = evo._tournament_offspring(3)
+    child.set_fitness(0)
+    assert evo._replace_worst(heap, child, len(evo.population))
+    assert evo.population[0] is child # the oldest of the equally worst
+    assert heap[0][2] == 1
+
+    child = evo._tournament_offspring(3)
+    child.set_fitness(-1)
+    assert not evo._replace_worst(heap, child, len(evo.population) + 1)
+
+def test_steady_state_needs_a_population(log):
+
+    element_pool, event_pool, events_per_frame, event_index = log
+    with pytest.raises(Exception, match= 'not initialized'):
+        EvolutionaryAlgorithm(element_pool, event_pool, events_per_frame, event_index).run_steady_state(10, verbose= False)
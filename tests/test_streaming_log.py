@@ -0,0 +1,83 @@
+import os
+
+import numpy as np
+import pytest
+
+from lib.columnar_log import ColumnarLogWriter
+from lib.game import Game
+from lib.log_farm import POLICIES
+from lib.streaming_log import STREAM_MAGIC, StreamingLogWriter, read_streaming_log
+
+"""
+test_streaming_log.py
+
+A streaming log reads as the columnar log of the same game; cut by a crash it keeps every complete chunk: with the
+footer truncated it reads as the whole log, with a chunk cut in the middle as the frames of the chunks before it.
+
+Dependencies:
+- numpy
+- pytest
+"""
+
+CHUNK_FRAMES = 64
+
+def columnar_arrays(tmp_path, max_frames) -> dict[str, np.ndarray]:
+
+    log_writer = ColumnarLogWriter()
+    Game(render= False, seed= 0).play(POLICIES['tracking'](0), log_writer, max_frames)
+    with np.load(log_writer.save(str(tmp_path / f'log_{max_frames}.npz')), allow_pickle= False) as log: return {name: log[name] for name in log.files}
+
+def assert_same(log, other):
+    assert sorted(log) == sorted(other)
+    for name in log: assert np.array_equal(log[name], other[name]), name
+
+@pytest.fixture(scope= 'module')
+def stream(tmp_path_factory) -> tuple[str, bytes]:
+
+    path = str(tmp_path_factory.mktemp('stream') / 'game.stream')
+    with StreamingLogWriter(path, chunk_frames= CHUNK_FRAMES, fsync= False) as log_writer:
+        Game(render= False, seed= 0).play(POLICIES['tracking'](0), log_writer, 1000)
+
+    with open(path, 'rb') as log_file: return path, log_file.read()
+
+def test_stream_matches_columnar_log(tmp_path, stream):
+
+    path, data = stream
+    assert_same(columnar_arrays(tmp_path, 1000), read_streaming_log(path))
+
+@pytest.mark.parametrize('cut', ('magic', 'offset', 'json', 'whole_footer'))
+def test_truncated_footer_reads_all_chunks(tmp_path, stream, cut):
+
+    path, data = stream
+    footer_offset = int.from_bytes(data[-len(STREAM_MAGIC) - 8:-len(STREAM_MAGIC)], 'little')
+    end = {'magic': len(data) - 1, 'offset': len(data) - len(STREAM_MAGIC) - 3, 'json': (footer_offset + len(data)) // 2, 'whole_footer': footer_offset}[cut]
+
+    (tmp_path / 'cut.stream').write_bytes(data[:end])
+    assert_same(read_streaming_log(path), read_streaming_log(str(tmp_path / 'cut.stream')))
+
+def test_cut_chunk_is_dropped(tmp_path, stream):
+
+    path, data = stream
+    complete = read_streaming_log(path)
+    assert int(complete['n_frames']) > 3 * CHUNK_FRAMES
+
+    # the chunks start after the header: skip two, cut the third in the middle
+    offset = len(STREAM_MAGIC) + 8
+    for _ in range(2): offset += 8 + int.from_bytes(data[offset:offset + 8], 'little')
+    (tmp_path / 'cut.stream').write_bytes(data[:offset + 8 + int.from_bytes(data[offset:offset + 8], 'little') // 2])
+    log = read_streaming_log(str(tmp_path / 'cut.stream'))
+
+    # the first two chunks of the complete log
+    n_frames = 2 * CHUNK_FRAMES
+    assert int(log['n_frames']) == n_frames
+    for name in ('element_ids', 'element_descriptions', 'event_types', 'commands'): assert np.array_equal(log[name], complete[name][:len(log[name])]), name
+
+    events = complete['event_frame'] < n_frames
+    for name in ('event_frame', 'event_type', 'event_subject', 'event_object'): assert np.array_equal(log[name], complete[name][events]), name
+    commands = complete['command_frame'] < n_frames
+    for name in ('command_frame', 'command'): assert np.array_equal(log[name], complete[name][commands]), name
+    assert np.array_equal(log['element_presence'], complete['element_presence'][:n_frames, :len(log['element_ids'])])
+
+    assert np.array_equal(log['element_state_offsets'], complete['element_state_offsets'][:n_frames + 1])
+    assert np.array_equal(log['element_states'], complete['element_states'][:complete['element_state_offsets'][n_frames]])
+    assert np.array_equal(log['state_keyframes'], complete['state_keyframes'][complete['state_keyframes'] < n_frames])
@@ -0,0 +1,56 @@
+import pytest
+
+from lib.transition_statistics import TransitionStatistics
+
+from baseline import SEEDS, baseline_fitness_4, random_population, rescored
+
+"""
+test_transition_statistics.py
+
+The transition statistics count the same transitions of a scan of the log, and compute_fitness_5 (table lookups) gives
+the score of the original compute_fitness_4, as does compute_fitness_4 itself (the verbose path).
+
+Dependencies:
+- pytest
+"""
+
+def scanned_counts(events_per_frame) -> tuple[dict, dict]:
+
+    # times each (trigger, element) fired in a frame with a next frame, times each (trigger, effect, element) followed
+    triggered, followed = {}, {}
+    for frame_id in range(len(events_per_frame) - 1):
+        for event in events_per_frame[frame_id]:
+            key = (event.event_type.id, event.subject.id)
+            triggered[key] = triggered.get(key, 0) + 1
+            for effect_id in {nfe.event_type.id for nfe in events_per_frame[frame_id + 1] if nfe.subject.id == event.subject.id}:
+                followed[key[0], effect_id, key[1]] = followed.get((key[0], effect_id, key[1]), 0) + 1
+
+    return triggered, followed
+
+def test_counts_match_a_scan_of_the_log(log):
+
+    element_pool, event_pool, events_per_frame, event_index = log
+    statistics = TransitionStatistics(element_pool, event_pool, events_per_frame)
+    triggered, followed = scanned_counts(events_per_frame)
+
+    for trigger in event_pool:
+        assert statistics.fired(trigger.id) == any(key[0] == trigger.id for key in triggered)
+        for elem in element_pool:
+            assert statistics.triggered(trigger.id, elem.id) == triggered.get((trigger.id, elem.id), 0)
+            for effect in event_pool:
+                hits = followed.get((trigger.id, effect.id, elem.id), 0)
+                assert statistics.hits(trigger.id, effect.id, elem.id) == hits
+                assert statistics.misses(trigger.id, effect.id, elem.id) == triggered.get((trigger.id, elem.id), 0) - hits
+
+    assert set(followed) <= statistics.should_be_rule
+
+@pytest.mark.parametrize('seed', SEEDS)
+def test_compute_fitness_5_matches_baseline(log, seed):
+
+    element_pool, event_pool, events_per_frame, event_index = log
+    statistics = TransitionStatistics(element_pool, event_pool, events_per_frame)
+    population = random_population(element_pool, event_pool, seed)
+    expected = [baseline_fitness_4(individual, events_per_frame) for individual in population]
+
+    assert rescored(population, lambda ind: ind.compute_fitness_5(statistics)) == expected
+    assert rescored(population, lambda ind: ind.compute_fitness_4(events_per_frame)) == expected